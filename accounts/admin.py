@@ -0,0 +1,12 @@
+from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
+from django.contrib.auth.models import User
+
+from extraadminfilters.paginator import EstimatedCountAdminMixin
+
+
+class OpenStaxUserAdmin(EstimatedCountAdminMixin, UserAdmin):
+    pass
+
+admin.site.unregister(User)
+admin.site.register(User, OpenStaxUserAdmin)
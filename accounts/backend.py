@@ -1,9 +1,12 @@
 import json
 from urllib.parse import urlencode
-from urllib.request import urlopen
 
+import requests
 from django.conf import settings
 from social.backends.oauth import BaseOAuth2
+from social.exceptions import AuthFailed
+
+from openstax.http import get_session
 
 
 class OpenStax(BaseOAuth2):
@@ -43,7 +46,15 @@ class OpenStax(BaseOAuth2):
         except ValueError:
             return None
 
+    def request(self, url, method='GET', *args, **kwargs):
+        """Make requests to the accounts service over the shared http session"""
+        kwargs.setdefault('timeout', self.setting('REQUESTS_TIMEOUT'))
+        try:
+            response = get_session('accounts').request(method, url, *args, **kwargs)
+        except requests.RequestException as err:
+            raise AuthFailed(self, str(err))
+        response.raise_for_status()
+        return response
+
     def urlopen(self, url):
-        with urlopen(url) as f:
-            response = f.read()
-        return response.decode("utf-8")
+        return self.request(url).text
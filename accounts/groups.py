@@ -0,0 +1,86 @@
+import uuid
+
+from django.conf import settings
+
+from openstax.caches import shared_cache
+
+FACULTY_GROUP = 'Faculty'
+CONTENT_MANAGER_GROUPS = ('Content Managers', 'Content Development Intern')
+
+VERSION_KEY = 'user_groups_version:{}'
+SESSION_KEY = '_group_names'
+
+
+def group_cache_version(user_id):
+    """
+    Opaque token that changes whenever the user's groups or account change,
+    kept in the shared cache so every process sees the same one. Returns
+    None without a shared cache, and callers must then not cache anything.
+
+    A missing token (new user, evicted or flushed cache) gets a fresh random
+    one rather than a counter restarting at 0, so values stored against an
+    older token can never match again.
+    """
+    cache = shared_cache()
+    if cache is None:
+        return None
+    key = VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_user_groups(user_ids):
+    """
+    Give these users a new group version so group names and profiles cached
+    in their sessions are rebuilt. Called from the receivers in
+    accounts.models.
+    """
+    cache = shared_cache()
+    if cache is None:
+        return
+    cache.set_many(dict((VERSION_KEY.format(user_id), uuid.uuid4().hex) for user_id in user_ids),
+                   None)
+
+
+def get_group_names(request, refresh=False):
+    """
+    Return the names of the groups request.user belongs to. They are loaded
+    once per request, and with GROUP_CACHE_IN_SESSION once per session until
+    the user's group membership changes (which needs SHARED_CACHE_ALIAS).
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated():
+        return frozenset()
+
+    names = getattr(request, '_group_names', None)
+    if names is not None and not refresh:
+        return names
+
+    version = None
+    if getattr(settings, 'GROUP_CACHE_IN_SESSION', False) and hasattr(request, 'session'):
+        version = group_cache_version(user.pk)
+    use_session = version is not None
+    names = None
+    if use_session:
+        stored = request.session.get(SESSION_KEY)
+        if not refresh and stored and stored['user'] == user.pk and stored['version'] == version:
+            names = frozenset(stored['names'])
+
+    if names is None:
+        names = frozenset(user.groups.values_list('name', flat=True))
+        if use_session:
+            request.session[SESSION_KEY] = {'user': user.pk, 'version': version, 'names': sorted(names)}
+
+    request._group_names = names
+    return names
+
+
+def in_any_group(request, group_names):
+    return not get_group_names(request).isdisjoint(group_names)
+
+
+def is_faculty(request):
+    return FACULTY_GROUP in get_group_names(request)
@@ -0,0 +1,218 @@
+import csv
+import os
+import time
+from itertools import islice
+
+import yaml
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from social.apps.django_app.default.models import UserSocialAuth
+
+from .groups import FACULTY_GROUP, invalidate_user_groups
+
+PROVIDER = 'openstax'
+CHUNK_SIZE = 1000
+
+
+class ImportStats(object):
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.grouped = 0
+        self.errors = []
+        self.start = time.time()
+
+    @property
+    def rate(self):
+        elapsed = time.time() - self.start
+        return self.rows / elapsed if elapsed else 0
+
+    def __str__(self):
+        return "{} rows ({:.0f}/s): {} created, {} updated, {} group memberships added, {} errors".format(
+            self.rows, self.rate, self.created, self.updated, self.grouped, len(self.errors))
+
+
+def read_rows(file_path):
+    """
+    Yield the rows of a .csv file as dicts without loading the whole file.
+    .yaml files hold a single list, so they're parsed in one go.
+    """
+    filename, file_extension = os.path.splitext(file_path)
+    if file_extension == '.yaml':
+        with open(file_path, 'r') as f:
+            for row in yaml.safe_load(f) or []:
+                yield row
+    elif file_extension == '.csv':
+        with open(file_path, 'r') as f:
+            for row in csv.DictReader(f):
+                yield row
+    else:
+        raise NotImplementedError(
+            "'{0}' file type not supported".format(file_extension))
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def row_groups(row):
+    """
+    Group names for an imported user: an explicit 'groups' column plus the
+    same role rules as accounts.pipelines.update_role.
+    """
+    groups = row.get('groups') or []
+    if isinstance(groups, str):
+        groups = [name.strip() for name in groups.split(',') if name.strip()]
+    groups = set(groups)
+    if row.get('self_reported_role') == 'student':
+        groups.add('Student')
+    if row.get('faculty_status') == 'confirmed_faculty':
+        groups.add(FACULTY_GROUP)
+    return groups
+
+
+# group ids looked up during the current import
+_group_ids = {}
+
+
+def group_id(name):
+    if name not in _group_ids:
+        _group_ids[name] = Group.objects.get_or_create(name=name)[0].pk
+    return _group_ids[name]
+
+
+def add_to_groups(memberships):
+    """
+    Insert (user id, group name) memberships that don't exist yet with one
+    bulk_create and return how many were added.
+    """
+    wanted = set((user_id, group_id(name)) for user_id, name in memberships)
+    if not wanted:
+        return 0
+    through = User.groups.through
+    existing = set(through.objects.filter(user_id__in=set(user_id for user_id, _ in wanted),
+                                          group_id__in=set(gid for _, gid in wanted))
+                                  .values_list('user_id', 'group_id'))
+    new = wanted - existing
+    through.objects.bulk_create([through(user_id=user_id, group_id=gid) for user_id, gid in new])
+    # bulk_create doesn't send m2m_changed
+    invalidate_user_groups(set(user_id for user_id, _ in new))
+    return len(new)
+
+
+def unique_usernames(rows):
+    """
+    Map each row's uid to a username that is free, like social-auth's
+    get_username does when the requested one is taken.
+    """
+    wanted = dict((row['uid'], row['username'][:140]) for row in rows)
+    taken = set(User.objects.filter(username__in=set(wanted.values()))
+                            .values_list('username', flat=True))
+    usernames = {}
+    for uid, username in wanted.items():
+        if username in taken:
+            username = '{}_{}'.format(username, uid)[:150]
+        taken.add(username)
+        usernames[uid] = username
+    return usernames
+
+
+def import_user_chunk(rows, stats):
+    rows = [dict(row, uid=str(row['id']), username=str(row['username'])) for row in rows]
+    by_uid = dict((row['uid'], row) for row in rows)
+
+    linked = dict(UserSocialAuth.objects.filter(provider=PROVIDER, uid__in=list(by_uid))
+                                        .values_list('uid', 'user_id'))
+    memberships = []
+
+    # existing users only get their names refreshed, like user_details does
+    users = User.objects.filter(pk__in=linked.values()).only('first_name', 'last_name')
+    uid_by_user = dict((user_id, uid) for uid, user_id in linked.items())
+    for user in users:
+        row = by_uid[uid_by_user[user.pk]]
+        if (user.first_name, user.last_name) != (row.get('first_name') or '', row.get('last_name') or ''):
+            User.objects.filter(pk=user.pk).update(first_name=row.get('first_name') or '',
+                                                   last_name=row.get('last_name') or '')
+            stats.updated += 1
+        memberships.extend((user.pk, name) for name in row_groups(row))
+
+    new_rows = [row for uid, row in by_uid.items() if uid not in linked]
+    if new_rows:
+        usernames = unique_usernames(new_rows)
+        new_users = User.objects.bulk_create([
+            User(username=usernames[row['uid']],
+                 email='{}@openstax.org'.format(usernames[row['uid']]),
+                 first_name=row.get('first_name') or '',
+                 last_name=row.get('last_name') or '',
+                 password=make_password(None))
+            for row in new_rows
+        ])
+        UserSocialAuth.objects.bulk_create([
+            UserSocialAuth(user_id=user.pk, provider=PROVIDER, uid=row['uid'], extra_data={})
+            for user, row in zip(new_users, new_rows)
+        ])
+        memberships.extend((user.pk, name) for user, row in zip(new_users, new_rows)
+                           for name in row_groups(row))
+        stats.created += len(new_users)
+
+    stats.grouped += add_to_groups(memberships)
+
+
+def import_users(rows, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Create or update OpenStax accounts users from rows with id, username,
+    first_name and last_name (and optionally groups, self_reported_role,
+    faculty_status). Each chunk is resolved with a few set-based queries and
+    written with bulk_create in its own transaction.
+    """
+    stats = ImportStats()
+    _group_ids.clear()
+    for chunk in chunked(rows, chunk_size):
+        with transaction.atomic():
+            import_user_chunk(chunk, stats)
+        stats.rows += len(chunk)
+        if progress:
+            progress(stats)
+    return stats
+
+
+def add_faculty_by_name(rows, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Add the users named in (first_name, last_name) rows to the Faculty
+    group. Names that match no user or several users are reported as errors.
+    """
+    stats = ImportStats()
+    _group_ids.clear()
+    for chunk in chunked(rows, chunk_size):
+        names = set((row[0], row[1]) for row in chunk)
+        matches = {}
+        candidates = User.objects.filter(first_name__in=set(first for first, last in names),
+                                         last_name__in=set(last for first, last in names)) \
+                                 .values_list('pk', 'first_name', 'last_name')
+        for pk, first_name, last_name in candidates:
+            if (first_name, last_name) in names:
+                matches.setdefault((first_name, last_name), []).append(pk)
+
+        memberships = []
+        for first_name, last_name in names:
+            found = matches.get((first_name, last_name), [])
+            if len(found) == 1:
+                memberships.append((found[0], FACULTY_GROUP))
+            else:
+                stats.errors.append("error finding user {} {} - ({} matches)".format(
+                    first_name, last_name, len(found)))
+
+        with transaction.atomic():
+            stats.grouped += add_to_groups(memberships)
+        stats.rows += len(chunk)
+        if progress:
+            progress(stats)
+    return stats
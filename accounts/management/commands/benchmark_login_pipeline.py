@@ -0,0 +1,56 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from accounts.pipelines import save_profile, sync_user, update_email, update_role
+
+RESPONSE = {
+    'contact_infos': [{'id': 1, 'value': 'old@example.edu'},
+                      {'id': 2, 'value': 'new@example.edu'}],
+    'self_reported_role': 'student',
+    'faculty_status': 'confirmed_faculty',
+    'applications': [{'name': 'OpenStax Tutor'}],
+}
+
+
+def old_pipeline(user, response):
+    save_profile(user)
+    update_email(user, response)
+    update_role(user, response)
+
+
+def new_pipeline(user, response):
+    sync_user(user, response)
+
+
+class Command(BaseCommand):
+    help = ("Compare the queries and time of the login pipeline profile stages "
+            "(save_profile/update_email/update_role against sync_user), in a "
+            "rolled back transaction")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            for name, stage in (('save_profile + update_email + update_role', old_pipeline),
+                                ('sync_user', new_pipeline)):
+                user = User.objects.create_user('benchmark-{}'.format(stage.__name__))
+                # the first login creates the groups and memberships
+                stage(user, RESPONSE)
+
+                queries = 0
+                start = time.time()
+                for _ in range(options['logins']):
+                    user = User.objects.get(pk=user.pk)
+                    with CaptureQueriesContext(connection) as context:
+                        stage(user, RESPONSE)
+                    queries += len(context.captured_queries)
+                elapsed = time.time() - start
+
+                self.stdout.write("{}: {:.1f} queries and {:.2f}ms per returning login".format(
+                    name, queries / options['logins'], elapsed * 1000 / options['logins']))
+            transaction.set_rollback(True)
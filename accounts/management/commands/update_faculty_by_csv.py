@@ -2,8 +2,16 @@ import csv
 import os
 
 from django.core.management.base import BaseCommand
-from django.contrib.auth.models import User, Group
-from django.core.exceptions import ObjectDoesNotExist, MultipleObjectsReturned
+
+from accounts.importer import CHUNK_SIZE, add_faculty_by_name
+
+
+def read_names(file_path):
+    with open(file_path, 'r') as f:
+        reader = csv.reader(f)
+        next(reader, None)  # headers
+        for row in reader:
+            yield row[0], row[1]
 
 
 class Command(BaseCommand):
@@ -11,27 +19,18 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('file_path')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
 
     def handle(self, *args, **options):
-        faculty_group, created = Group.objects.get_or_create(name="Faculty")
-
-        with open(options['file_path'], 'r') as f:
-            filename, file_extension = os.path.splitext(options['file_path'])
-            if file_extension == '.csv':
-                reader = csv.reader(f)
-                faculty_list = [row for row in reader]
-                headers = faculty_list.pop(0)
-                for faculty_member in faculty_list:
-                    first_name = faculty_member[0]
-                    last_name = faculty_member[1]
-
-                    try:
-                        user = User.objects.get(first_name=first_name, last_name=last_name)
-                        faculty_group.user_set.add(user)
-                        print("{} {} added to faculty group.".format(first_name, last_name))
-                    except (ObjectDoesNotExist, MultipleObjectsReturned) as e:
-                        print("error finding user {} {} - ({})".format(first_name, last_name, e))
-
-            else:
-                raise NotImplementedError(
-                    "'{0}' file type not supported".format(file_extension))
+        filename, file_extension = os.path.splitext(options['file_path'])
+        if file_extension != '.csv':
+            raise NotImplementedError(
+                "'{0}' file type not supported".format(file_extension))
+
+        stats = add_faculty_by_name(read_names(options['file_path']),
+                                    chunk_size=options['chunk_size'],
+                                    progress=lambda stats: self.stdout.write(str(stats)))
+        for error in stats.errors:
+            self.stdout.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            "{} users added to faculty group: {}".format(stats.grouped, stats)))
@@ -0,0 +1,40 @@
+from django.contrib.auth.models import Group, User
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+
+from .groups import invalidate_user_groups
+from .profile import store_profile
+
+
+@receiver(m2m_changed, sender=User.groups.through, dispatch_uid="invalidate_user_groups")
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # user.groups.add(...), remove(...), clear()
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_user_groups([instance.pk])
+    elif action == 'pre_clear':
+        # group.user_set.clear(), the members are gone by post_clear
+        instance._cleared_user_ids = list(instance.user_set.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        invalidate_user_groups(getattr(instance, '_cleared_user_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        invalidate_user_groups(pk_set or [])
+
+
+@receiver(pre_delete, sender=Group, dispatch_uid="invalidate_deleted_group_members")
+def group_deleted(sender, instance, **kwargs):
+    invalidate_user_groups(instance.user_set.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=User, dispatch_uid="invalidate_user_profile")
+def user_changed(sender, instance, created, update_fields=None, **kwargs):
+    # logging in only touches last_login, which isn't in the profile
+    if not created and update_fields != frozenset(['last_login']):
+        invalidate_user_groups([instance.pk])
+
+
+@receiver(user_logged_in, dispatch_uid="store_user_profile")
+def user_logged_in_profile(sender, request, user, **kwargs):
+    if request is not None and hasattr(request, 'session'):
+        store_profile(request, user)
@@ -1,6 +1,9 @@
-from django.contrib.auth.models import Group
+from django.contrib.auth.models import Group, User
+from django.db import IntegrityError, transaction
 from social.apps.django_app.default.models import UserSocialAuth
 
+from .groups import FACULTY_GROUP, invalidate_user_groups
+
 def save_profile(user, *args, **kwargs):
     # for now - setting email address to prevent issues, should update it
     # eventually
@@ -40,6 +43,82 @@ def update_role(user, response, *args, **kwargs):
         group.user_set.add(user)
 
 
+# role group name -> id, filled on first use in this process
+_role_group_ids = {}
+
+
+def role_group_ids(names):
+    missing = [name for name in names if name not in _role_group_ids]
+    for name in missing:
+        group, created = Group.objects.get_or_create(name=name)
+        _role_group_ids[name] = group.pk
+    return set(_role_group_ids[name] for name in names)
+
+
+def newest_email(response):
+    try:
+        # grabbing the highest id in the email list to determine newest email
+        return max(response.get('contact_infos') or [], key=lambda x: x['id'])['value']
+    except ValueError:
+        return "none@openstax.org"
+
+
+def role_groups(response):
+    """
+    Groups an accounts user belongs in according to their profile, same rules
+    as update_role.
+    """
+    groups = set()
+    applications = response.get('applications')
+    if response.get('self_reported_role') == 'student':
+        groups.add('Student')
+    if response.get('faculty_status') == 'confirmed_faculty':
+        groups.add(FACULTY_GROUP)
+    if applications and 'OpenStax Tutor' in [app['name'] for app in applications]:
+        groups.add('Tutor')
+    return groups
+
+
+def sync_user(user, response, is_new=False, *args, **kwargs):
+    """
+    Replaces save_profile, update_email and update_role in the login
+    pipeline: the email and role groups are computed up front, the user row
+    is written at most once and missing groups are added with one insert.
+    """
+    if not user:
+        return
+
+    email = newest_email(response)
+    if user.email != email:
+        user.email = email
+        user.save(update_fields=['email'])
+
+    names = role_groups(response)
+    if not names:
+        return
+
+    through = User.groups.through
+    for retry in (True, False):
+        wanted = role_group_ids(names)
+        if not is_new:
+            wanted -= set(through.objects.filter(user_id=user.pk, group_id__in=wanted)
+                                         .values_list('group_id', flat=True))
+        if not wanted:
+            return
+        try:
+            with transaction.atomic():
+                through.objects.bulk_create([through(user_id=user.pk, group_id=group_id)
+                                             for group_id in wanted])
+            break
+        except IntegrityError:
+            # a cached group was deleted, or a concurrent login added it first
+            _role_group_ids.clear()
+            if not retry:
+                raise
+            is_new = False
+    invalidate_user_groups([user.pk])
+
+
 def social_user(backend, uid, user=None, *args, **kwargs):
     """Return UserSocialAuth account for backend/uid pair or None if it
     doesn't exists.
@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY as AUTH_USER_SESSION_KEY
+from social.apps.django_app.default.models import \
+    DjangoStorage as SocialAuthStorage
+
+from .groups import group_cache_version
+
+PROFILE_SESSION_KEY = '_user_profile'
+
+ANONYMOUS_PROFILE = {
+    'id': False,
+    'email': '',
+    'username': '',
+    'first_name': '',
+    'last_name': '',
+    'is_staff': False,
+    'is_superuser': False,
+    'groups': [],
+    'accounts_id': None,
+}
+
+
+def build_profile(user, version=None):
+    """
+    The /api/user/ payload for a user, tagged with the group version it was
+    built from.
+    """
+    social_auth = SocialAuthStorage.user.get_social_auth_for_user(user)[:1]
+    return {
+        'id': user.pk,
+        'email': user.email,
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'is_staff': user.is_staff,
+        'is_superuser': user.is_superuser,
+        'groups': sorted(user.groups.values_list('name', flat=True)),
+        'accounts_id': social_auth[0].uid if social_auth else None,
+        'version': version,
+    }
+
+
+def store_profile(request, user):
+    """
+    Build the user's profile and keep it in their session, unless there is
+    no shared cache to hold the version that invalidates it.
+    """
+    version = group_cache_version(user.pk)
+    profile = build_profile(user, version)
+    if version is not None:
+        request.session[PROFILE_SESSION_KEY] = profile
+    return profile
+
+
+def get_profile(request):
+    """
+    Return the profile of the logged in user from their session. Requests
+    without a session cookie are answered without touching the database,
+    and the stored profile is rebuilt when the user's groups or account
+    change (see accounts.models). Without a shared cache the profile is
+    built on every request.
+    """
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return ANONYMOUS_PROFILE
+    user_id = request.session.get(AUTH_USER_SESSION_KEY)
+    if user_id is None:
+        return ANONYMOUS_PROFILE
+
+    profile = request.session.get(PROFILE_SESSION_KEY)
+    if not profile or str(profile['id']) != str(user_id) or profile['version'] is None or \
+            profile['version'] != group_cache_version(profile['id']):
+        if not request.user.is_authenticated():
+            return ANONYMOUS_PROFILE
+        profile = store_profile(request, request.user)
+
+    return dict((key, value) for key, value in profile.items() if key != 'version')
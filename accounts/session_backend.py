@@ -0,0 +1,119 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured, SuspiciousOperation
+from django.utils import timezone
+
+from openstax.caches import is_shared
+
+KEY_PREFIX = 'openstax.session.'
+
+
+class SessionStore(DBStore):
+    """
+    Session engine reading from the cache and writing behind to the
+    database: the DB row is only written when the session data changes or
+    its expiry gets within SESSION_DB_REFRESH seconds, so a cache flush
+    never logs anyone out but steady traffic doesn't rewrite django_session.
+
+    SESSION_CACHE_ALIAS must name a cache shared by every process, otherwise
+    a logout in one worker would go unnoticed by the others.
+    """
+    cache_key_prefix = KEY_PREFIX
+
+    def __init__(self, session_key=None):
+        self._cache = caches[settings.SESSION_CACHE_ALIAS]
+        if not is_shared(self._cache):
+            raise ImproperlyConfigured(
+                "accounts.session_backend needs a cache shared by every process, "
+                "SESSION_CACHE_ALIAS '{}' isn't".format(settings.SESSION_CACHE_ALIAS))
+        # (data digest, expiry) of the row in the database, when known
+        self._db_state = None
+        super(SessionStore, self).__init__(session_key)
+
+    @property
+    def cache_key(self):
+        return self.cache_key_prefix + self._get_or_create_session_key()
+
+    def _cache_key(self, session_key):
+        return self.cache_key_prefix + session_key
+
+    @staticmethod
+    def digest(data):
+        return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def load(self):
+        try:
+            entry = self._cache.get(self.cache_key)
+        except Exception:
+            # don't fail if the cache is unreachable, the DB has the session
+            entry = None
+        if entry is not None:
+            self._db_state = (entry['digest'], entry['db_expiry'])
+            return entry['data']
+
+        try:
+            session = self.model.objects.get(session_key=self.session_key,
+                                             expire_date__gt=timezone.now())
+            data = self.decode(session.session_data)
+        except (self.model.DoesNotExist, SuspiciousOperation):
+            self._session_key = None
+            return {}
+        self._db_state = (self.digest(data), session.expire_date)
+        # the session cache isn't set yet, get_expiry_age() would load() again
+        self._set_cache(data, expiry=session.expire_date)
+        return data
+
+    def _set_cache(self, data, **kwargs):
+        digest, db_expiry = self._db_state
+        timeout = min(self.get_expiry_age(**kwargs),
+                      int((db_expiry - timezone.now()).total_seconds()))
+        if timeout <= 0:
+            return
+        try:
+            self._cache.set(self.cache_key,
+                            {'data': data, 'digest': digest, 'db_expiry': db_expiry},
+                            timeout)
+        except Exception:
+            pass
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        digest = self.digest(data)
+        refresh = timedelta(seconds=getattr(settings, 'SESSION_DB_REFRESH', settings.SESSION_COOKIE_AGE // 2))
+
+        if must_create or self._db_state is None or self._db_state[0] != digest or \
+                self._db_state[1] - timezone.now() < refresh:
+            super(SessionStore, self).save(must_create=must_create)
+            self._db_state = (digest, self.get_expiry_date())
+        self._set_cache(data)
+
+    def exists(self, session_key):
+        try:
+            if self._cache_key(session_key) in self._cache:
+                return True
+        except Exception:
+            pass
+        return super(SessionStore, self).exists(session_key)
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        try:
+            self._cache.delete(self._cache_key(session_key))
+        except Exception:
+            pass
+        super(SessionStore, self).delete(session_key)
+
+    def flush(self):
+        self.clear()
+        self.delete(self.session_key)
+        self._session_key = None
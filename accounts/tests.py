@@ -0,0 +1,98 @@
+from django.contrib import admin
+from django.contrib.auth.models import Group, User
+from django.test import TestCase, TransactionTestCase
+
+from accounts.pipelines import _role_group_ids, sync_user
+
+
+def accounts_response(emails=('reader@example.com', ), role='student',
+                      faculty_status='confirmed_faculty', tutor=True):
+    return {
+        'contact_infos': [{'id': i, 'value': email} for i, email in enumerate(emails)],
+        'self_reported_role': role,
+        'faculty_status': faculty_status,
+        'applications': [{'name': 'OpenStax Tutor'}] if tutor else [],
+    }
+
+
+def group_names(user):
+    return sorted(user.groups.values_list('name', flat=True))
+
+
+class SyncUserTest(TestCase):
+
+    def setUp(self):
+        # ids cached by earlier tests were rolled back with them
+        _role_group_ids.clear()
+        self.addCleanup(_role_group_ids.clear)
+        self.user = User.objects.create_user('reader', email='reader@example.com')
+
+    def test_newest_email_is_saved(self):
+        sync_user(self.user, accounts_response(emails=('old@example.com', 'new@example.com'),
+                                               role=None, faculty_status=None, tutor=False))
+        self.assertEqual(User.objects.get(pk=self.user.pk).email, 'new@example.com')
+
+    def test_unchanged_users_are_not_written(self):
+        response = accounts_response(role=None, faculty_status=None, tutor=False)
+        with self.assertNumQueries(0):
+            sync_user(self.user, response)
+
+    def test_new_users_get_their_role_groups(self):
+        sync_user(self.user, accounts_response(), is_new=True)
+        self.assertEqual(group_names(self.user), ['Faculty', 'Student', 'Tutor'])
+
+    def test_returning_users_only_get_missing_groups(self):
+        sync_user(self.user, accounts_response(tutor=False))
+        # only the existing memberships are read
+        with self.assertNumQueries(1):
+            sync_user(self.user, accounts_response(tutor=False))
+
+        sync_user(self.user, accounts_response())
+        self.assertEqual(group_names(self.user), ['Faculty', 'Student', 'Tutor'])
+
+    def test_memberships_added_concurrently_are_not_duplicated(self):
+        self.user.groups.add(Group.objects.create(name='Student'))
+        # is_new skips the membership check, the insert conflicts and is retried
+        sync_user(self.user, accounts_response(), is_new=True)
+        self.assertEqual(group_names(self.user), ['Faculty', 'Student', 'Tutor'])
+
+
+class SyncUserDeletedGroupTest(TransactionTestCase):
+    # foreign keys are checked when the insert commits, so this needs real
+    # transactions
+
+    def setUp(self):
+        _role_group_ids.clear()
+        self.addCleanup(_role_group_ids.clear)
+
+    def test_deleted_group_is_recreated(self):
+        sync_user(User.objects.create_user('first'), accounts_response())
+        Group.objects.filter(name='Faculty').delete()
+
+        user = User.objects.create_user('second')
+        sync_user(user, accounts_response())
+        self.assertEqual(group_names(user), ['Faculty', 'Student', 'Tutor'])
+
+
+class UserChangelistTest(TestCase):
+
+    def setUp(self):
+        for i in range(4):
+            User.objects.create_user('user{}'.format(i))
+        model_admin = admin.site._registry[User]
+        self.addCleanup(setattr, model_admin, 'list_per_page', model_admin.list_per_page)
+        model_admin.list_per_page = 3
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+
+    def test_counts_and_pages(self):
+        response = self.client.get('/django-admin/auth/user/')
+        self.assertEqual(response.status_code, 200)
+        cl = response.context['cl']
+        self.assertEqual((cl.result_count, cl.paginator.num_pages, len(cl.result_list)), (5, 2, 3))
+
+        response = self.client.get('/django-admin/auth/user/', {'p': 1})
+        self.assertEqual(len(response.context['cl'].result_list), 2)
+
+        response = self.client.get('/django-admin/auth/user/', {'q': 'user'})
+        self.assertEqual(response.context['cl'].result_count, 4)
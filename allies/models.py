@@ -6,7 +6,7 @@ from wagtail.wagtailcore.fields import RichTextField
 from wagtail.wagtailcore.models import Page
 from wagtail.wagtailimages.edit_handlers import ImageChooserPanel
 
-from openstax.functions import build_image_url
+from openstax.functions import build_image_url, get_rendition_urls
 from snippets.models import Subject
 
 
@@ -52,6 +52,14 @@ class Ally(Page):
 
     ally_bw_logo = property(get_ally_logo)
 
+    def get_ally_logo_srcsets(self):
+        srcsets = get_rendition_urls([self.logo_color_id, self.logo_bw_id])
+        return {
+            'color': srcsets.get(self.logo_color_id),
+            'bw': srcsets.get(self.logo_bw_id),
+        }
+    ally_logo_srcsets = property(get_ally_logo_srcsets)
+
     heading = models.CharField(max_length=255)
     short_description = RichTextField()
     long_description = RichTextField()
@@ -59,16 +67,18 @@ class Ally(Page):
     # a method to reverse retrieve the subject names, prevents multiple calls from Webview
     # /api/v1/pages/?type=allies.Ally&fields=title,short_description,ally_logo,heading,ally_subject_list
     def ally_subject_list(self):
-        subjects = AllySubject.objects.filter(ally=self)
         subject_names = []
-        for subject in subjects:
+        for subject in self.ally_subjects.all():
             subject_names.append(subject.subject.name)
         return subject_names
     property(ally_subject_list)
 
+    # applied by the v2 pages endpoint when listing ?type=allies.Ally
+    api_prefetch_related = ('ally_subjects__subject', )
+
     api_fields = ('online_homework', 'adaptive_courseware', 'customization_tools',
                   'ally_subject_list', 'is_ap', 'do_not_display',
-                  'ally_color_logo', 'ally_bw_logo', 'heading',
+                  'ally_color_logo', 'ally_bw_logo', 'ally_logo_srcsets', 'heading',
                   'short_description', 'long_description')
 
     content_panels = Page.content_panels + [
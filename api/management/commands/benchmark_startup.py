@@ -0,0 +1,59 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+# run in a fresh interpreter so nothing is imported or cached yet
+SCRIPT = """
+import json, sys, time
+started = time.time()
+import openstax.wsgi
+imported = time.time()
+from wsgiref.util import setup_testing_defaults
+environ = {'PATH_INFO': sys.argv[1], 'HTTP_HOST': sys.argv[2]}
+setup_testing_defaults(environ)
+status = []
+b''.join(openstax.wsgi.application(environ, lambda s, h, e=None: status.append(s)))
+answered = time.time()
+b''.join(openstax.wsgi.application(dict(environ), lambda s, h, e=None: None))
+print(json.dumps({'import': imported - started, 'first': answered - imported,
+                  'second': time.time() - answered, 'status': status[0]}))
+"""
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+class Command(BaseCommand):
+    help = ("Measure the time from importing openstax.wsgi to the first response, "
+            "with and without the warm-up")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/api/books/')
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--runs', type=int, default=5)
+
+    def handle(self, *args, **options):
+        for warm in ('0', '1'):
+            env = dict(os.environ, OPENSTAX_WARMUP=warm)
+            results = []
+            for _ in range(options['runs']):
+                try:
+                    output = subprocess.check_output(
+                        [sys.executable, '-c', SCRIPT, options['url'], options['host']], env=env)
+                except subprocess.CalledProcessError as e:
+                    raise CommandError("startup failed with exit code {}".format(e.returncode))
+                results.append(json.loads(output.decode('utf-8').strip().splitlines()[-1]))
+
+            self.stdout.write(
+                "warm-up {}: import {:.0f}ms, first response {:.0f}ms, "
+                "second response {:.0f}ms ({})".format(
+                    'on' if warm == '1' else 'off',
+                    median([r['import'] for r in results]) * 1000,
+                    median([r['first'] for r in results]) * 1000,
+                    median([r['second'] for r in results]) * 1000,
+                    results[-1]['status']))
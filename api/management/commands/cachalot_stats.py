@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.urls import resolve
+from wagtail.wagtailcore.models import Site
+
+from openstax import cache_stats
+
+BENCHMARK_URLS = (
+    '/api/books/',
+    '/api/news/',
+    '/api/v2/pages/',
+    '/api/sticky/',
+    '/api/footer/',
+    '/api/errata/',
+)
+
+
+class Command(BaseCommand):
+    help = "show cachalot hits, misses and invalidations per table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', default=False,
+                            help="clear the counters")
+        parser.add_argument('--benchmark', action='store_true', default=False,
+                            help="request the main API endpoints and report their hit rates")
+        parser.add_argument('--runs', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if options['benchmark']:
+            return self.benchmark(options['runs'])
+        if options['reset']:
+            cache_stats.reset_stats()
+            self.stdout.write(self.style.SUCCESS("Counters cleared"))
+            return
+
+        stats = cache_stats.get_stats()
+        self.stdout.write("{:40} {:>10} {:>10} {:>14} {:>9}".format(
+            'table', 'hits', 'misses', 'invalidations', 'hit rate'))
+        for table in sorted(stats, key=lambda t: -(stats[t]['hits'] + stats[t]['misses'])):
+            counts = stats[table]
+            self.stdout.write("{:40} {:>10} {:>10} {:>14} {:>9}".format(
+                table, counts['hits'], counts['misses'], counts['invalidations'],
+                '-' if counts['hit_rate'] is None else '{:.1%}'.format(counts['hit_rate'])))
+
+    def benchmark(self, runs):
+        cache_stats.install()
+        factory = RequestFactory()
+        site = Site.objects.filter(is_default_site=True).first()
+        uncachable = settings.CACHALOT_UNCACHABLE_TABLES
+
+        for url in BENCHMARK_URLS:
+            cache_stats.reset_local()
+            for _ in range(runs):
+                request = factory.get(url)
+                request.user = AnonymousUser()
+                request.site = site
+                match = resolve(url)
+                match.func(request, *match.args, **match.kwargs)
+
+            counts = dict.fromkeys(('hits', 'misses'), 0)
+            for table, table_counts in cache_stats.local_stats().items():
+                counts['hits'] += table_counts['hits']
+                counts['misses'] += table_counts['misses']
+            rate = cache_stats.hit_rate(counts)
+            self.stdout.write("{}: {} hits, {} misses, {} over {} requests".format(
+                url, counts['hits'], counts['misses'],
+                'no cached queries' if rate is None else '{:.1%} hit rate'.format(rate), runs))
+        cache_stats.reset_local()
+        self.stdout.write("uncachable tables: {}".format(', '.join(sorted(uncachable))))
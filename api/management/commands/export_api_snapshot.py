@@ -0,0 +1,139 @@
+import multiprocessing
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Max
+from django.test import RequestFactory
+from django.urls import resolve
+from django.utils import timezone
+from wagtail.wagtailcore.models import Page, PageRevision
+
+from api.snapshot import (content_hash, load_manifest, snapshot_path,
+                          write_file, write_manifest)
+from allies.models import Ally
+from books.models import Book, BookIndex
+from news.models import NewsArticle, NewsIndex
+
+
+def api_url(page):
+    """
+    Return the /api/ url that serves the JSON for a page, or None if the page
+    type is not exposed through the custom API views.
+    """
+    if isinstance(page, Book):
+        return '/api/books/{}/'.format(page.slug)
+    if isinstance(page, BookIndex):
+        return '/api/books/'
+    if isinstance(page, NewsArticle):
+        return '/api/news/{}/'.format(page.slug)
+    if isinstance(page, NewsIndex):
+        return '/api/news/'
+    if page._meta.app_label == 'pages':
+        return '/api/pages/{}/'.format(page.slug)
+    return None
+
+
+def dependent_revisions(page):
+    """
+    Index pages embed data from other pages, so they are only unchanged if
+    none of the pages they aggregate have a newer revision.
+    """
+    if isinstance(page, BookIndex):
+        pages = Book.objects.all()
+    elif isinstance(page, NewsIndex):
+        pages = NewsArticle.objects.live().child_of(page)
+    elif page._meta.model_name == 'ecosystemallies':
+        pages = Ally.objects.all()
+    elif page._meta.model_name == 'marketing':
+        pages = Book.objects.filter(tutor_marketing_book=True)
+    else:
+        return None
+    return PageRevision.objects.filter(page__in=pages).aggregate(Max('id'))['id__max']
+
+
+def revision_key(page):
+    revision = PageRevision.objects.filter(page=page).aggregate(Max('id'))['id__max']
+    return '{}:{}'.format(revision, dependent_revisions(page))
+
+
+def init_worker():
+    if not apps.ready:
+        django.setup()
+    # connections inherited through fork must not be shared with the parent
+    for connection in connections.all():
+        connection.close()
+
+
+def render(url):
+    request = RequestFactory().get(url)
+    request.user = AnonymousUser()
+    match = resolve(url)
+    response = match.func(request, *match.args, **match.kwargs)
+    return url, response.status_code, response['Content-Type'], response.content
+
+
+class Command(BaseCommand):
+    help = "write the JSON served by the /api/ page views to a static snapshot"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=getattr(settings, 'API_SNAPSHOT_ROOT', None))
+        parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+        parser.add_argument('--force', action='store_true', default=False,
+                            help="re-render pages even if their revision is unchanged")
+
+    def handle(self, *args, **options):
+        root = options['output']
+        if not root:
+            raise ValueError("no output directory, set API_SNAPSHOT_ROOT or pass --output")
+
+        previous = load_manifest(root).get('entries', {})
+        entries = {}
+        pending = {}
+        for page in Page.objects.live().specific():
+            url = api_url(page)
+            if url is None or url in entries or url in pending:
+                continue
+            revision = revision_key(page)
+            entry = previous.get(url)
+            if not options['force'] and entry and entry['revision'] == revision:
+                entries[url] = entry
+            else:
+                pending[url] = revision
+
+        self.stdout.write("{} unchanged, {} to render".format(len(entries), len(pending)))
+
+        # workers open their own connections
+        for connection in connections.all():
+            connection.close()
+
+        failed = 0
+        pool = multiprocessing.Pool(processes=options['workers'], initializer=init_worker)
+        try:
+            for url, status, content_type, content in pool.imap_unordered(render, sorted(pending)):
+                if status != 200:
+                    failed += 1
+                    self.stderr.write("{} returned {}".format(url, status))
+                    continue
+                path = snapshot_path(url)
+                write_file(root, path, content)
+                entries[url] = {
+                    'path': path,
+                    'sha256': content_hash(content),
+                    'revision': pending[url],
+                    'content_type': content_type,
+                }
+        finally:
+            pool.close()
+            pool.join()
+
+        write_manifest(root, {
+            'generated': timezone.now().isoformat(),
+            'entries': entries,
+        })
+        response = self.style.SUCCESS(
+            "Snapshot written to {} ({} pages, {} failed)".format(root, len(entries), failed))
+        self.stdout.write(response)
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from wagtail.wagtailimages.models import Image, Rendition
+
+from openstax.renditions import generate_renditions, rendition_specs
+
+
+class Command(BaseCommand):
+    help = "generate the IMAGE_RENDITIONS sizes for existing images"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', default=False,
+                            help="process every image, not only those missing renditions")
+
+    def handle(self, *args, **options):
+        specs = [spec for name, spec in rendition_specs()]
+        images = Image.objects.order_by('pk')
+        if not options['all']:
+            complete = {}
+            for image_id in Rendition.objects.filter(filter_spec__in=specs).values_list('image_id', flat=True):
+                complete[image_id] = complete.get(image_id, 0) + 1
+            images = images.exclude(pk__in=[pk for pk, count in complete.items() if count >= len(specs)])
+
+        count = 0
+        for image_id in images.values_list('pk', flat=True).iterator():
+            generate_renditions(image_id)
+            count += 1
+        response = self.style.SUCCESS("Generated renditions for {} images".format(count))
+        self.stdout.write(response)
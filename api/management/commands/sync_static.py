@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.files.storage import get_storage_class
+from django.core.management.base import BaseCommand
+
+from openstax.static_sync import StaticSync
+
+
+class Command(BaseCommand):
+    help = ("upload the static files that changed since the last sync, with content-hashed "
+            "copies for long lived caching (a faster collectstatic)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--force', action='store_true', default=False,
+                            help="upload every file, ignoring the stored manifest")
+        parser.add_argument('--dry-run', action='store_true', default=False)
+
+    def handle(self, *args, **options):
+        sync = StaticSync(get_storage_class(settings.STATICFILES_STORAGE), options['workers'])
+        result = sync.run(force=options['force'], dry_run=options['dry_run'])
+        if options['verbosity'] > 1:
+            for name in result['changed']:
+                self.stdout.write(name)
+        self.stdout.write(self.style.SUCCESS("{} {} files, {} unchanged in {:.1f}s".format(
+            'Would upload' if options['dry_run'] else 'Uploaded',
+            len(result['changed']), result['unchanged'], result['seconds'])))
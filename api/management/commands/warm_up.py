@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from openstax.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = "load url patterns, page types, serializers and common queries, and report the cost"
+
+    def handle(self, *args, **options):
+        report = warm_up()
+        for name, seconds in report['steps']:
+            self.stdout.write("{}: {:.0f}ms".format(name, seconds * 1000))
+        self.stdout.write(self.style.SUCCESS(
+            "Warm-up took {:.2f}s, max rss {:.1f}MB".format(
+                report['seconds'], report['maxrss'] / 1024.0)))
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import mimetypes
+import os
+import sys
+import time
+
+from django.conf import settings
+from django.core.signals import got_request_exception
+from django.db import DatabaseError
+from django.dispatch import receiver
+
+MANIFEST_NAME = 'manifest.json'
+DB_ERROR_ENVIRON_KEY = 'openstax.snapshot.database_error'
+
+
+def snapshot_path(url):
+    """
+    Map an API url (eg. /api/pages/about/) to its file inside the snapshot.
+    """
+    parts = [part for part in url.strip('/').split('/') if part]
+    return os.path.join(*(parts + ['index.json']))
+
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def load_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST_NAME), 'r') as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return {'entries': {}}
+
+
+def write_file(root, relative_path, content):
+    """
+    Write content atomically so a server reading the snapshot never sees a
+    half written file.
+    """
+    path = os.path.join(root, relative_path)
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    tmp_path = '{}.tmp'.format(path)
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def write_manifest(root, manifest):
+    write_file(root, MANIFEST_NAME,
+               json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+
+
+@receiver(got_request_exception, dispatch_uid='snapshot_flag_database_error')
+def flag_database_error(sender, request=None, **kwargs):
+    """
+    Mark the WSGI environ when a request failed because the database could
+    not be reached, so SnapshotFallback knows it can answer from the snapshot.
+    """
+    exc = sys.exc_info()[1]
+    if request is not None and isinstance(exc, DatabaseError):
+        request.environ[DB_ERROR_ENVIRON_KEY] = True
+
+
+class SnapshotFallback(object):
+    """
+    WSGI middleware serving GET requests from the static API snapshot when
+    the database is unreachable. Once a database error is seen, snapshot
+    urls are served directly for `retry_after` seconds before Django is tried
+    again.
+    """
+    manifest_check_interval = 60
+
+    def __init__(self, application, root, retry_after=30):
+        self.application = application
+        self.root = root
+        self.retry_after = retry_after
+        self.down_until = 0
+        self.manifest_mtime = None
+        self.manifest_checked = 0
+        self.entries = {}
+
+    def refresh_manifest(self, force=False):
+        now = time.time()
+        if not force and now - self.manifest_checked < self.manifest_check_interval:
+            return
+        self.manifest_checked = now
+        try:
+            mtime = os.stat(os.path.join(self.root, MANIFEST_NAME)).st_mtime
+        except OSError:
+            self.entries = {}
+            return
+        if mtime != self.manifest_mtime:
+            self.entries = load_manifest(self.root).get('entries', {})
+            self.manifest_mtime = mtime
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        self.refresh_manifest()
+        if environ.get('REQUEST_METHOD') not in ('GET', 'HEAD') or path not in self.entries:
+            return self.application(environ, start_response)
+
+        if time.time() < self.down_until:
+            return self.serve(path, environ, start_response)
+
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured['args'] = (status, headers, exc_info)
+            return lambda data: None
+
+        response = self.application(environ, capture)
+        if environ.get(DB_ERROR_ENVIRON_KEY):
+            if hasattr(response, 'close'):
+                response.close()
+            self.down_until = time.time() + self.retry_after
+            return self.serve(path, environ, start_response)
+
+        start_response(*captured['args'])
+        return response
+
+    def serve(self, path, environ, start_response):
+        entry = self.entries.get(path)
+        if entry is None:
+            start_response('503 Service Unavailable', [('Content-Type', 'text/plain')])
+            return [b'Service Unavailable']
+
+        with open(os.path.join(self.root, entry['path']), 'rb') as f:
+            content = f.read()
+        content_type = entry.get('content_type') or mimetypes.guess_type(entry['path'])[0]
+        start_response('200 OK', [
+            ('Content-Type', content_type),
+            ('Content-Length', str(len(content))),
+            ('ETag', '"{}"'.format(entry['sha256'])),
+            ('X-Served-From', 'snapshot'),
+        ])
+        if environ.get('REQUEST_METHOD') == 'HEAD':
+            return [b'']
+        return [content]
+
+
+def wrap_application(application):
+    root = getattr(settings, 'API_SNAPSHOT_ROOT', None)
+    if not root:
+        return application
+    fallback = SnapshotFallback(application, root,
+                                getattr(settings, 'API_SNAPSHOT_RETRY_AFTER', 30))
+    fallback.refresh_manifest(force=True)
+    return fallback
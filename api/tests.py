@@ -1,15 +1,51 @@
 import json
+import shutil
+import tempfile
 import time
 import unittest
 
-from django.contrib.auth.models import User
+from cachalot.api import invalidate
+from django.contrib.auth.models import Group, User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
 from django.core.management import call_command
-from django.test import LiveServerTestCase, TestCase
+from django.test import LiveServerTestCase, RequestFactory, SimpleTestCase, TestCase, override_settings
 from django.utils.six import StringIO
 from wagtail.tests.utils import WagtailPageTests, WagtailTestUtils
+from wagtail.wagtailcore.models import Site
+from wagtail.wagtaildocs.models import Document
 from wagtail.wagtailimages.tests.utils import Image, get_test_image_file
 
+from accounts.groups import get_group_names, is_faculty
+from accounts.importer import add_faculty_by_name, import_users
+from accounts.session_backend import SessionStore as CachedSessionStore
 from accounts.utils import create_user
+from books.models import DocumentDownload, record_document_download
+from openstax import cache_stats
+
+from .views import user_api
+from .snapshot import (DB_ERROR_ENVIRON_KEY, SnapshotFallback, content_hash,
+                       snapshot_path, write_file, write_manifest)
+
+
+def use_shared_cache(test):
+    """
+    Point SHARED_CACHE_ALIAS at a file based cache for the test, code that
+    needs a cache shared by every process ignores the per-process default.
+    """
+    cache_dir = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, cache_dir)
+    patch = override_settings(
+        CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                       'LOCATION': cache_dir},
+        },
+        SHARED_CACHE_ALIAS='shared')
+    patch.enable()
+    test.addCleanup(patch.disable)
 
 
 class UserAPI(LiveServerTestCase, WagtailPageTests):
@@ -140,3 +176,298 @@ class ImageAPI(TestCase, WagtailTestUtils):
         returned_title = response_dict['images'][0]['title']
         self.assertEqual(expected_title, returned_title)
 
+
+class SnapshotFallbackTest(SimpleTestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.content = b'{"title": "About Us"}'
+        path = snapshot_path('/api/pages/about-us/')
+        write_file(self.root, path, self.content)
+        write_manifest(self.root, {'entries': {
+            '/api/pages/about-us/': {'path': path,
+                                     'sha256': content_hash(self.content),
+                                     'revision': '1:None',
+                                     'content_type': 'application/json'},
+        }})
+        self.database_down = False
+
+        def application(environ, start_response):
+            if self.database_down:
+                environ[DB_ERROR_ENVIRON_KEY] = True
+                start_response('500 Internal Server Error', [])
+                return [b'error']
+            start_response('200 OK', [('Content-Type', 'application/json')])
+            return [b'live']
+
+        self.app = SnapshotFallback(application, self.root)
+        self.app.refresh_manifest(force=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def get(self, path):
+        status = []
+        body = self.app({'REQUEST_METHOD': 'GET', 'PATH_INFO': path},
+                        lambda s, headers, exc_info=None: status.append(s))
+        return status[0], b''.join(body)
+
+    def test_snapshot_path(self):
+        self.assertEqual(snapshot_path('/api/books/'), 'api/books/index.json')
+
+    def test_serves_live_response_when_database_is_up(self):
+        self.assertEqual(self.get('/api/pages/about-us/'), ('200 OK', b'live'))
+
+    def test_serves_snapshot_when_database_is_down(self):
+        self.database_down = True
+        self.assertEqual(self.get('/api/pages/about-us/'), ('200 OK', self.content))
+        self.assertEqual(self.get('/api/pages/unknown/')[0], '500 Internal Server Error')
+
+
+@override_settings(GROUP_CACHE_IN_SESSION=True)
+class GroupCacheTest(TestCase):
+
+    def setUp(self):
+        use_shared_cache(self)
+        self.user = User.objects.create_user('faculty', 'faculty@openstax.org')
+        self.group = Group.objects.create(name='Faculty')
+        self.session = SessionStore()
+
+    def request(self):
+        request = RequestFactory().get('/api/user/')
+        request.user = User.objects.get(pk=self.user.pk)
+        request.session = self.session
+        return request
+
+    def test_groups_are_loaded_once(self):
+        request = self.request()
+        self.assertFalse(is_faculty(request))
+        next_request = self.request()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_group_names(request), frozenset())
+            self.assertFalse(is_faculty(next_request))
+
+    def test_membership_change_invalidates_session_cache(self):
+        self.assertFalse(is_faculty(self.request()))
+        self.group.user_set.add(self.user)
+        self.assertTrue(is_faculty(self.request()))
+
+        self.user.groups.clear()
+        self.assertFalse(is_faculty(self.request()))
+
+    @override_settings(SHARED_CACHE_ALIAS=None)
+    def test_no_session_cache_without_shared_cache(self):
+        self.assertFalse(is_faculty(self.request()))
+        self.assertNotIn('_group_names', self.session)
+
+
+class ImportUsersTest(TestCase):
+
+    def rows(self):
+        return [
+            {'id': 1, 'username': 'jdoe', 'first_name': 'Jane', 'last_name': 'Doe',
+             'faculty_status': 'confirmed_faculty'},
+            {'id': 2, 'username': 'jdoe', 'first_name': 'John', 'last_name': 'Doe'},
+            {'id': 3, 'username': 'asmith', 'first_name': 'Ann', 'last_name': 'Smith'},
+        ]
+
+    def test_import_is_idempotent(self):
+        stats = import_users(self.rows(), chunk_size=2)
+        self.assertEqual(stats.created, 3)
+        self.assertEqual(User.objects.filter(username__startswith='jdoe').count(), 2)
+        self.assertTrue(User.objects.get(social_auth__uid='1').groups.filter(name='Faculty').exists())
+
+        rows = self.rows()
+        rows[2]['last_name'] = 'Jones'
+        stats = import_users(rows, chunk_size=2)
+        self.assertEqual((stats.created, stats.updated, stats.grouped), (0, 1, 0))
+        self.assertEqual(User.objects.get(social_auth__uid='3').last_name, 'Jones')
+
+    def test_add_faculty_by_name(self):
+        import_users(self.rows())
+        stats = add_faculty_by_name([('Ann', 'Smith'), ('No', 'Body')])
+        self.assertEqual(stats.grouped, 1)
+        self.assertEqual(len(stats.errors), 1)
+        self.assertTrue(User.objects.get(social_auth__uid='3').groups.filter(name='Faculty').exists())
+
+
+class UserProfileTest(TestCase):
+
+    def setUp(self):
+        use_shared_cache(self)
+        self.user = User.objects.create_user('jdoe', 'jdoe@openstax.org', first_name='Jane')
+
+    def get_profile(self):
+        response = self.client.get('/api/user/')
+        return json.loads(response.content.decode(response.charset))
+
+    def test_anonymous_profile_needs_no_queries(self):
+        request = RequestFactory().get('/api/user/')
+        with self.assertNumQueries(0):
+            response = user_api(request)
+        profile = json.loads(response.content.decode(response.charset))
+        self.assertEqual(profile['id'], False)
+        self.assertEqual(profile['groups'], [])
+
+    def test_profile_is_stored_at_login_and_refreshed(self):
+        self.client.force_login(self.user)
+        profile = self.get_profile()
+        self.assertEqual(profile['username'], 'jdoe')
+        self.assertEqual(profile['groups'], [])
+
+        Group.objects.create(name='Faculty').user_set.add(self.user)
+        self.assertEqual(self.get_profile()['groups'], ['Faculty'])
+
+    def test_flushed_versions_never_match_stored_profiles(self):
+        self.client.force_login(self.user)
+        self.get_profile()
+        Group.objects.create(name='Faculty').user_set.add(self.user)
+        caches['shared'].clear()
+        self.assertEqual(self.get_profile()['groups'], ['Faculty'])
+
+    @override_settings(SHARED_CACHE_ALIAS=None)
+    def test_profile_is_built_per_request_without_shared_cache(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.get_profile()['groups'], [])
+        self.assertNotIn('_user_profile', self.client.session)
+        Group.objects.create(name='Faculty').user_set.add(self.user)
+        self.assertEqual(self.get_profile()['groups'], ['Faculty'])
+
+
+class CachedSessionTest(TestCase):
+
+    def setUp(self):
+        # the backend refuses per-process caches
+        use_shared_cache(self)
+        patch = override_settings(SESSION_CACHE_ALIAS='shared')
+        patch.enable()
+        self.addCleanup(patch.disable)
+
+    def test_sessions_only_in_the_database_are_loaded_and_cached(self):
+        session = SessionStore()
+        session['cart'] = 3
+        session.create()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(CachedSessionStore(session.session_key)['cart'], 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(CachedSessionStore(session.session_key)['cart'], 3)
+
+    @override_settings(SESSION_CACHE_ALIAS='default')
+    def test_per_process_cache_is_refused(self):
+        with self.assertRaises(ImproperlyConfigured):
+            CachedSessionStore()
+
+    def test_sessions_are_read_from_cache_and_written_on_change(self):
+        session = CachedSessionStore()
+        session['cart'] = 1
+        session.save()
+
+        with self.assertNumQueries(0):
+            loaded = CachedSessionStore(session.session_key)
+            self.assertEqual(loaded['cart'], 1)
+            # saving unchanged data doesn't touch the database
+            loaded.modified = True
+            loaded.save()
+
+        loaded['cart'] = 2
+        with self.assertNumQueries(1):
+            loaded.save()
+        self.assertEqual(CachedSessionStore(session.session_key)['cart'], 2)
+
+        loaded.flush()
+        self.assertEqual(dict(CachedSessionStore(session.session_key).items()), {})
+
+
+class CachalotStatsTest(TestCase):
+
+    def setUp(self):
+        cache_stats.install()
+        # earlier tests may have cached the same queries
+        invalidate(Site)
+        cache_stats.reset_stats()
+
+    def test_hits_and_misses_are_counted_per_table(self):
+        list(Site.objects.filter(is_default_site=True))
+        list(Site.objects.filter(is_default_site=True))
+        cache_stats.flush()
+
+        counts = cache_stats.get_stats()['wagtailcore_site']
+        self.assertEqual((counts['hits'], counts['misses']), (1, 1))
+        self.assertEqual(counts['hit_rate'], 0.5)
+
+    def test_endpoint_is_staff_only(self):
+        self.assertEqual(self.client.get('/api/cache_stats/').status_code, 403)
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+        response = self.client.get('/api/cache_stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('tables', json.loads(response.content.decode('utf-8')))
+
+
+class DocumentServeTest(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        patch = override_settings(MEDIA_ROOT=self.media_root, DOCUMENT_SERVE_METHOD='serve')
+        patch.enable()
+        self.addCleanup(patch.disable)
+        self.document = Document.objects.create(
+            title='Chemistry', file=ContentFile(b'0123456789', name='chemistry.pdf'))
+        self.url = '/documents/{}/{}'.format(self.document.id, self.document.filename)
+
+    def test_whole_file_and_conditional_requests(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"') and etag.endswith('"'))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(response.content)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_range(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        # the file changed since the client's copy, send all of it
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_range_requests(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=20-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_offloaded_methods(self):
+        with self.settings(DOCUMENT_SERVE_METHOD='x-accel-redirect'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.document.file.name)
+        self.assertEqual(response.content, b'')
+
+        with self.settings(DOCUMENT_SERVE_METHOD='redirect'):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], self.document.file.url)
+
+    def test_download_counts(self):
+        record_document_download(self.document.id, None)
+        record_document_download(self.document.id, None)
+        self.assertEqual(DocumentDownload.objects.get(document=self.document).count, 2)
@@ -1,7 +1,8 @@
 from django.conf.urls import include, url
 from rest_framework import routers
 
-from .views import AdopterViewSet, ImageViewSet, DocumentViewSet, user_salesforce_update, user_api, sticky_note, footer
+from .views import AdopterViewSet, ImageViewSet, DocumentViewSet, user_salesforce_update, user_api, sticky_note, footer, \
+    cachalot_stats
 
 router = routers.DefaultRouter()
 router.register(r'images', ImageViewSet)
@@ -14,5 +15,6 @@ urlpatterns = [
     url(r'^user/$', user_api, name='user_api'),
     url(r'^sticky/$', sticky_note, name='sticky_note'),
     url(r'^footer/$', footer, name='footer'),
+    url(r'^cache_stats/$', cachalot_stats, name='cache_stats'),
 ]
 
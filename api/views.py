@@ -5,6 +5,9 @@ from salesforce.functions import check_if_faculty_pending, update_faculty_status
 from social.apps.django_app.default.models import \
     DjangoStorage as SocialAuthStorage
 from global_settings.models import StickyNote, Footer
+from accounts.groups import get_group_names, is_faculty
+from accounts.profile import get_profile
+from openstax import cache_stats
 from wagtail.wagtailimages.models import Image
 from wagtail.wagtaildocs.models import Document
 
@@ -34,38 +37,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
 
 
 def user_api(request):
-    user = request.user
-
-    try:
-        social_auth = SocialAuthStorage.user.get_social_auth_for_user(user)
-        user.accounts_id = social_auth[0].uid
-    except:
-        user.accounts_id = None
-
-    try:
-        return JsonResponse({
-            'id': user.pk,
-            'email': user.email,
-            'username': user.username,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'is_staff': user.is_staff,
-            'is_superuser': user.is_superuser,
-            'groups': list(user.groups.values_list('name', flat=True)),
-            'accounts_id': user.accounts_id,
-        })
-    except:
-        return JsonResponse({
-            'id': False,
-            'email': '',
-            'username': '',
-            'first_name': '',
-            'last_name': '',
-            'is_staff': False,
-            'is_superuser': False,
-            'groups': [],
-            'accounts_id': None,
-        })
+    return JsonResponse(get_profile(request))
 
 
 def user_salesforce_update(request):
@@ -82,12 +54,13 @@ def user_salesforce_update(request):
     except:
         user.accounts_id = None
 
-    if not user.groups.filter(name='Faculty').exists() and user.is_authenticated():
+    groups_changed = False
+    if not is_faculty(request) and user.is_authenticated():
         email = request.GET.get('email', None)
 
         # check if user is faculty_verified in SF
         try:
-            update_faculty_status(user.pk)
+            groups_changed = update_faculty_status(user.pk)
         except:
             salesforce_faculty_verified_failed = True
 
@@ -107,7 +80,7 @@ def user_salesforce_update(request):
                 'last_name': user.last_name,
                 'is_staff': user.is_staff,
                 'is_superuser': user.is_superuser,
-                'groups': list(user.groups.values_list('name', flat=True)),
+                'groups': sorted(get_group_names(request, refresh=groups_changed)),
                 'accounts_id': user.accounts_id,
                 'pending_verification': pending_verification,
                 'salesforce_faculty_verified_failed': salesforce_faculty_verified_failed,
@@ -141,3 +114,11 @@ def footer(request):
         'twitter_link': footer.twitter_link,
         'linkedin_link': footer.linkedin_link,
     })
+
+
+def cachalot_stats(request):
+    if not request.user.is_staff:
+        return JsonResponse({'message': 'staff only'}, status=403)
+    # include this process' counters that haven't been flushed yet
+    cache_stats.flush()
+    return JsonResponse({'tables': cache_stats.get_stats()})
@@ -0,0 +1,169 @@
+import mimetypes
+import os
+import re
+import time
+
+from django.conf import settings
+from django.http import (FileResponse, Http404, HttpResponse, HttpResponseRedirect,
+                         StreamingHttpResponse)
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from wagtail.wagtaildocs.models import Document, document_served
+
+from openstax.background import run_in_background
+from .models import record_document_download
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header, size):
+    """
+    Return the inclusive (start, end) of a single "bytes=" range, or None
+    when the header should be ignored (malformed or several ranges) and the
+    whole file sent. Raises ValueError when the range can't be satisfied.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # the last N bytes
+        if int(last) == 0:
+            raise ValueError(header)
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def counts_as_download(request):
+    """
+    Range requests after the first byte are a PDF viewer or download manager
+    fetching the rest of a file that was already counted.
+    """
+    if request.method != 'GET':
+        return False
+    byte_range = request.META.get('HTTP_RANGE', '')
+    return not byte_range or byte_range.strip().startswith('bytes=0-')
+
+
+def signed_url(url):
+    from boto.cloudfront.distribution import Distribution
+    return Distribution().create_signed_url(
+        url, settings.CLOUDFRONT_KEY_PAIR_ID,
+        expire_time=int(time.time()) + settings.DOCUMENT_SIGNED_URL_EXPIRES,
+        private_key_file=settings.CLOUDFRONT_PRIVATE_KEY_PATH)
+
+
+def file_chunks(f, length):
+    try:
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+def set_file_headers(response, document):
+    response['Content-Type'] = mimetypes.guess_type(document.filename)[0] or 'application/octet-stream'
+    response['Content-Disposition'] = 'attachment; filename="{}"'.format(
+        document.filename.replace('"', ''))
+    return response
+
+
+def redirect_response(document):
+    url = document.file.url
+    if settings.CLOUDFRONT_KEY_PAIR_ID:
+        url = signed_url(url)
+    return HttpResponseRedirect(url)
+
+
+def file_response(request, document, path):
+    """
+    Serve a local file with Range, If-Range and conditional GET support.
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    raw_etag = '{:x}-{:x}'.format(int(stat.st_mtime), size)
+    etag = quote_etag(raw_etag)
+    # Django 1.10 compares the unquoted value with the parsed If-None-Match
+    response = get_conditional_response(request, etag=raw_etag, last_modified=int(stat.st_mtime))
+    if response is not None:
+        return response
+
+    byte_range = None
+    if 'HTTP_RANGE' in request.META and request.META.get('HTTP_IF_RANGE', etag) == etag:
+        try:
+            byte_range = parse_range(request.META['HTTP_RANGE'], size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */{}'.format(size)
+            return response
+
+    if request.method == 'HEAD':
+        response = HttpResponse()
+    elif byte_range:
+        f = open(path, 'rb')
+        f.seek(byte_range[0])
+        response = StreamingHttpResponse(file_chunks(f, byte_range[1] - byte_range[0] + 1))
+    else:
+        response = FileResponse(open(path, 'rb'))
+
+    if byte_range:
+        response.status_code = 206
+        response['Content-Range'] = 'bytes {}-{}/{}'.format(byte_range[0], byte_range[1], size)
+        response['Content-Length'] = str(byte_range[1] - byte_range[0] + 1)
+    else:
+        response['Content-Length'] = str(size)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    return set_file_headers(response, document)
+
+
+def serve_document(request, document_id, document_filename):
+    """
+    Replaces wagtaildocs' serve view so documents aren't streamed through a
+    Python worker. DOCUMENT_SERVE_METHOD picks how the file is sent:
+
+    'redirect': to the storage url, signed for CloudFront when
+        CLOUDFRONT_KEY_PAIR_ID is set
+    'x-accel-redirect' / 'x-sendfile': handed to nginx / apache
+    'serve': by Django, with Range and conditional request support
+
+    Files without a local path (eg. on S3) are always redirected. Downloads
+    are counted in the background.
+    """
+    document = get_object_or_404(Document, id=document_id)
+    if document.filename != document_filename:
+        raise Http404("Document filename does not match")
+
+    document_served.send(sender=Document, instance=document, request=request)
+    if counts_as_download(request):
+        run_in_background(record_document_download, document.id, timezone.now())
+
+    method = settings.DOCUMENT_SERVE_METHOD
+    try:
+        path = document.file.path
+    except NotImplementedError:
+        path = None
+
+    if method == 'redirect' or path is None:
+        return redirect_response(document)
+    if method == 'x-accel-redirect':
+        response = HttpResponse()
+        response['X-Accel-Redirect'] = settings.DOCUMENT_ACCEL_REDIRECT_PREFIX + document.file.name
+        return set_file_headers(response, document)
+    if method == 'x-sendfile':
+        response = HttpResponse()
+        response['X-Sendfile'] = path
+        return set_file_headers(response, document)
+    return file_response(request, document, path)
@@ -1,10 +1,11 @@
 import re
 import json
-import urllib
 
+import requests
 from django.conf import settings
 from django.contrib.postgres.fields import JSONField
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
 from django.forms import ValidationError
 from django.utils.html import format_html, mark_safe
 from modelcluster.fields import ParentalKey
@@ -17,7 +18,8 @@ from wagtail.wagtaildocs.edit_handlers import DocumentChooserPanel
 from wagtail.wagtailsnippets.edit_handlers import SnippetChooserPanel
 
 from allies.models import Ally
-from openstax.functions import build_document_url, build_image_url
+from openstax.functions import build_document_url, build_image_url, sibling_srcset
+from openstax.http import get_session
 from snippets.models import FacultyResource, StudentResource, Subject
 
 
@@ -201,12 +203,16 @@ class BookAlly(models.Model):
         return build_image_url(self.ally.logo_color)
     ally_color_logo = property(get_ally_color_logo)
 
+    def get_ally_color_logo_srcset(self):
+        return sibling_srcset(self, self.ally.logo_color_id, 'ally__logo_color')
+    ally_color_logo_srcset = property(get_ally_color_logo_srcset)
+
     book_link_url = models.URLField(
         blank=True, help_text="Call to Action Link")
     book_link_text = models.CharField(
         max_length=255, help_text="Call to Action Text")
 
-    api_fields = ('ally_heading', 'ally_short_description', 'ally_color_logo', 'book_link_url',
+    api_fields = ('ally_heading', 'ally_short_description', 'ally_color_logo', 'ally_color_logo_srcset', 'book_link_url',
                   'book_link_text', )
 
     panels = [
@@ -484,8 +490,9 @@ class Book(Page):
             try:
                 url = '{}/contents/{}.json'.format(
                     settings.CNX_ARCHIVE_URL, self.cnx_id)
-                response = urllib.request.urlopen(url).read()
-                result = json.loads(response.decode('utf-8'))
+                response = get_session('cnx').get(url)
+                response.raise_for_status()
+                result = response.json()
 
                 self.license_name = result['license']['name']
                 self.license_version = result['license']['version']
@@ -493,8 +500,8 @@ class Book(Page):
 
                 self.table_of_contents = result['tree']
 
-            except urllib.error.HTTPError as err:
-                errors.setdefault('cnx_id', []).append(err)
+            except requests.RequestException as err:
+                errors.setdefault('cnx_id', []).append(str(err))
 
         if errors:
             raise ValidationError(errors)
@@ -604,3 +611,29 @@ class BookIndex(Page):
 
     parent_page_types = ['pages.HomePage']
     subpage_types = ['books.Book']
+
+
+class DocumentDownload(models.Model):
+    """
+    Number of times a document was downloaded through the documents serve
+    url, updated in the background by record_document_download.
+    """
+    document = models.OneToOneField('wagtaildocs.Document', on_delete=models.CASCADE,
+                                    related_name='download_count')
+    count = models.PositiveIntegerField(default=0)
+    last_downloaded = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return '{}: {}'.format(self.document, self.count)
+
+
+def record_document_download(document_id, when):
+    downloads = DocumentDownload.objects.filter(document_id=document_id)
+    if downloads.update(count=F('count') + 1, last_downloaded=when):
+        return
+    try:
+        with transaction.atomic():
+            DocumentDownload.objects.create(document_id=document_id, count=1, last_downloaded=when)
+    except IntegrityError:
+        # another download created the row first
+        downloads.update(count=F('count') + 1, last_downloaded=when)
@@ -1,6 +1,8 @@
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.renderers import JSONRenderer
+
+from accounts.groups import is_faculty
 from .models import BookIndex, Book
 from .serializers import BookIndexSerializer, BookSerializer
 
@@ -31,7 +33,7 @@ def book_detail(request, slug):
     try:
         page = Book.objects.get(slug=slug)
         serializer = BookSerializer(page)
-        if not request.user.groups.filter(name='Faculty').exists():
+        if not is_faculty(request):
             for resource in serializer.data['book_faculty_resources']:
                 if not resource['resource_unlocked']:
                     try:
@@ -1,24 +1,41 @@
 import unicodecsv
 
 from django.contrib import admin
+from django.core.urlresolvers import reverse
 from django.db import models
 from django.forms import CheckboxSelectMultiple
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_protect
 from django.http import HttpResponse
 from django.utils.encoding import smart_str
-from django.utils.html import mark_safe
+from django.utils.html import format_html, format_html_join, mark_safe
 
-from extraadminfilters.filters import UnionFieldListFilter
+from accounts.groups import CONTENT_MANAGER_GROUPS, in_any_group
+from books.models import Book
+from extraadminfilters.filters import CountedUnionFieldListFilter, cache_choices_of
+from extraadminfilters.paginator import EstimatedCountAdminMixin
 
-from .models import Errata, InternalDocumentation
+from .models import Errata, ErrataCount, InternalDocumentation, TOTAL
+from .transitions import bulk_transition
+
+cache_choices_of(Book)
+
+
+class BookFilter(CountedUnionFieldListFilter):
+    """
+    Book filter with the number of errata per book, read from the
+    ErrataCount totals instead of counting the errata table.
+    """
+
+    def get_counts(self, cl):
+        return dict(ErrataCount.objects.filter(dimension=TOTAL).values_list('book_id', 'count'))
 
 
 class InlineInternalImage(admin.TabularInline):
     model = InternalDocumentation
 
 
-class ErrataAdmin(admin.ModelAdmin):
+class ErrataAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
     list_max_show_all = 10000
     list_per_page = 200
 
@@ -56,15 +73,18 @@ class ErrataAdmin(admin.ModelAdmin):
 
     """Actions for the Django Admin list view"""
     def mark_in_review(self, request, queryset):
-        queryset.update(status='Editorial Review')
+        updated = bulk_transition(queryset, status='Editorial Review')
+        self.message_user(request, "{} errata marked as in-review".format(updated))
     mark_in_review.short_description = "Mark errata as in-review"
 
     def mark_reviewed(self, request, queryset):
-        queryset.update(status='Reviewed')
+        updated = bulk_transition(queryset, status='Reviewed')
+        self.message_user(request, "{} errata marked as reviewed".format(updated))
     mark_reviewed.short_description = "Mark errata as reviewed"
 
     def mark_archived(self, request, queryset):
-        queryset.update(archived=True)
+        updated = bulk_transition(queryset, archived=True)
+        self.message_user(request, "{} errata archived".format(updated))
     mark_archived.short_description = "Mark errata as archived"
 
     def export_as_csv(self, request, queryset):
@@ -122,7 +142,7 @@ class ErrataAdmin(admin.ModelAdmin):
         return actions
 
     def change_view(self, request, object_id, extra_context=None):
-        if not request.user.is_superuser or request.user.groups.filter(name__in=['Content Managers', 'Content Development Intern']).exists():
+        if not request.user.is_superuser or in_any_group(request, CONTENT_MANAGER_GROUPS):
             extra_context = extra_context or {}
             extra_context['readonly'] = True
         return super(ErrataAdmin, self).change_view(request, object_id, extra_context=extra_context)
@@ -130,23 +150,36 @@ class ErrataAdmin(admin.ModelAdmin):
     def _book_title(self, obj):
         return mark_safe(obj.book.title)
 
+    def probable_duplicates(self, obj):
+        if obj is None or not obj.pk:
+            return ''
+        candidates = obj.duplicate_candidates.select_related('candidate')
+        if not candidates:
+            return 'None found'
+        return format_html('<ul>{}</ul>', format_html_join(
+            '', '<li><a href="{}">#{}</a> ({} similar, {}): {}</li>',
+            ((reverse('admin:errata_errata_change', args=[c.candidate_id]), c.candidate_id,
+              '{:.0%}'.format(c.score), c.candidate.status, c.candidate.short_detail)
+             for c in candidates)))
+    probable_duplicates.short_description = "Probable duplicates"
+
     """Model permissions"""
     @method_decorator(csrf_protect)
     def changelist_view(self, request, extra_context=None):
-        if request.user.is_superuser or request.user.groups.filter(name__in=['Content Managers', 'Content Development Intern']).exists():
+        if request.user.is_superuser or in_any_group(request, CONTENT_MANAGER_GROUPS):
             self.list_display = ['id', '_book_title', 'created', 'is_assessment_errata', 'short_detail', 'status', 'error_type', 'resource', 'location', 'resolution', 'archived'] # list of fields to show if user can't approve the post
             self.list_display_links = ['_book_title']
-            self.list_filter = (('book', UnionFieldListFilter), 'status', 'created', 'modified', 'error_type', 'resolution', 'archived', 'resource')
+            self.list_filter = (('book', BookFilter), 'status', 'created', 'modified', 'error_type', 'resolution', 'archived', 'resource')
             self.editable = ['resolution']
         else:
             self.list_display = ['id', '_book_title', 'created', 'is_assessment_errata', 'short_detail', 'status', 'error_type', 'resource', 'location', 'created', 'archived'] # list of fields to show if user can approve the post
             self.list_display_links = ['_book_title']
-            self.list_filter = (('book', UnionFieldListFilter), 'status', 'created', 'modified', 'error_type', 'resolution', 'archived', 'resource')
+            self.list_filter = (('book', BookFilter), 'status', 'created', 'modified', 'error_type', 'resolution', 'archived', 'resource')
         return super(ErrataAdmin, self).changelist_view(request, extra_context)
 
     @method_decorator(csrf_protect)
     def get_form(self, request, obj=None, **kwargs):
-        if request.user.is_superuser or request.user.groups.filter(name__in=['Content Managers', 'Content Development Intern']).exists():
+        if request.user.is_superuser or in_any_group(request, CONTENT_MANAGER_GROUPS):
             self.fields = ['created',
                            'modified',
                            'book',
@@ -164,9 +197,11 @@ class ErrataAdmin(admin.ModelAdmin):
                            'submitted_by',
                            'submitter_email_address',
                            'file_1',
-                           'file_2'] # fields to show on the actual form
+                           'file_2',
+                           'probable_duplicates'] # fields to show on the actual form
             self.readonly_fields = ['created',
-                                    'modified']
+                                    'modified',
+                                    'probable_duplicates']
             self.save_as = True
         else:
             self.fields = ['created',
@@ -186,7 +221,8 @@ class ErrataAdmin(admin.ModelAdmin):
                            'submitted_by'
                            'submitter_email_address',
                            'file_1',
-                           'file_2']
+                           'file_2',
+                           'probable_duplicates']
             self.readonly_fields = ['created',
                                     'modified',
                                     'book',
@@ -204,7 +240,8 @@ class ErrataAdmin(admin.ModelAdmin):
                                     'submitted_by',
                                     'submitter_email_address',
                                     'file_1',
-                                    'file_2']
+                                    'file_2',
+                                    'probable_duplicates']
             self.save_as = False
 
         return super(ErrataAdmin, self).get_form(request, obj, **kwargs)
@@ -0,0 +1,82 @@
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection, transaction
+
+from .models import Errata, ErrataDuplicateCandidate
+
+# how much the location similarity counts towards the score, the rest is detail
+LOCATION_WEIGHT = 0.25
+
+
+@contextmanager
+def trigram_threshold(threshold):
+    """
+    Run the block in a transaction with pg_trgm's similarity threshold (used
+    by the % operator) set to `threshold`, and put the connection's previous
+    threshold back afterwards so pooled connections don't keep it.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT show_limit()')
+        previous = cursor.fetchone()[0]
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT set_limit(%s)', [threshold])
+            yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT set_limit(%s)', [previous])
+
+
+def candidate_queryset(errata):
+    """
+    Errata of the same book whose detail is % similar to errata.detail,
+    which the errata_errata_detail_trgm GIN index serves, most similar first.
+    Needs to run inside trigram_threshold().
+    """
+    candidates = Errata.objects.filter(book_id=errata.book_id, detail__trigram_similar=errata.detail) \
+                               .exclude(pk=errata.pk) \
+                               .annotate(detail_similarity=TrigramSimilarity('detail', errata.detail)) \
+                               .order_by('-detail_similarity')
+    if errata.location:
+        candidates = candidates.annotate(location_similarity=TrigramSimilarity('location', errata.location))
+    return candidates
+
+
+def find_duplicate_candidates(errata, limit=None):
+    """
+    Return [(erratum, score)] for the errata of the same book most similar to
+    `errata`. Candidates need a detail similarity above
+    ERRATA_DUPLICATE_THRESHOLD and are ranked by a weighted detail/location
+    similarity.
+    """
+    if limit is None:
+        limit = getattr(settings, 'ERRATA_DUPLICATE_CANDIDATES', 5)
+    threshold = getattr(settings, 'ERRATA_DUPLICATE_THRESHOLD', 0.3)
+
+    with trigram_threshold(threshold):
+        candidates = list(candidate_queryset(errata)[:limit * 4])
+
+    scored = []
+    for candidate in candidates:
+        score = candidate.detail_similarity
+        if errata.location:
+            score = (1 - LOCATION_WEIGHT) * score + LOCATION_WEIGHT * (candidate.location_similarity or 0)
+        scored.append((candidate, score))
+    scored.sort(key=lambda pair: -pair[1])
+    return scored[:limit]
+
+
+def attach_duplicate_candidates(errata_id):
+    errata = Errata.objects.filter(pk=errata_id).first()
+    if errata is None:
+        return []
+    candidates = find_duplicate_candidates(errata)
+    with transaction.atomic():
+        ErrataDuplicateCandidate.objects.filter(errata=errata).delete()
+        return ErrataDuplicateCandidate.objects.bulk_create([
+            ErrataDuplicateCandidate(errata=errata, candidate=candidate, score=score)
+            for candidate, score in candidates
+        ])
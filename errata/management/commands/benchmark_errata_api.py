@@ -0,0 +1,89 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from books.models import Book
+from errata.models import Errata
+
+PARTIAL_INDEXES = ('errata_errata_live_book_id_created',
+                   'errata_errata_live_book_title_created')
+
+
+class Command(BaseCommand):
+    help = ("Seed errata in a rolled back transaction and print EXPLAIN ANALYZE "
+            "plans and timings for the public errata API queries, with and "
+            "without the partial indexes")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200000)
+        parser.add_argument('--runs', type=int, default=20,
+                            help="timed runs per query")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("the errata benchmark needs PostgreSQL")
+        books = list(Book.objects.values_list('id', 'title'))
+        if not books:
+            raise CommandError("create at least one book before benchmarking")
+
+        with transaction.atomic():
+            self.seed(books, options['rows'])
+            book_id, book_title = random.choice(books)
+            queries = [
+                ('book_id', Errata.objects.filter(archived=False, book_id=book_id)),
+                ('book__title (join)', Errata.objects.filter(archived=False, book__title=book_title)),
+                ('book_title', Errata.objects.filter(archived=False, book_title=book_title)),
+            ]
+            queries = [(name, queryset.order_by('-created')[:100]) for name, queryset in queries]
+
+            self.stdout.write(self.style.MIGRATE_HEADING("With partial indexes"))
+            self.run(queries, options['runs'])
+
+            with connection.cursor() as cursor:
+                for index in PARTIAL_INDEXES:
+                    cursor.execute('DROP INDEX IF EXISTS {}'.format(index))
+            self.stdout.write(self.style.MIGRATE_HEADING("Without partial indexes"))
+            self.run(queries, options['runs'])
+
+            transaction.set_rollback(True)
+
+    def seed(self, books, rows):
+        start = time.time()
+        batch = []
+        for i in range(rows):
+            book_id, book_title = random.choice(books)
+            batch.append(Errata(book_id=book_id,
+                                book_title=book_title,
+                                detail='benchmark erratum {}'.format(i),
+                                archived=random.random() < 0.3))
+            if len(batch) == 5000:
+                Errata.objects.bulk_create(batch)
+                batch = []
+        Errata.objects.bulk_create(batch)
+
+        with connection.cursor() as cursor:
+            # spread the rows over a few years so ordering by created is realistic
+            cursor.execute("UPDATE errata_errata SET created = created - (id % 20000) * interval '1 hour'")
+            cursor.execute('ANALYZE errata_errata')
+        self.stdout.write("Seeded {} errata in {:.1f}s".format(rows, time.time() - start))
+
+    def run(self, queries, runs):
+        with connection.cursor() as cursor:
+            for name, queryset in queries:
+                sql, params = queryset.query.sql_with_params()
+                cursor.execute('EXPLAIN ANALYZE ' + sql, params)
+                plan = '\n'.join('    ' + row[0] for row in cursor.fetchall())
+
+                timings = []
+                for _ in range(runs):
+                    start = time.time()
+                    cursor.execute(sql, params)
+                    cursor.fetchall()
+                    timings.append((time.time() - start) * 1000)
+                timings.sort()
+
+                self.stdout.write("{}: median {:.2f}ms, max {:.2f}ms".format(
+                    name, timings[len(timings) // 2], timings[-1]))
+                self.stdout.write(plan)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from errata.duplicates import attach_duplicate_candidates
+from errata.models import Errata, NEW
+
+
+class Command(BaseCommand):
+    help = "Attach probable duplicates to errata that are waiting for review"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help="recompute for every erratum, not just new ones")
+
+    def handle(self, *args, **options):
+        errata = Errata.objects.all() if options['all'] else Errata.objects.filter(status=NEW)
+        found = 0
+        ids = list(errata.values_list('id', flat=True))
+        for errata_id in ids:
+            found += len(attach_duplicate_candidates(errata_id))
+        self.stdout.write(self.style.SUCCESS(
+            "{} probable duplicates found for {} errata".format(found, len(ids))))
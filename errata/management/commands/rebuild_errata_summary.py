@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from errata.summary import rebuild_summary
+
+
+class Command(BaseCommand):
+    help = "Recount errata per book/status/resolution/resource into the summary table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--book', type=int, action='append', dest='books',
+                            help="only rebuild the counts of this book id (repeatable)")
+
+    def handle(self, *args, **options):
+        drifted = rebuild_summary(options['books'])
+        self.stdout.write(self.style.SUCCESS(
+            "Errata summary rebuilt, {} counters corrected".format(drifted)))
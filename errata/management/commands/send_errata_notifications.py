@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from errata.notifications import send_pending_notifications, MAX_ATTEMPTS
+
+
+class Command(BaseCommand):
+    help = "Send queued errata status emails from the notification outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS)
+        parser.add_argument('--loop', action='store_true',
+                            help="keep polling the outbox instead of exiting when it is empty")
+        parser.add_argument('--interval', type=int, default=10,
+                            help="seconds to wait between polls when --loop is given")
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_pending_notifications(options['batch_size'], options['max_attempts'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write("sent {}, failed {}".format(sent, failed))
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            "Done: {} sent, {} failed".format(total_sent, total_failed)))
@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from errata.models import DirectUpload, UPLOAD_PENDING, UPLOAD_VERIFIED
+from errata.uploads import upload_expires, verify_upload
+
+
+class Command(BaseCommand):
+    help = ("Verify direct errata uploads the background check missed and remove "
+            "uploads that were never attached to an erratum")
+
+    def handle(self, *args, **options):
+        pending = DirectUpload.objects.filter(status=UPLOAD_PENDING)
+
+        verified = rejected = 0
+        for upload_id in list(pending.filter(errata__isnull=False).values_list('id', flat=True)):
+            upload = verify_upload(upload_id)
+            if upload is None:
+                continue
+            if upload.status == UPLOAD_VERIFIED:
+                verified += 1
+            else:
+                rejected += 1
+
+        expired = pending.filter(errata__isnull=True,
+                                 created__lt=now() - timedelta(seconds=upload_expires()))
+        removed = 0
+        for upload in expired:
+            if default_storage.exists(upload.name):
+                default_storage.delete(upload.name)
+            upload.delete()
+            removed += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            "{} uploads verified, {} rejected, {} abandoned uploads removed".format(verified, rejected, removed)))
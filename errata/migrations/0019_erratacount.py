@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.6 on 2017-07-21 09:40
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_summary(apps, schema_editor):
+    Errata = apps.get_model('errata', 'Errata')
+    ErrataCount = apps.get_model('errata', 'ErrataCount')
+    counts = {}
+    for errata in Errata.objects.values('book_id', 'status', 'resolution', 'resource', 'error_type', 'archived').iterator():
+        keys = [(errata['book_id'], 'total', '')]
+        for dimension in ('status', 'resolution', 'resource', 'error_type', 'archived'):
+            value = errata[dimension]
+            keys.append((errata['book_id'], dimension, '' if value is None else str(value)))
+        for key in keys:
+            counts[key] = counts.get(key, 0) + 1
+    ErrataCount.objects.bulk_create([
+        ErrataCount(book_id=book_id, dimension=dimension, value=value, count=count)
+        for (book_id, dimension, value), count in counts.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0036_auto_20170707_1305'),
+        ('errata', '0018_errata_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ErrataCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=50)),
+                ('value', models.CharField(blank=True, max_length=255)),
+                ('count', models.IntegerField(default=0)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='books.Book')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='erratacount',
+            unique_together=set([('book', 'dimension', 'value')]),
+        ),
+        migrations.RunPython(build_summary, migrations.RunPython.noop),
+    ]
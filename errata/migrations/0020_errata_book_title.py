@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.6 on 2017-07-24 14:05
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('errata', '0019_erratacount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='errata',
+            name='book_title',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.RunSQL(
+            "UPDATE errata_errata SET book_title = "
+            "(SELECT title FROM wagtailcore_page WHERE wagtailcore_page.id = errata_errata.book_id)",
+            migrations.RunSQL.noop,
+        ),
+        # the public errata API only ever lists unarchived errata, filtered
+        # by book and ordered by date, so index just those rows
+        migrations.RunSQL(
+            "CREATE INDEX errata_errata_live_book_id_created "
+            "ON errata_errata (book_id, created) WHERE NOT archived",
+            "DROP INDEX errata_errata_live_book_id_created",
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX errata_errata_live_book_title_created "
+            "ON errata_errata (book_title, created) WHERE NOT archived",
+            "DROP INDEX errata_errata_live_book_title_created",
+        ),
+    ]
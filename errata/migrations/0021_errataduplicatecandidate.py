@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.6 on 2017-07-26 11:22
+from __future__ import unicode_literals
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('errata', '0020_errata_book_title'),
+    ]
+
+    operations = [
+        # CREATE EXTENSION pg_trgm needs a superuser. Where the migration
+        # user isn't one, have a superuser run it in the database first,
+        # the operation is then a no-op.
+        TrigramExtension(),
+        migrations.RunSQL(
+            "CREATE INDEX errata_errata_detail_trgm "
+            "ON errata_errata USING gin (detail gin_trgm_ops)",
+            "DROP INDEX errata_errata_detail_trgm",
+        ),
+        migrations.CreateModel(
+            name='ErrataDuplicateCandidate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='errata.Errata')),
+                ('errata', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicate_candidates', to='errata.Errata')),
+            ],
+            options={
+                'ordering': ['-score'],
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='errataduplicatecandidate',
+            unique_together=set([('errata', 'candidate')]),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.6 on 2017-08-02 10:47
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('errata', '0022_directupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='directupload',
+            name='received',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
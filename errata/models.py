@@ -1,17 +1,19 @@
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils.timezone import now
 from django.template.defaultfilters import truncatewords
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
 
 from wagtail.wagtailcore import hooks
 from wagtail.wagtailadmin.menu import MenuItem
 
 from books.models import Book
+from openstax.background import run_in_background
+
+from .transitions import derived_fields
 from django.conf import settings
 
 
@@ -80,11 +82,18 @@ ERRATA_RESOURCES = (
     (OTHER, 'Other'),
 )
 
+# fields counted per book in ErrataCount, in addition to a 'total' row
+SUMMARY_DIMENSIONS = ('status', 'resolution', 'resource', 'error_type', 'archived')
+TOTAL = 'total'
+
 
 class Errata(models.Model):
     created = models.DateTimeField(auto_now_add=True)
     modified = models.DateTimeField(auto_now=True)
     book = models.ForeignKey(Book)
+    # copy of book.title so the public API can filter by title without
+    # joining through wagtailcore_page, kept in sync by sync_errata_book_title
+    book_title = models.CharField(max_length=255, blank=True, editable=False)
     is_assessment_errata = models.CharField(
         max_length=100,
         choices=YES_NO_CHOICES,
@@ -129,6 +138,27 @@ class Errata(models.Model):
     file_1 = models.FileField(upload_to='errata/user_uploads/1/', blank=True, null=True)
     file_2 = models.FileField(upload_to='errata/user_uploads/2/', blank=True, null=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(Errata, cls).from_db(db, field_names, values)
+        deferred = instance.get_deferred_fields()
+        if not set(('book_id', ) + SUMMARY_DIMENSIONS) & deferred:
+            instance._summary_keys = summary_keys(instance)
+        if not set(('book_id', 'book_title')) & deferred:
+            instance._loaded_book_id = instance.book_id
+        return instance
+
+    def _refresh_book_title(self):
+        """
+        Copy the book's title without loading the book when it isn't loaded
+        yet, and without any query when the book didn't change.
+        """
+        if hasattr(self, Errata._meta.get_field('book').get_cache_name()):
+            self.book_title = self.book.title
+        elif self.book_id != getattr(self, '_loaded_book_id', None) or not self.book_title:
+            self.book_title = Book.objects.filter(pk=self.book_id) \
+                                          .values_list('title', flat=True).first() or ''
+
     @property
     def short_detail(self):
         return truncatewords(self.detail, 15)
@@ -140,29 +170,27 @@ class Errata(models.Model):
             raise ValidationError({'is_assessment_errata': 'You must specify if this is an assessment errata.'})
 
     def save(self, *args, **kwargs):
-        # update instance dates
-        if self.resolution:
-            self.resolution_date = now()
-        if self.status == "Editorial Review" or self.status == "Reviewed":
-            self.reviewed_date = now()
-        if self.status == "Completed" and self.resolution != "Will Not Fix":
-            self.corrected_date = now()
-
-        # prefill resolution notes based on certain status and resolutions
-        if self.resolution == "Duplicate" and not self.resolution_notes:
-            self.resolution_notes = "This is a duplicate of another report for this book."
-        if self.resolution == "Not An Error" and not self.resolution_notes:
-            self.resolution_notes = "Our reviewers determined this was not an error."
-        if self.resolution == "Will Not Fix" and not self.resolution_notes:
-            self.resolution_notes = "Our reviewers determined the textbook meets scope, sequence, and accuracy requirements as is.  No change will be made."
-        if self.resolution == "Major Book Revision" and not self.resolution_notes:
-            self.resolution_notes = "Our reviewers determined this would require a significant book revision.  While we cannot make this change at this time, we will consider it for future editions of this book."
-        if (self.status == "Reviewed" or self.status == "Completed") and self.resolution == "Approved" and not self.resolution_notes:
-            self.resolution_notes = "Our reviewers accepted this change."
-        if self.status == "Completed" and self.resolution == "Sent to Customer Support" and not self.resolution_notes:
-            self.resolution_notes = "Forwarded to customer support."
-
-        super(Errata, self).save(*args, **kwargs)
+        if self.book_id:
+            self._refresh_book_title()
+
+        # update instance dates and prefill resolution notes based on
+        # certain status and resolutions, see errata.transitions
+        dates, note = derived_fields(self.status, self.resolution)
+        for field in dates:
+            setattr(self, field, now())
+        if note and not self.resolution_notes:
+            self.resolution_notes = note
+
+        with transaction.atomic():
+            old_keys = getattr(self, '_summary_keys', None)
+            if old_keys is None and self.pk:
+                old = Errata.objects.filter(pk=self.pk).only('book', *SUMMARY_DIMENSIONS).first()
+                old_keys = old._summary_keys if old else []
+            super(Errata, self).save(*args, **kwargs)
+            new_keys = summary_keys(self)
+            update_errata_counts(old_keys or [], new_keys)
+            self._summary_keys = new_keys
+            self._loaded_book_id = self.book_id
 
     @hooks.register('register_admin_menu_item')
     def register_errata_menu_item():
@@ -175,67 +203,276 @@ class Errata(models.Model):
         verbose_name = "erratum"
         verbose_name_plural = "erratum"
 
+class ErrataCount(models.Model):
+    """
+    Number of errata per book for each value of the SUMMARY_DIMENSIONS, kept
+    up to date by Errata.save and reconciled by rebuild_errata_summary.
+    """
+    book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    dimension = models.CharField(max_length=50)
+    value = models.CharField(max_length=255, blank=True)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return '{} {}={}: {}'.format(self.book_id, self.dimension, self.value, self.count)
+
+    class Meta:
+        unique_together = ('book', 'dimension', 'value')
+
+
+def summary_value(value):
+    if value is None:
+        return ''
+    return str(value)
+
+
+def summary_keys(instance):
+    """
+    The (book id, dimension, value) counters an erratum contributes to.
+    """
+    if instance.book_id is None:
+        return []
+    keys = [(instance.book_id, TOTAL, '')]
+    for dimension in SUMMARY_DIMENSIONS:
+        keys.append((instance.book_id, dimension, summary_value(getattr(instance, dimension))))
+    return keys
+
+
+def update_errata_counts(old_keys, new_keys):
+    """
+    Move an erratum's contribution from old_keys to new_keys. Only counters
+    that actually changed are touched, using F() so concurrent saves don't
+    lose updates.
+    """
+    deltas = {}
+    for key in old_keys:
+        deltas[key] = deltas.get(key, 0) - 1
+    for key in new_keys:
+        deltas[key] = deltas.get(key, 0) + 1
+
+    for (book_id, dimension, value), delta in deltas.items():
+        if not delta:
+            continue
+        counters = ErrataCount.objects.filter(book_id=book_id, dimension=dimension, value=value)
+        if counters.update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                ErrataCount.objects.create(book_id=book_id, dimension=dimension, value=value, count=delta)
+        except IntegrityError:
+            # another transaction created the counter first
+            counters.update(count=F('count') + delta)
+
+
+@receiver(post_save, sender=Book, dispatch_uid="sync_errata_book_title")
+def sync_errata_book_title(sender, instance, update_fields=None, **kwargs):
+    # save_revision() saves drafts with update_fields that leave the stored
+    # title alone, while the instance may hold the unpublished title
+    if update_fields is not None and 'title' not in update_fields:
+        return
+    Errata.objects.filter(book_id=instance.pk).exclude(book_title=instance.title) \
+                  .update(book_title=instance.title)
+
+
+@receiver(post_delete, sender=Errata, dispatch_uid="update_errata_counts_on_delete")
+def remove_from_errata_counts(sender, instance, **kwargs):
+    update_errata_counts(getattr(instance, '_summary_keys', None) or summary_keys(instance), [])
+
+
+def status_update_email(instance, created):
+    """
+    Return the (subject, body, to) of the notification for the current state
+    of an erratum, or None when no email should be sent.
+    """
+    to = None
+    if created:
+        subject = "We received your submission"
+        body = "Thanks for your help! Your errata submissions help keep OpenStax resources high quality and up to date."
+    elif instance.status == 'Reviewed' and (instance.resolution == 'Will Not Fix' or instance.resolution == 'Duplicate' or instance.resolution == 'Not An Error' or instance.resolution == 'Major Book Revision'):
+        subject = "We reviewed your erratum suggestion"
+        body = "Thanks again for your submission. Our reviewers have evaluated it and have determined there will be no change made."
+    elif instance.status == 'Reviewed' and instance.resolution == 'Approved':
+        subject = "We received your submission"
+        body = "Thanks again for your submission. Our reviewers have evaluated it and have determined that a change will be made. We will email you again when the appropriate resource has been updated."
+    elif instance.status == 'Completed' and instance.resolution == 'Approved':
+        subject = "Your correction is live"
+        body = "The correction you suggested has been incorporated into the appropriate OpenStax resource. Thanks for your help!"
+    elif instance.status == 'Completed' and instance.resolution == 'Sent to Customer Support':
+        subject = "Errata report for Customer Support"
+        body = "An errata report has been submitted that requires customer support attention."
+        to = "support@openstax.org"
+    else:
+        return None
+
+    if not to:
+        if instance.submitter_email_address:
+            to = instance.submitter_email_address
+        elif instance.submitted_by:
+            to = instance.submitted_by.email
+        else:
+            return None
+
+    return subject, body, to
+
+
+def notification_key(instance, created):
+    """
+    Each erratum gets at most one email per status/resolution it reaches, so
+    re-saving an erratum (or re-running a bulk action) doesn't send twice.
+    """
+    if created:
+        return '{}:created'.format(instance.pk)
+    return '{}:{}:{}'.format(instance.pk, instance.status, instance.resolution)
+
+
+def queue_status_update_emails(errata, created=False):
+    """
+    Add notifications for the given errata to the outbox in a single insert.
+    They are delivered by the send_errata_notifications command.
+    """
+    notifications = {}
+    for instance in errata:
+        email = status_update_email(instance, created)
+        if email is None:
+            continue
+        subject, body, to = email
+        key = notification_key(instance, created)
+        notifications[key] = ErrataNotification(errata=instance,
+                                                dedupe_key=key,
+                                                to_address=to,
+                                                subject=subject,
+                                                body=body,
+                                                errata_created=created)
+    if not notifications:
+        return []
+
+    existing = ErrataNotification.objects.filter(dedupe_key__in=list(notifications)) \
+                                         .values_list('dedupe_key', flat=True)
+    for key in existing:
+        del notifications[key]
+    return insert_notifications(list(notifications.values()))
+
+
+def insert_notifications(notifications):
+    """
+    Insert the notifications in one query. When a concurrent save queued
+    one of the same dedupe keys first, the insert is rolled back to its
+    savepoint and the rows are added one at a time, skipping the existing
+    keys. Returns the notifications that were added.
+    """
+    if not notifications:
+        return []
+    try:
+        with transaction.atomic():
+            return ErrataNotification.objects.bulk_create(notifications)
+    except IntegrityError:
+        pass
+
+    added = []
+    for notification in notifications:
+        try:
+            with transaction.atomic():
+                notification.save(force_insert=True)
+        except IntegrityError:
+            notification.pk = None
+            continue
+        added.append(notification)
+    return added
+
+
+class ErrataDuplicateCandidate(models.Model):
+    """
+    A previously reported erratum for the same book whose detail/location
+    is similar to the new one's. Found by errata.duplicates when an erratum
+    is created.
+    """
+    errata = models.ForeignKey(Errata, on_delete=models.CASCADE, related_name='duplicate_candidates')
+    candidate = models.ForeignKey(Errata, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['-score']
+        unique_together = ('errata', 'candidate')
+
+
+@receiver(post_save, sender=Errata, dispatch_uid="find_duplicate_errata")
+def find_duplicate_errata(sender, instance, created, **kwargs):
+    if created:
+        from .duplicates import attach_duplicate_candidates
+        run_in_background(attach_duplicate_candidates, instance.pk)
+
+
 @receiver(post_save, sender=Errata, dispatch_uid="send_status_update_email")
 def send_status_update_email(sender, instance, created, **kwargs):
-        send_email = False
-        override_to = False
-        if created:
-            subject = "We received your submission"
-            body = "Thanks for your help! Your errata submissions help keep OpenStax resources high quality and up to date."
-            send_email = True
-        elif instance.status == 'Reviewed' and (instance.resolution == 'Will Not Fix' or instance.resolution == 'Duplicate' or instance.resolution == 'Not An Error' or instance.resolution == 'Major Book Revision'):
-            subject = "We reviewed your erratum suggestion"
-            body = "Thanks again for your submission. Our reviewers have evaluated it and have determined there will be no change made."
-            send_email = True
-        elif instance.status == 'Reviewed' and instance.resolution == 'Approved':
-            subject = "We received your submission"
-            body = "Thanks again for your submission. Our reviewers have evaluated it and have determined that a change will be made. We will email you again when the appropriate resource has been updated."
-            send_email = True
-        elif instance.status == 'Completed' and instance.resolution == 'Approved':
-            subject = "Your correction is live"
-            body = "The correction you suggested has been incorporated into the appropriate OpenStax resource. Thanks for your help!"
-            send_email = True
-        elif instance.status == 'Completed' and instance.resolution == 'Sent to Customer Support':
-            subject = "Errata report for Customer Support"
-            body = "An errata report has been submitted that requires customer support attention."
-            send_email = True
-            override_to = True
-            to = "support@openstax.org"
-
-        if not override_to:
-            if instance.submitter_email_address:
-                to = instance.submitter_email_address
-            elif instance.submitted_by:
-                to = instance.submitted_by.email
-            else:
-                send_email = False
-
-        if send_email:
-            errata_email_info = {
-                'subject': subject,
-                'body': body,
-                'status': "In review",
-                'resolution': instance.resolution,
-                'created': created,
-                'id': instance.id,
-                'title': instance.book.title,
-                'source': instance.resource,
-                'error_type': instance.error_type,
-                'location': instance.location,
-                'description': instance.detail,
-                'date_submitted': instance.created,
-                'host': settings.HOST_LINK,
-            }
-            msg_plain = render_to_string('templates/email.txt', errata_email_info)
-            msg_html = render_to_string('templates/email.html', errata_email_info)
-
-            send_mail(
-                subject,
-                msg_plain,
-                'noreply@openstax.org',
-                [to],
-                html_message=msg_html,
-            )
+    queue_status_update_emails([instance], created)
+
+
+PENDING = 'Pending'
+SENT = 'Sent'
+FAILED = 'Failed'
+NOTIFICATION_STATUS = (
+    (PENDING, 'Pending'),
+    (SENT, 'Sent'),
+    (FAILED, 'Failed'),
+)
+
+
+class ErrataNotification(models.Model):
+    errata = models.ForeignKey(Errata, on_delete=models.CASCADE)
+    dedupe_key = models.CharField(max_length=255, unique=True)
+    to_address = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    errata_created = models.BooleanField(default=False)
+    status = models.CharField(
+        max_length=20,
+        choices=NOTIFICATION_STATUS,
+        default=PENDING,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt = models.DateTimeField(default=now)
+    last_error = models.TextField(blank=True, null=True)
+    queued = models.DateTimeField(auto_now_add=True)
+    sent = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return '{} to {}'.format(self.subject, self.to_address)
+
+    class Meta:
+        index_together = [['status', 'next_attempt']]
+
+
+UPLOAD_PENDING = 'Pending'
+UPLOAD_VERIFIED = 'Verified'
+UPLOAD_REJECTED = 'Rejected'
+UPLOAD_STATUS = (
+    (UPLOAD_PENDING, 'Pending'),
+    (UPLOAD_VERIFIED, 'Verified'),
+    (UPLOAD_REJECTED, 'Rejected'),
+)
+
+
+class DirectUpload(models.Model):
+    """
+    A file the client uploads straight to storage (see errata.uploads),
+    referenced from the errata POST by its signed token.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    content_type = models.CharField(max_length=100)
+    size = models.PositiveIntegerField(default=0)
+    status = models.CharField(
+        max_length=20,
+        choices=UPLOAD_STATUS,
+        default=UPLOAD_PENDING,
+    )
+    errata = models.ForeignKey(Errata, blank=True, null=True, on_delete=models.SET_NULL, related_name='direct_uploads')
+    field = models.CharField(max_length=20, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    # set by the first PUT to errata.views.direct_upload_put
+    received = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return self.name
 
 
 class InternalDocumentation(models.Model):
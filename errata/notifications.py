@@ -0,0 +1,133 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.timezone import now
+
+from .models import ErrataNotification, PENDING, SENT, FAILED
+
+logger = logging.getLogger(__name__)
+
+FROM_ADDRESS = 'noreply@openstax.org'
+MAX_ATTEMPTS = 6
+MAX_BACKOFF = timedelta(hours=6)
+# how long a claimed notification is left to the worker sending it
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def backoff(attempts):
+    """
+    Delay before retrying a notification that has failed `attempts` times:
+    2, 4, 8, ... minutes, capped at MAX_BACKOFF.
+    """
+    return min(timedelta(minutes=2 ** attempts), MAX_BACKOFF)
+
+
+def render_notification(notification):
+    errata = notification.errata
+    errata_email_info = {
+        'subject': notification.subject,
+        'body': notification.body,
+        'status': "In review",
+        'resolution': errata.resolution,
+        'created': notification.errata_created,
+        'id': errata.id,
+        'title': errata.book.title,
+        'source': errata.resource,
+        'error_type': errata.error_type,
+        'location': errata.location,
+        'description': errata.detail,
+        'date_submitted': errata.created,
+        'host': settings.HOST_LINK,
+    }
+    msg_plain = render_to_string('templates/email.txt', errata_email_info)
+    msg_html = render_to_string('templates/email.html', errata_email_info)
+    return msg_plain, msg_html
+
+
+def claim_notifications(batch_size):
+    """
+    Lease up to batch_size due notifications to this worker by moving their
+    next attempt CLAIM_TIMEOUT ahead, and return their ids. The lock is only
+    held for this transaction, so sending happens outside of it, and rows
+    left behind by a worker that died become due again after the lease.
+    """
+    with transaction.atomic():
+        ids = list(ErrataNotification.objects.select_for_update()
+                   .filter(status=PENDING, next_attempt__lte=now())
+                   .order_by('next_attempt')
+                   .values_list('id', flat=True)[:batch_size])
+        if ids:
+            ErrataNotification.objects.filter(id__in=ids) \
+                                      .update(next_attempt=now() + CLAIM_TIMEOUT)
+    return ids
+
+
+def record_failure(notification, error, max_attempts):
+    logger.warning('errata notification %s failed: %s', notification.pk, error)
+    notification.attempts += 1
+    notification.last_error = str(error)
+    if notification.attempts >= max_attempts:
+        notification.status = FAILED
+    else:
+        notification.next_attempt = now() + backoff(notification.attempts)
+    notification.save(update_fields=['attempts', 'status', 'next_attempt', 'last_error'])
+
+
+def record_sent(notification):
+    notification.attempts += 1
+    notification.status = SENT
+    notification.sent = now()
+    notification.last_error = None
+    notification.save(update_fields=['attempts', 'status', 'sent', 'last_error'])
+
+
+def send_notification(notification, connection):
+    msg_plain, msg_html = render_notification(notification)
+    message = EmailMultiAlternatives(notification.subject,
+                                     msg_plain,
+                                     FROM_ADDRESS,
+                                     [notification.to_address],
+                                     connection=connection)
+    message.attach_alternative(msg_html, 'text/html')
+    message.send()
+
+
+def send_pending_notifications(batch_size=100, max_attempts=MAX_ATTEMPTS):
+    """
+    Claim one batch of due notifications, send them over a single mail
+    connection and return (sent, failed). Failures, including a connection
+    that can't be opened, are retried with backoff.
+    """
+    ids = claim_notifications(batch_size)
+    if not ids:
+        return 0, 0
+
+    notifications = list(ErrataNotification.objects.filter(id__in=ids)
+                                                   .select_related('errata__book')
+                                                   .order_by('next_attempt', 'id'))
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        for notification in notifications:
+            record_failure(notification, e, max_attempts)
+        return 0, len(notifications)
+
+    sent = failed = 0
+    try:
+        for notification in notifications:
+            try:
+                send_notification(notification, connection)
+            except Exception as e:
+                record_failure(notification, e, max_attempts)
+                failed += 1
+            else:
+                record_sent(notification)
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
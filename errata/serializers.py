@@ -1,10 +1,39 @@
 from .models import Errata
+from .uploads import attach_upload, load_upload
 
 from rest_framework import serializers
 
 
 class ErrataSerializer(serializers.ModelSerializer):
     resolution_date = serializers.DateField(read_only=True)
+    # signed tokens from /api/errata/upload/ for files uploaded straight to storage
+    file_1_upload = serializers.CharField(write_only=True, required=False)
+    file_2_upload = serializers.CharField(write_only=True, required=False)
+
+    def validate_upload(self, token):
+        try:
+            return load_upload(token)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+
+    def validate_file_1_upload(self, value):
+        return self.validate_upload(value)
+
+    def validate_file_2_upload(self, value):
+        return self.validate_upload(value)
+
+    def create(self, validated_data):
+        uploads = {}
+        for field in ('file_1', 'file_2'):
+            upload = validated_data.pop('{}_upload'.format(field), None)
+            if upload is not None:
+                uploads[field] = upload
+                validated_data[field] = upload.name
+
+        errata = super(ErrataSerializer, self).create(validated_data)
+        for field, upload in uploads.items():
+            attach_upload(errata, field, upload)
+        return errata
 
     class Meta:
         model = Errata
@@ -29,4 +58,6 @@ class ErrataSerializer(serializers.ModelSerializer):
                   'submitted_by',
                   'submitter_email_address',
                   'file_1',
-                  'file_2')
+                  'file_2',
+                  'file_1_upload',
+                  'file_2_upload')
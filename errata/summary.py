@@ -0,0 +1,74 @@
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Errata, ErrataCount, SUMMARY_DIMENSIONS, TOTAL, summary_value
+
+
+def count_errata(book_ids=None):
+    """
+    Count errata directly from the errata table, one grouped query per
+    dimension. Returns {(book id, dimension, value): count}.
+    """
+    errata = Errata.objects.all()
+    if book_ids is not None:
+        errata = errata.filter(book_id__in=book_ids)
+
+    counts = {}
+    for row in errata.values('book_id').annotate(count=Count('id')).order_by():
+        counts[(row['book_id'], TOTAL, '')] = row['count']
+    for dimension in SUMMARY_DIMENSIONS:
+        for row in errata.values('book_id', dimension).annotate(count=Count('id')).order_by():
+            counts[(row['book_id'], dimension, summary_value(row[dimension]))] = row['count']
+    return counts
+
+
+def rebuild_summary(book_ids=None):
+    """
+    Replace the ErrataCount rows (for all books, or just book_ids) with fresh
+    counts and return the number of counters that had drifted.
+    """
+    with transaction.atomic():
+        counters = ErrataCount.objects.select_for_update()
+        if book_ids is not None:
+            counters = counters.filter(book_id__in=book_ids)
+        current = dict(((c.book_id, c.dimension, c.value), c.count) for c in counters)
+        counts = count_errata(book_ids)
+
+        drifted = sum(1 for key in set(current) | set(counts)
+                      if current.get(key, 0) != counts.get(key, 0))
+        if drifted:
+            counters.delete()
+            ErrataCount.objects.bulk_create([
+                ErrataCount(book_id=book_id, dimension=dimension, value=value, count=count)
+                for (book_id, dimension, value), count in counts.items()
+            ])
+    return drifted
+
+
+def get_summary(book_id=None):
+    """
+    Read the precomputed counts: totals across books for each dimension and
+    the per-book breakdown. Only reads the aggregate table.
+    """
+    counters = ErrataCount.objects.filter(count__gt=0)
+    if book_id is not None:
+        counters = counters.filter(book_id=book_id)
+
+    totals = {}
+    books = {}
+    for counter in counters.values('book_id', 'book__title', 'dimension', 'value', 'count'):
+        book = books.setdefault(counter['book_id'], {'id': counter['book_id'],
+                                                     'title': counter['book__title'],
+                                                     TOTAL: 0})
+        if counter['dimension'] == TOTAL:
+            book[TOTAL] = counter['count']
+            totals[TOTAL] = totals.get(TOTAL, 0) + counter['count']
+            continue
+        book.setdefault(counter['dimension'], {})[counter['value']] = counter['count']
+        dimension = totals.setdefault(counter['dimension'], {})
+        dimension[counter['value']] = dimension.get(counter['value'], 0) + counter['count']
+
+    return {
+        'totals': totals,
+        'books': sorted(books.values(), key=lambda book: book['title'] or ''),
+    }
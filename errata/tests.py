@@ -0,0 +1,429 @@
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.paginator import EmptyPage
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from wagtail.wagtailcore.models import Page
+
+from api.tests import use_shared_cache
+from books.models import Book
+from errata.admin import BookFilter
+from errata.duplicates import (attach_duplicate_candidates, candidate_queryset,
+                               find_duplicate_candidates, trigram_threshold)
+from errata.models import (Errata, ErrataCount, ErrataNotification, DirectUpload,
+                           FAILED, PENDING, SENT, TOTAL, UPLOAD_VERIFIED, UPLOAD_REJECTED,
+                           insert_notifications)
+from errata.notifications import send_pending_notifications
+from errata.summary import count_errata, get_summary, rebuild_summary
+from errata.transitions import bulk_transition
+from errata.uploads import verify_upload
+from extraadminfilters.filters import cached_choices
+from extraadminfilters.paginator import EstimatedCountPaginator
+
+
+class ErrataSummaryTest(TestCase):
+
+    def setUp(self):
+        root_page = Page.objects.get(title="Root")
+        self.book = Book(title="University Physics", slug="university-physics")
+        root_page.add_child(instance=self.book)
+
+    def counts(self):
+        return dict(((c.book_id, c.dimension, c.value), c.count)
+                    for c in ErrataCount.objects.filter(count__gt=0))
+
+    def test_counts_follow_saves_and_deletes(self):
+        errata = Errata.objects.create(book=self.book, detail="typo on page 4", resource='Textbook')
+        Errata.objects.create(book=self.book, detail="broken link", resource='Textbook')
+        self.assertEqual(self.counts(), count_errata())
+
+        errata = Errata.objects.get(pk=errata.pk)
+        errata.status = 'Reviewed'
+        errata.resolution = 'Approved'
+        errata.save()
+        self.assertEqual(self.counts(), count_errata())
+
+        errata.delete()
+        self.assertEqual(self.counts(), count_errata())
+
+        summary = get_summary()
+        self.assertEqual(summary['totals'][TOTAL], 1)
+        self.assertEqual(summary['totals']['status'], {'New': 1})
+
+    def test_rebuild_corrects_drift(self):
+        Errata.objects.create(book=self.book, detail="typo on page 4")
+        Errata.objects.filter(book=self.book).update(status='Completed')
+        self.assertNotEqual(self.counts(), count_errata())
+
+        self.assertTrue(rebuild_summary([self.book.pk]))
+        self.assertEqual(self.counts(), count_errata())
+        self.assertEqual(rebuild_summary(), 0)
+
+
+class BookTitleTest(TestCase):
+
+    def setUp(self):
+        root_page = Page.objects.get(title="Root")
+        self.book = Book(title="Physics", slug="physics")
+        root_page.add_child(instance=self.book)
+        self.errata = Errata.objects.create(book=self.book, detail="typo")
+
+    def test_saving_does_not_load_the_book(self):
+        errata = Errata.objects.get(pk=self.errata.pk)
+        errata.detail = "typo on page 3"
+        with CaptureQueriesContext(connection) as queries:
+            errata.save()
+        self.assertFalse([q for q in queries if 'wagtailcore_page' in q['sql']])
+        self.assertEqual(errata.book_title, "Physics")
+
+    def test_only_published_titles_are_copied(self):
+        self.book.title = "Physics 2e"
+        revision = self.book.save_revision()
+        self.assertEqual(Errata.objects.get(pk=self.errata.pk).book_title, "Physics")
+
+        revision.publish()
+        self.assertEqual(Errata.objects.get(pk=self.errata.pk).book_title, "Physics 2e")
+
+
+class DuplicateDetectionTest(TestCase):
+
+    def setUp(self):
+        root_page = Page.objects.get(title="Root")
+        self.book = Book(title="Biology 2e", slug="biology-2e")
+        root_page.add_child(instance=self.book)
+        other_book = Book(title="Concepts of Biology", slug="concepts-of-biology")
+        root_page.add_child(instance=other_book)
+
+        detail = "The caption of figure 10.3 says mitosis instead of meiosis"
+        self.errata = Errata.objects.create(book=self.book, detail=detail, location="Figure 10.3")
+        self.duplicate = Errata.objects.create(
+            book=self.book, detail="caption of figure 10.3 says mitosis, it should say meiosis",
+            location="Figure 10.3")
+        self.unrelated = Errata.objects.create(
+            book=self.book, detail="The answer key for chapter 4 question 12 is wrong")
+        Errata.objects.create(book=other_book, detail=detail, location="Figure 10.3")
+
+    def test_similar_errata_of_the_same_book_are_found(self):
+        candidates = find_duplicate_candidates(self.errata)
+        self.assertEqual([candidate for candidate, score in candidates], [self.duplicate])
+        self.assertTrue(0 < candidates[0][1] <= 1)
+
+    @override_settings(ERRATA_DUPLICATE_THRESHOLD=0.95)
+    def test_threshold(self):
+        self.assertEqual(find_duplicate_candidates(self.errata), [])
+
+    def test_candidates_are_attached(self):
+        attach_duplicate_candidates(self.errata.pk)
+        attach_duplicate_candidates(self.errata.pk)
+        self.assertEqual([c.candidate for c in self.errata.duplicate_candidates.all()],
+                         [self.duplicate])
+
+    def test_threshold_is_not_left_on_the_connection(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT show_limit()')
+            before = cursor.fetchone()[0]
+            with override_settings(ERRATA_DUPLICATE_THRESHOLD=0.9):
+                find_duplicate_candidates(self.errata)
+            cursor.execute('SELECT show_limit()')
+            self.assertAlmostEqual(cursor.fetchone()[0], before)
+
+    def test_candidates_are_found_through_the_trigram_index(self):
+        Errata.objects.bulk_create([
+            Errata(book=self.book, detail="unrelated report number {} about chapter {}".format(i, i % 30))
+            for i in range(2000)])
+        with trigram_threshold(0.3), connection.cursor() as cursor:
+            cursor.execute('ANALYZE errata_errata')
+            sql, params = candidate_queryset(self.errata).query.sql_with_params()
+            cursor.execute('EXPLAIN ' + sql, params)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        self.assertIn('errata_errata_detail_trgm', plan)
+
+
+class BookFilterTest(TestCase):
+
+    def setUp(self):
+        root_page = Page.objects.get(title="Root")
+        self.book = Book(title="Chemistry", slug="chemistry")
+        root_page.add_child(instance=self.book)
+        self.field = Errata._meta.get_field('book')
+
+    def test_choices_are_shared_and_dropped_when_a_book_changes(self):
+        use_shared_cache(self)
+        self.assertIn((self.book.pk, 'Chemistry'), cached_choices(self.field))
+        with self.assertNumQueries(0):
+            cached_choices(self.field)
+
+        self.book.title = "Chemistry 2e"
+        self.book.save()
+        self.assertIn((self.book.pk, 'Chemistry 2e'), cached_choices(self.field))
+
+    def test_choices_are_not_cached_per_process(self):
+        cached_choices(self.field)
+        with self.assertNumQueries(1):
+            cached_choices(self.field)
+
+    def test_changelist_counts_come_from_the_summary(self):
+        Errata.objects.create(book=self.book, detail="typo")
+        Errata.objects.create(book=self.book, detail="another typo")
+        # differs from the errata table, so the count shown must be the summary's
+        ErrataCount.objects.filter(book=self.book, dimension=TOTAL).update(count=7)
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+
+        response = self.client.get('/django-admin/errata/errata/')
+        self.assertEqual(response.status_code, 200)
+        book_filter = next(spec for spec in response.context['cl'].filter_specs
+                           if isinstance(spec, BookFilter))
+        choices = list(book_filter.choices(response.context['cl']))
+        self.assertIn('Chemistry (7)', [choice['display'] for choice in choices])
+        self.assertContains(response, 'Chemistry (7)')
+
+
+class FailingSendBackend(EmailBackend):
+
+    def send_messages(self, messages):
+        raise IOError("SES throttled")
+
+
+class FailingOpenBackend(EmailBackend):
+
+    def open(self):
+        raise IOError("SES unreachable")
+
+
+class NotificationOutboxTest(TestCase):
+
+    def setUp(self):
+        root_page = Page.objects.get(title="Root")
+        self.book = Book(title="Astronomy", slug="astronomy")
+        root_page.add_child(instance=self.book)
+
+    def create_errata(self, count=1):
+        return [Errata.objects.create(book=self.book, detail="typo {}".format(i),
+                                      submitter_email_address='reader@example.com')
+                for i in range(count)]
+
+    def test_each_state_is_queued_once(self):
+        errata, = self.create_errata()
+        errata.save()
+        self.assertEqual(ErrataNotification.objects.count(), 1)
+
+        errata.status = 'Reviewed'
+        errata.resolution = 'Approved'
+        errata.save()
+        errata.save()
+        self.assertEqual(ErrataNotification.objects.count(), 2)
+
+    def test_keys_queued_concurrently_are_skipped(self):
+        errata, = self.create_errata()
+        queued = ErrataNotification.objects.get()
+        duplicate = ErrataNotification(errata=errata, dedupe_key=queued.dedupe_key,
+                                       to_address=queued.to_address, subject='', body='')
+        new = ErrataNotification(errata=errata, dedupe_key='{}:other'.format(errata.pk),
+                                 to_address=queued.to_address, subject='', body='')
+        self.assertEqual(insert_notifications([duplicate, new]), [new])
+        self.assertEqual(ErrataNotification.objects.count(), 2)
+
+    def test_batches_are_sent(self):
+        self.create_errata(3)
+        self.assertEqual(send_pending_notifications(batch_size=2), (2, 0))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(send_pending_notifications(batch_size=2), (1, 0))
+        self.assertEqual(send_pending_notifications(batch_size=2), (0, 0))
+        self.assertEqual(ErrataNotification.objects.filter(status=SENT).count(), 3)
+
+    @override_settings(EMAIL_BACKEND='errata.tests.FailingSendBackend')
+    def test_failures_are_retried_with_backoff(self):
+        self.create_errata()
+        self.assertEqual(send_pending_notifications(), (0, 1))
+        notification = ErrataNotification.objects.get()
+        self.assertEqual((notification.status, notification.attempts), (PENDING, 1))
+        self.assertGreater(notification.next_attempt, now() + timedelta(minutes=1))
+        # not due yet
+        self.assertEqual(send_pending_notifications(), (0, 0))
+
+        ErrataNotification.objects.update(next_attempt=now())
+        self.assertEqual(send_pending_notifications(max_attempts=2), (0, 1))
+        self.assertEqual(ErrataNotification.objects.get().status, FAILED)
+
+    @override_settings(EMAIL_BACKEND='errata.tests.FailingOpenBackend')
+    def test_connection_failures_are_retried(self):
+        self.create_errata(2)
+        self.assertEqual(send_pending_notifications(), (0, 2))
+        for notification in ErrataNotification.objects.all():
+            self.assertEqual(notification.attempts, 1)
+            self.assertEqual(notification.last_error, "SES unreachable")
+
+
+class ErrataChangelistTest(TestCase):
+
+    def setUp(self):
+        root_page = Page.objects.get(title="Root")
+        self.book = Book(title="Statistics", slug="statistics")
+        root_page.add_child(instance=self.book)
+        for i in range(3):
+            Errata.objects.create(book=self.book, detail="typo {}".format(i))
+        Errata.objects.create(book=self.book, detail="wrong answer", status='Reviewed')
+
+        model_admin = admin.site._registry[Errata]
+        self.addCleanup(setattr, model_admin, 'list_per_page', model_admin.list_per_page)
+        model_admin.list_per_page = 3
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+
+    def test_counts_and_pages(self):
+        response = self.client.get('/django-admin/errata/errata/')
+        self.assertEqual(response.status_code, 200)
+        cl = response.context['cl']
+        self.assertEqual((cl.result_count, cl.paginator.num_pages, len(cl.result_list)), (4, 2, 3))
+        self.assertContains(response, 'Statistics (4)')
+
+        response = self.client.get('/django-admin/errata/errata/', {'p': 1})
+        self.assertEqual(len(response.context['cl'].result_list), 1)
+
+        response = self.client.get('/django-admin/errata/errata/', {'status__exact': 'New'})
+        cl = response.context['cl']
+        self.assertEqual((cl.result_count, cl.paginator.num_pages), (3, 1))
+
+    def paginator(self, estimate, per_page, threshold):
+        paginator = EstimatedCountPaginator(Errata.objects.filter(status='New').order_by('pk'),
+                                            per_page)
+        paginator.estimate = lambda queryset, connection: estimate
+        paginator.threshold = threshold
+        return paginator
+
+    def test_exact_counts_are_capped(self):
+        # 3 rows, but no more than threshold + 1 are counted
+        paginator = self.paginator(None, 2, threshold=1)
+        self.assertEqual(paginator.count, 2)
+        self.assertTrue(paginator.is_estimate)
+
+        paginator = self.paginator(None, 2, threshold=10)
+        self.assertEqual(paginator.count, 3)
+        self.assertFalse(paginator.is_estimate)
+
+    def test_pages_past_an_underestimate_are_reachable(self):
+        paginator = self.paginator(1, 1, threshold=1)
+        self.assertEqual((paginator.count, paginator.num_pages), (1, 1))
+        self.assertEqual(len(paginator.page(3).object_list), 1)
+        self.assertEqual(list(paginator.page(4).object_list), [])
+        with self.assertRaises(EmptyPage):
+            paginator.page(0)
+
+
+class BulkTransitionTest(TestCase):
+
+    def setUp(self):
+        root_page = Page.objects.get(title="Root")
+        self.book = Book(title="Biology", slug="biology")
+        root_page.add_child(instance=self.book)
+        self.approved = Errata.objects.create(book=self.book, detail="wrong caption",
+                                              resolution='Approved',
+                                              submitter_email_address='a@example.com')
+        self.duplicate = Errata.objects.create(book=self.book, detail="wrong caption again",
+                                               resolution='Duplicate', resolution_notes='see #1',
+                                               submitter_email_address='b@example.com')
+
+    def test_bulk_transition_matches_save(self):
+        updated = bulk_transition(Errata.objects.filter(status='New'), status='Reviewed')
+        self.assertEqual(updated, 2)
+
+        approved = Errata.objects.get(pk=self.approved.pk)
+        self.assertEqual(approved.status, 'Reviewed')
+        self.assertIsNotNone(approved.reviewed_date)
+        self.assertEqual(approved.resolution_notes, "Our reviewers accepted this change.")
+        # existing notes are kept
+        self.assertEqual(Errata.objects.get(pk=self.duplicate.pk).resolution_notes, 'see #1')
+
+        self.assertEqual(ErrataNotification.objects.filter(dedupe_key__contains=':Reviewed:').count(), 2)
+        self.assertEqual(ErrataCount.objects.get(book=self.book, dimension='status', value='Reviewed').count, 2)
+
+        # re-running the transition doesn't queue the emails again
+        bulk_transition(Errata.objects.all(), status='Reviewed')
+        self.assertEqual(ErrataNotification.objects.filter(dedupe_key__contains=':Reviewed:').count(), 2)
+
+
+class DirectUploadTest(TestCase):
+
+    def setUp(self):
+        root_page = Page.objects.get(title="Root")
+        self.book = Book(title="Chemistry", slug="chemistry")
+        root_page.add_child(instance=self.book)
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            ERRATA_UPLOAD_BACKEND='errata.uploads.FileSystemUploadBackend',
+            ERRATA_UPLOAD_MAX_SIZE=1024)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def request_upload(self, size=3):
+        response = self.client.post('/api/errata/upload/',
+                                    json.dumps({'filename': 'screen shot.png',
+                                                'content_type': 'image/png',
+                                                'size': size}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        return json.loads(response.content.decode('utf-8'))
+
+    def test_upload_is_referenced_by_token(self):
+        target = self.request_upload()
+        response = self.client.put(target['upload']['url'], b'png', content_type='image/png')
+        self.assertEqual(response.status_code, 200)
+        # the PUT url can't overwrite the file
+        response = self.client.put(target['upload']['url'], b'gif', content_type='image/png')
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.post('/api/errata/', {'book': self.book.pk,
+                                                     'detail': 'figure 2 is mislabeled',
+                                                     'file_1_upload': target['token']})
+        self.assertEqual(response.status_code, 201)
+
+        upload = DirectUpload.objects.get()
+        errata = Errata.objects.get()
+        self.assertEqual(errata.file_1.name, upload.name)
+        self.assertEqual(verify_upload(upload.pk).status, UPLOAD_VERIFIED)
+
+        # a token can only be used once
+        response = self.client.post('/api/errata/', {'book': self.book.pk,
+                                                     'detail': 'again',
+                                                     'file_1_upload': target['token']})
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(ERRATA_UPLOAD_MAX_SIZE=5 * 1024 * 1024, DATA_UPLOAD_MAX_MEMORY_SIZE=1024)
+    def test_large_uploads_are_streamed(self):
+        content = b'x' * (3 * 1024 * 1024)
+        target = self.request_upload(size=len(content))
+        response = self.client.put(target['upload']['url'], content, content_type='image/png')
+        self.assertEqual(response.status_code, 200)
+        upload = DirectUpload.objects.get()
+        self.assertEqual(default_storage.size(upload.name), len(content))
+        self.assertIsNotNone(upload.received)
+
+    def test_oversized_upload_is_rejected(self):
+        target = self.request_upload()
+        response = self.client.post('/api/errata/', {'book': self.book.pk,
+                                                     'detail': 'figure 2 is mislabeled',
+                                                     'file_1_upload': target['token']})
+        self.assertEqual(response.status_code, 201)
+        upload = DirectUpload.objects.get()
+        # the client never uploaded, or uploaded more than it announced
+        default_storage.save(upload.name, ContentFile(b'x' * 2048))
+
+        self.assertEqual(verify_upload(upload.pk).status, UPLOAD_REJECTED)
+        self.assertFalse(default_storage.exists(upload.name))
+        self.assertFalse(Errata.objects.get().file_1)
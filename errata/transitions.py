@@ -0,0 +1,116 @@
+from django.db import transaction
+from django.db.models import Case, DateField, F, Q, TextField, Value, When
+from django.utils.timezone import localtime, now
+
+# dates stamped by Errata.save()
+DATE_FIELDS = ('resolution_date', 'reviewed_date', 'corrected_date')
+
+# default resolution notes: (resolution, statuses it applies to or None for any, note)
+RESOLUTION_NOTES = (
+    ('Duplicate', None, "This is a duplicate of another report for this book."),
+    ('Not An Error', None, "Our reviewers determined this was not an error."),
+    ('Will Not Fix', None, "Our reviewers determined the textbook meets scope, sequence, and accuracy requirements as is.  No change will be made."),
+    ('Major Book Revision', None, "Our reviewers determined this would require a significant book revision.  While we cannot make this change at this time, we will consider it for future editions of this book."),
+    ('Approved', ('Reviewed', 'Completed'), "Our reviewers accepted this change."),
+    ('Sent to Customer Support', ('Completed', ), "Forwarded to customer support."),
+)
+
+
+def derived_fields(status, resolution):
+    """
+    Return (date fields to stamp with today's date, default resolution note
+    or None) for an erratum saved with this status and resolution. Shared by
+    Errata.save() and bulk_transition() so both follow the same rules.
+    """
+    dates = []
+    if resolution:
+        dates.append('resolution_date')
+    if status == "Editorial Review" or status == "Reviewed":
+        dates.append('reviewed_date')
+    if status == "Completed" and resolution != "Will Not Fix":
+        dates.append('corrected_date')
+
+    note = None
+    for note_resolution, statuses, text in RESOLUTION_NOTES:
+        if resolution == note_resolution and (statuses is None or status in statuses):
+            note = text
+            break
+    return dates, note
+
+
+def _state_expressions(changes, today):
+    """
+    Case expressions computing the derived fields of every row from the
+    status/resolution it will have after `changes`, by listing each
+    possible (status, resolution) pair.
+    """
+    from .models import ERRATA_STATUS, ERRATA_RESOLUTIONS
+
+    if 'status' in changes:
+        statuses = [changes['status']]
+    else:
+        statuses = [status for status, label in ERRATA_STATUS]
+    if 'resolution' in changes:
+        resolutions = [changes['resolution']]
+    else:
+        resolutions = [resolution for resolution, label in ERRATA_RESOLUTIONS] + [None]
+
+    date_whens = dict((field, []) for field in DATE_FIELDS)
+    note_whens = []
+    empty_notes = Q(resolution_notes__isnull=True) | Q(resolution_notes='')
+    for status in statuses:
+        for resolution in resolutions:
+            condition = Q()
+            if 'status' not in changes:
+                condition &= Q(status=status)
+            if 'resolution' not in changes:
+                condition &= Q(resolution=resolution) if resolution else Q(resolution__isnull=True) | Q(resolution='')
+
+            dates, note = derived_fields(status, resolution)
+            for field in dates:
+                date_whens[field].append(condition)
+            if note:
+                note_whens.append(When(condition & empty_notes, then=Value(note, output_field=TextField())))
+
+    today = Value(today, output_field=DateField())
+    values = {}
+    for field, conditions in date_whens.items():
+        if not conditions:
+            continue
+        if any(not condition for condition in conditions):
+            # the changes alone decide it, no need for a CASE
+            values[field] = today
+        else:
+            values[field] = Case(*[When(condition, then=today) for condition in conditions],
+                                 default=F(field))
+    if note_whens:
+        values['resolution_notes'] = Case(*note_whens, default=F('resolution_notes'))
+    return values
+
+
+def bulk_transition(queryset, **changes):
+    """
+    Apply `changes` (eg. status='Reviewed') to every erratum in queryset with
+    the side effects of Errata.save(): the dates and default resolution notes
+    are computed in the same UPDATE, status emails are queued with one
+    insert and the summary counts of the affected books are rebuilt.
+    Returns the number of errata changed.
+    """
+    from .models import Errata, queue_status_update_emails
+    from .summary import rebuild_summary
+
+    # the queryset may be filtered on the fields being changed
+    ids = list(queryset.values_list('pk', flat=True))
+    if not ids:
+        return 0
+
+    values = dict(changes)
+    values.update(_state_expressions(changes, localtime(now()).date()))
+    values['modified'] = now()
+
+    errata = Errata.objects.filter(pk__in=ids)
+    with transaction.atomic():
+        updated = errata.update(**values)
+        queue_status_update_emails(errata.select_related('book', 'submitted_by'))
+        rebuild_summary(set(errata.values_list('book_id', flat=True)))
+    return updated
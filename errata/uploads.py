@@ -0,0 +1,185 @@
+import os
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.base import File
+from django.core.files.storage import default_storage
+from django.core.urlresolvers import reverse
+from django.utils.module_loading import import_string
+from django.utils.text import get_valid_filename
+from django.utils.timezone import now
+
+from openstax.background import run_in_background
+
+from .models import Errata, DirectUpload, UPLOAD_PENDING, UPLOAD_VERIFIED, UPLOAD_REJECTED
+
+TOKEN_SALT = 'errata.direct_upload'
+ALLOWED_CONTENT_TYPES = ('image/png', 'image/jpeg', 'image/gif', 'application/pdf')
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def max_upload_size():
+    return getattr(settings, 'ERRATA_UPLOAD_MAX_SIZE', 10 * 1024 * 1024)
+
+
+def upload_expires():
+    return getattr(settings, 'ERRATA_UPLOAD_EXPIRES', 60 * 60)
+
+
+class S3UploadBackend(object):
+    """
+    Issues presigned S3 PUT urls for the bucket behind
+    openstax.custom_storages.MediaStorage, so the file never passes through
+    Django.
+    """
+    def __init__(self, storage=None):
+        self.storage = storage or default_storage
+
+    def upload_target(self, upload, token):
+        key = self.storage._normalize_name(self.storage._clean_name(upload.name))
+        headers = {'Content-Type': upload.content_type}
+        url = self.storage.connection.generate_url(upload_expires(), 'PUT',
+                                                   bucket=self.storage.bucket_name,
+                                                   key=key,
+                                                   headers=headers,
+                                                   force_http=False)
+        return {'method': 'PUT', 'url': url, 'headers': headers}
+
+
+class FileSystemUploadBackend(object):
+    """
+    Stand-in for S3 in development and tests: the client PUTs the file to
+    errata.views.direct_upload_put, which checks the signed token and writes
+    it to the default storage.
+    """
+    def __init__(self, storage=None):
+        self.storage = storage or default_storage
+
+    def upload_target(self, upload, token):
+        url = reverse('errata_direct_upload_put', args=[token])
+        return {'method': 'PUT', 'url': url, 'headers': {'Content-Type': upload.content_type}}
+
+    def receive(self, upload, stream):
+        """
+        Copy the request stream to storage in chunks, raising UploadTooLarge
+        (after removing what was written) past max_upload_size().
+        """
+        try:
+            name = self.storage.save(upload.name, StreamedFile(stream, max_upload_size()))
+        except UploadTooLarge:
+            if self.storage.exists(upload.name):
+                self.storage.delete(upload.name)
+            raise
+        upload.name = name
+        upload.save(update_fields=['name'])
+
+
+class StreamedFile(File):
+    """
+    A file read once from a stream (eg. the request), at most limit bytes.
+    """
+    def __init__(self, stream, limit):
+        super(StreamedFile, self).__init__(stream)
+        self.limit = limit
+
+    def chunks(self, chunk_size=None):
+        chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+        received = 0
+        while True:
+            chunk = self.file.read(chunk_size)
+            if not chunk:
+                break
+            received += len(chunk)
+            if received > self.limit:
+                raise UploadTooLarge("file is too large")
+            yield chunk
+
+
+def get_backend():
+    backend = getattr(settings, 'ERRATA_UPLOAD_BACKEND', 'errata.uploads.FileSystemUploadBackend')
+    return import_string(backend)()
+
+
+def create_upload(filename, content_type, size):
+    """
+    Register a pending upload and return (upload, token, upload target).
+    Raises ValueError when the file isn't acceptable.
+    """
+    if content_type not in ALLOWED_CONTENT_TYPES:
+        raise ValueError("content_type must be one of {}".format(', '.join(ALLOWED_CONTENT_TYPES)))
+    if size <= 0 or size > max_upload_size():
+        raise ValueError("size must be between 1 and {} bytes".format(max_upload_size()))
+
+    name = os.path.join('errata/user_uploads/direct', uuid.uuid4().hex,
+                        get_valid_filename(os.path.basename(filename)) or 'upload')
+    upload = DirectUpload.objects.create(name=name, content_type=content_type, size=size)
+    token = signing.dumps(upload.pk, salt=TOKEN_SALT)
+    return upload, token, get_backend().upload_target(upload, token)
+
+
+def load_upload(token):
+    """
+    Return the pending, unattached upload a token was issued for, or raise
+    ValueError.
+    """
+    try:
+        upload_id = signing.loads(token, salt=TOKEN_SALT, max_age=upload_expires())
+    except signing.BadSignature:
+        raise ValueError("invalid or expired upload token")
+    upload = DirectUpload.objects.filter(pk=upload_id, status=UPLOAD_PENDING, errata__isnull=True).first()
+    if upload is None:
+        raise ValueError("upload token has already been used")
+    return upload
+
+
+def claim_upload_put(upload):
+    """
+    Mark the upload as received, returns False when another PUT already
+    used its token.
+    """
+    return bool(DirectUpload.objects.filter(pk=upload.pk, received__isnull=True)
+                                    .update(received=now()))
+
+
+def release_upload_put(upload):
+    DirectUpload.objects.filter(pk=upload.pk).update(received=None)
+
+
+def attach_upload(errata, field, upload):
+    """
+    Record that errata.<field> points at the uploaded key and check the file
+    once the erratum is committed.
+    """
+    upload.errata = errata
+    upload.field = field
+    upload.save(update_fields=['errata', 'field'])
+    run_in_background(verify_upload, upload.pk)
+
+
+def verify_upload(upload_id):
+    """
+    Check an attached upload exists in storage and is within the size limit.
+    Rejected files are deleted and detached from the erratum.
+    """
+    upload = DirectUpload.objects.filter(pk=upload_id, status=UPLOAD_PENDING).first()
+    if upload is None:
+        return None
+
+    storage = default_storage
+    valid = storage.exists(upload.name) and storage.size(upload.name) <= max_upload_size()
+    if valid:
+        upload.size = storage.size(upload.name)
+        upload.status = UPLOAD_VERIFIED
+    else:
+        upload.status = UPLOAD_REJECTED
+        if storage.exists(upload.name):
+            storage.delete(upload.name)
+        if upload.errata_id and upload.field:
+            Errata.objects.filter(pk=upload.errata_id, **{upload.field: upload.name}) \
+                          .update(**{upload.field: None})
+    upload.save(update_fields=['size', 'status'])
+    return upload
@@ -6,5 +6,8 @@ router = routers.SimpleRouter()
 router.register(r'', views.ErrataView)
 
 urlpatterns = [
+    url(r'^summary/$', views.errata_summary, name='errata_summary'),
+    url(r'^upload/$', views.direct_upload, name='errata_direct_upload'),
+    url(r'^upload/(?P<token>[\w.:-]+)/$', views.direct_upload_put, name='errata_direct_upload_put'),
     url(r'^', include(router.urls)),
 ]
@@ -1,5 +1,8 @@
+import json
+
 import django_filters
 from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.renderers import JSONRenderer
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.filters import OrderingFilter
@@ -7,6 +10,9 @@ from django_filters.rest_framework import DjangoFilterBackend, FilterSet
 
 from .models import Errata
 from .serializers import ErrataSerializer
+from .summary import get_summary
+from .uploads import (UploadTooLarge, claim_upload_put, create_upload, get_backend,
+                      load_upload, max_upload_size, release_upload_put)
 
 
 class JSONResponse(HttpResponse):
@@ -20,8 +26,8 @@ class JSONResponse(HttpResponse):
 
 
 class ErrataFilter(FilterSet):
-    book_title = django_filters.CharFilter(name='book__title')
-    book_id = django_filters.CharFilter(name='book__id')
+    book_title = django_filters.CharFilter(name='book_title')
+    book_id = django_filters.CharFilter(name='book_id')
 
     class Meta:
         model = Errata
@@ -35,3 +41,63 @@ class ErrataView(ModelViewSet):
     filter_backends = (DjangoFilterBackend, OrderingFilter)
     filter_class = ErrataFilter
     ordering_fields = ('id', 'resolution_date', 'created', 'modified', )
+
+
+def errata_summary(request):
+    book_id = request.GET.get('book_id')
+    if book_id is not None and not book_id.isdigit():
+        return JSONResponse({'error': 'book_id must be an integer'}, status=400)
+    return JSONResponse(get_summary(int(book_id) if book_id else None))
+
+
+@csrf_exempt
+def direct_upload(request):
+    """
+    Issue a signed upload target for an errata attachment. The client PUTs
+    the file to the returned url and sends the token as file_1_upload or
+    file_2_upload when creating the erratum.
+    """
+    if request.method != 'POST':
+        return JSONResponse({'error': 'method not allowed'}, status=405)
+    try:
+        data = json.loads(request.body.decode('utf-8'))
+        upload, token, target = create_upload(str(data['filename']),
+                                              str(data['content_type']),
+                                              int(data['size']))
+    except (KeyError, TypeError):
+        return JSONResponse({'error': 'filename, content_type and size are required'}, status=400)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status=400)
+    return JSONResponse({'token': token, 'upload': target}, status=201)
+
+
+@csrf_exempt
+def direct_upload_put(request, token):
+    """
+    Receives uploads for errata.uploads.FileSystemUploadBackend.
+    """
+    if request.method != 'PUT':
+        return JSONResponse({'error': 'method not allowed'}, status=405)
+    backend = get_backend()
+    if not hasattr(backend, 'receive'):
+        return JSONResponse({'error': 'uploads go directly to storage'}, status=404)
+    try:
+        upload = load_upload(token)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status=403)
+    if request.META.get('CONTENT_TYPE', '').split(';')[0] != upload.content_type:
+        return JSONResponse({'error': 'content type does not match the upload'}, status=400)
+    if int(request.META.get('CONTENT_LENGTH') or 0) > max_upload_size():
+        return JSONResponse({'error': 'file is too large'}, status=413)
+    if not claim_upload_put(upload):
+        return JSONResponse({'error': 'file has already been uploaded'}, status=403)
+    try:
+        # streamed, request.body is capped at DATA_UPLOAD_MAX_MEMORY_SIZE
+        backend.receive(upload, request)
+    except UploadTooLarge as e:
+        release_upload_put(upload)
+        return JSONResponse({'error': str(e)}, status=413)
+    except Exception:
+        release_upload_put(upload)
+        raise
+    return HttpResponse(status=200)
@@ -1,6 +1,10 @@
+from django.template.loader import render_to_string
 from wagtail.contrib.modeladmin.options import (
     ModelAdmin, ModelAdminGroup, modeladmin_register)
-from .models import Errata
+from wagtail.wagtailcore import hooks
+
+from .models import Errata, ERRATA_STATUS, TOTAL
+from .summary import get_summary
 
 
 class ErrataAdmin(ModelAdmin):
@@ -20,3 +24,28 @@ class ErrataAdminGroup(ModelAdminGroup):
 
 # Now you just need to register your customised ModelAdmin class with Wagtail
 #modeladmin_register(ErrataAdminGroup)
+
+
+class ErrataSummaryPanel(object):
+    name = 'errata_summary'
+    order = 150
+
+    def __init__(self, request):
+        self.request = request
+
+    def render(self):
+        summary = get_summary()
+        statuses = summary['totals'].get('status', {})
+        books = sorted(summary['books'], key=lambda book: -book.get('status', {}).get('New', 0))
+        return render_to_string('errata/summary_panel.html', {
+            'total': summary['totals'].get(TOTAL, 0),
+            'statuses': [(label, statuses.get(value, 0)) for value, label in ERRATA_STATUS],
+            'books': [(book['title'], book.get('status', {}).get('New', 0), book[TOTAL])
+                      for book in books[:10]],
+        }, request=self.request)
+
+
+@hooks.register('construct_homepage_panels')
+def add_errata_summary_panel(request, panels):
+    if request.user.has_perm('errata.change_errata'):
+        panels.append(ErrataSummaryPanel(request))
@@ -1,8 +1,56 @@
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save
 from django.utils.translation import ugettext_lazy as _
 from django.contrib.admin.filters import FieldListFilter
 from django.db.models.fields import IntegerField, AutoField
 from django.db.models.fields.related import OneToOneField, ForeignKey
 
+from openstax.caches import shared_cache
+
+CHOICES_CACHE_KEY = 'admin_filter_choices:{}'
+CHOICES_CACHE_TIMEOUT = 60 * 60
+
+_cached_models = set()
+
+
+def _choices_cache_key(related_model):
+    return CHOICES_CACHE_KEY.format(related_model._meta.label_lower)
+
+
+def _invalidate_choices(sender, **kwargs):
+    cache = shared_cache()
+    if cache is not None:
+        cache.delete(_choices_cache_key(sender))
+
+
+def cache_choices_of(related_model):
+    """
+    Let filters on fields pointing at related_model keep their choices in
+    the shared cache. The cached list is dropped whenever an object of
+    related_model is saved (eg. a book is published) or deleted. Call it at
+    import time (eg. from an admin module) so every process invalidates.
+    """
+    dispatch_uid = 'invalidate_{}'.format(_choices_cache_key(related_model))
+    post_save.connect(_invalidate_choices, sender=related_model, dispatch_uid=dispatch_uid)
+    post_delete.connect(_invalidate_choices, sender=related_model, dispatch_uid=dispatch_uid)
+    _cached_models.add(related_model)
+
+
+def cached_choices(field):
+    """
+    Return field.get_choices(), from the shared cache when the related model
+    was registered with cache_choices_of and a shared cache is configured.
+    """
+    related_model = field.rel.to
+    cache = shared_cache() if related_model in _cached_models else None
+    key = _choices_cache_key(related_model)
+    choices = cache.get(key) if cache is not None else None
+    if choices is None:
+        choices = [(pk, str(display)) for pk, display in field.get_choices(include_blank=False)]
+        if cache is not None:
+            cache.set(key, choices, CHOICES_CACHE_TIMEOUT)
+    return choices
+
 
 class MultipleSelectFieldListFilter(FieldListFilter):
 
@@ -10,10 +58,18 @@ class MultipleSelectFieldListFilter(FieldListFilter):
         self.lookup_kwarg = '%s_filter' % field_path
         self.filter_statement = '%s__id' % field_path
         self.lookup_val = request.GET.get(self.lookup_kwarg, None)
-        self.lookup_choices = field.get_choices(include_blank=False)
+        self._lookup_choices = None
+        self._values = None
         super(MultipleSelectFieldListFilter, self).__init__(
             field, request, params, model, model_admin, field_path)
 
+    @property
+    def lookup_choices(self):
+        # only loaded when the sidebar is rendered, not when filtering
+        if self._lookup_choices is None:
+            self._lookup_choices = cached_choices(self.field)
+        return self._lookup_choices
+
     def expected_parameters(self):
         return [self.lookup_kwarg]
 
@@ -21,6 +77,8 @@ class MultipleSelectFieldListFilter(FieldListFilter):
         """
         Returns a list of values to filter on.
         """
+        if self._values is not None:
+            return self._values
         values = []
         value = self.used_parameters.get(self.lookup_kwarg, None)
         if value:
@@ -28,11 +86,15 @@ class MultipleSelectFieldListFilter(FieldListFilter):
         # convert to integers if IntegerField
         if type(self.field.rel.to._meta.pk) in [IntegerField, AutoField, OneToOneField, ForeignKey]:
             values = [int(x) for x in values]
+        self._values = values
         return values
 
     def queryset(self, request, queryset):
         raise NotImplementedError
 
+    def choice_display(self, pk_val, val):
+        return val
+
     def choices(self, cl):
         yield {
             'selected': self.lookup_val is None,
@@ -40,9 +102,10 @@ class MultipleSelectFieldListFilter(FieldListFilter):
                 [self.lookup_kwarg]),
             'display': _('All')
         }
+        selected_values = set(self.values())
         for pk_val, val in self.lookup_choices:
-            selected = pk_val in self.values()
-            pk_list = set(self.values())
+            selected = pk_val in selected_values
+            pk_list = set(selected_values)
             if selected:
                 pk_list.remove(pk_val)
             else:
@@ -57,7 +120,7 @@ class MultipleSelectFieldListFilter(FieldListFilter):
             yield {
                 'selected': selected,
                 'query_string': query_string,
-                'display': val,
+                'display': self.choice_display(pk_val, val),
             }
 
 
@@ -78,3 +141,22 @@ class UnionFieldListFilter(MultipleSelectFieldListFilter):
             return queryset.filter(**filter_dct)
         else:
             return queryset
+
+
+class CountedUnionFieldListFilter(UnionFieldListFilter):
+    """
+    UnionFieldListFilter that shows how many objects match each choice.
+    get_counts runs a grouped query over the whole table on every render,
+    subclasses for large tables should read precomputed counts instead.
+    """
+
+    def get_counts(self, cl):
+        rows = cl.root_queryset.order_by().values(self.field_path).annotate(count=Count('pk'))
+        return dict((row[self.field_path], row['count']) for row in rows)
+
+    def choices(self, cl):
+        self.counts = self.get_counts(cl)
+        return super(CountedUnionFieldListFilter, self).choices(cl)
+
+    def choice_display(self, pk_val, val):
+        return '{} ({})'.format(val, self.counts.get(pk_val, 0))
@@ -0,0 +1,89 @@
+import json
+
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models.query import QuerySet
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that avoids an exact COUNT(*) over large tables on Postgres.
+
+    Unfiltered querysets are counted from pg_class.reltuples and filtered
+    ones from the planner's row estimate. When the estimate is below
+    `threshold` the rows are counted exactly, but never more than
+    `threshold` of them, so a bad estimate can't cause a full scan.
+    """
+    threshold = 10000
+    # True when count is an estimate rather than the number of rows
+    is_estimate = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return super(EstimatedCountPaginator, self).count
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return super(EstimatedCountPaginator, self).count
+
+        estimate = self.estimate(queryset, connection)
+        if estimate is not None and estimate >= self.threshold:
+            self.is_estimate = True
+            return estimate
+
+        count = queryset.order_by()[:self.threshold + 1].count()
+        if count > self.threshold:
+            self.is_estimate = True
+            return max(estimate or 0, count)
+        return count
+
+    def validate_number(self, number):
+        """
+        With an estimated count, pages past the estimate may still hold rows
+        (the planner underestimated), so they are sliced rather than refused.
+        """
+        self.count
+        if not self.is_estimate:
+            return super(EstimatedCountPaginator, self).validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.is_estimate:
+            return super(EstimatedCountPaginator, self).page(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(self.object_list[bottom:bottom + self.per_page], number, self)
+
+    def estimate(self, queryset, connection):
+        with connection.cursor() as cursor:
+            if not queryset.query.where and not queryset.query.distinct:
+                cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                               [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+                if row and row[0] > 0:
+                    return int(row[0])
+                return None
+
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountAdminMixin(object):
+    """
+    ModelAdmin mixin for changelists over large tables: estimated page
+    counts and no second count for the unfiltered "(N total)" link.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
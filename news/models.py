@@ -16,7 +16,7 @@ from wagtail.wagtaildocs.blocks import DocumentChooserBlock
 from modelcluster.fields import ParentalKey
 from modelcluster.contrib.taggit import ClusterTaggableManager
 from taggit.models import TaggedItemBase
-from openstax.functions import build_image_url
+from openstax.functions import build_image_url, build_image_srcset, get_rendition_urls
 
 
 class PullQuoteBlock(StructBlock):
@@ -74,7 +74,8 @@ class NewsIndex(Page):
 
     @property
     def articles(self):
-        articles = NewsArticle.objects.live().child_of(self)
+        articles = NewsArticle.objects.live().child_of(self).select_related('featured_image')
+        srcsets = get_rendition_urls([article.featured_image for article in articles])
         article_data = {}
         for article in articles:
             article_data['news/{}'.format(article.slug)] = {
@@ -83,6 +84,7 @@ class NewsIndex(Page):
                 'subheading': article.subheading,
                 'pin_to_top': article.pin_to_top,
                 'article_image': article.article_image,
+                'article_image_srcset': srcsets.get(article.featured_image_id),
                 'author': article.author,
                 'tags': [tag.name for tag in article.tags.all()],
             }
@@ -128,6 +130,10 @@ class NewsArticle(Page):
         return build_image_url(self.featured_image)
     article_image = property(get_article_image)
 
+    def get_article_image_srcset(self):
+        return build_image_srcset(self.featured_image)
+    article_image_srcset = property(get_article_image_srcset)
+
     tags = ClusterTaggableManager(through=NewsArticleTag, blank=True)
     body = RichTextField(blank=True)
 
@@ -159,6 +165,7 @@ class NewsArticle(Page):
         'subheading',
         'author',
         'article_image',
+        'article_image_srcset',
         'tags',
         'body',
         'pin_to_top',
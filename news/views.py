@@ -1,6 +1,7 @@
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.renderers import JSONRenderer
+from openstax.prefetch import prefetch_stream_fields
 from .models import NewsIndex, NewsArticle
 from .serializers import NewsIndexSerializer, NewsArticleSerializer
 
@@ -30,6 +31,7 @@ def news_detail(request, slug):
 
     try:
         page = NewsArticle.objects.get(slug=slug)
+        prefetch_stream_fields(page)
         serializer = NewsArticleSerializer(page)
         return JSONResponse(serializer.data)
     except NewsArticle.DoesNotExist:
@@ -1,8 +1,36 @@
+import json
+
+from django.conf import settings
+from django.conf.urls import url
+from django.http import HttpRequest, JsonResponse, QueryDict
+from django.urls import Resolver404, resolve
+from django.views.decorators.csrf import csrf_exempt
 from wagtail.api.v2.endpoints import PagesAPIEndpoint
 from wagtail.api.v2.router import WagtailAPIRouter
+from wagtail.api.v2.utils import BadRequestError, page_models_from_string
 from wagtail.wagtailimages.api.v2.endpoints import ImagesAPIEndpoint
 from wagtail.wagtaildocs.api.v2.endpoints import DocumentsAPIEndpoint
 
+
+class OpenStaxPagesAPIEndpoint(PagesAPIEndpoint):
+    """
+    Pages endpoint that applies a page model's `api_prefetch_related` to the
+    listing queryset when the request is filtered by ?type=, so fields like
+    ally_subject_list don't run a query per page.
+    """
+    def get_queryset(self):
+        queryset = super(OpenStaxPagesAPIEndpoint, self).get_queryset()
+        try:
+            models = page_models_from_string(self.request.GET.get('type', 'wagtailcore.Page'))
+        except (LookupError, ValueError):
+            return queryset
+        if len(models) == 1:
+            prefetch = getattr(models[0], 'api_prefetch_related', ())
+            if prefetch:
+                queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
 # Create the router. "wagtailapi" is the URL namespace
 api_router = WagtailAPIRouter('wagtailapi')
 
@@ -10,6 +38,88 @@ api_router = WagtailAPIRouter('wagtailapi')
 # The first parameter is the name of the endpoint (eg. pages, images). This
 # is used in the URL of the endpoint
 # The second parameter is the endpoint class that handles the requests
-api_router.register_endpoint('pages', PagesAPIEndpoint)
+api_router.register_endpoint('pages', OpenStaxPagesAPIEndpoint)
 api_router.register_endpoint('images', ImagesAPIEndpoint)
-api_router.register_endpoint('documents', DocumentsAPIEndpoint)
\ No newline at end of file
+api_router.register_endpoint('documents', DocumentsAPIEndpoint)
+
+
+class APIURLConf(object):
+    """
+    URLconf holding only the router's endpoints, batch queries are resolved
+    against it.
+    """
+    urlpatterns = [url(r'^', api_router.urls)]
+
+
+def _resolve_query(query):
+    """
+    Resolve a batch query such as "pages/?type=allies.Ally&fields=title" or
+    "pages/12/" to (ResolverMatch of a listing or detail view, query string).
+    """
+    path, _, query_string = query.partition('?')
+    try:
+        match = resolve('/{}/'.format(path.strip('/')), urlconf=APIURLConf)
+    except Resolver404:
+        match = None
+    if match is None or match.url_name not in ('listing', 'detail'):
+        raise BadRequestError("unknown endpoint in query '{}'".format(query))
+    return match, query_string
+
+
+def _subrequest(request, query_string):
+    """
+    Build a GET request for one batch query that shares the site, user and
+    router of the batch request, so they are only looked up once.
+    """
+    subrequest = HttpRequest()
+    subrequest.method = 'GET'
+    subrequest.path = request.path
+    subrequest.path_info = request.path_info
+    subrequest.META = request.META.copy()
+    subrequest.META['REQUEST_METHOD'] = 'GET'
+    subrequest.META['QUERY_STRING'] = query_string
+    subrequest.GET = QueryDict(query_string)
+    subrequest.COOKIES = request.COOKIES
+    subrequest.site = getattr(request, 'site', None)
+    subrequest.user = getattr(request, 'user', None)
+    subrequest._dont_enforce_csrf_checks = True
+    subrequest.wagtailapi_router = api_router
+    return subrequest
+
+
+@csrf_exempt
+def batch(request):
+    """
+    Run several v2 API queries in one request.
+
+    GET /api/v2/batch/?q=pages/?type=allies.Ally%26fields=title&q=images/4/
+    POST /api/v2/batch/ with a JSON body of {"queries": ["pages/?type=...", ...]}
+
+    Results are returned in the order the queries were given.
+    """
+    if request.method == 'POST':
+        try:
+            queries = json.loads(request.body.decode('utf-8'))['queries']
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse({'message': "body must be JSON with a 'queries' list"}, status=400)
+    else:
+        queries = request.GET.getlist('q')
+
+    limit = getattr(settings, 'WAGTAILAPI_BATCH_LIMIT', 20)
+    if not isinstance(queries, list) or not queries:
+        return JsonResponse({'message': "no queries given"}, status=400)
+    if len(queries) > limit:
+        return JsonResponse({'message': "at most {} queries per batch".format(limit)}, status=400)
+
+    results = []
+    for query in queries:
+        try:
+            match, query_string = _resolve_query(str(query))
+        except BadRequestError as e:
+            results.append({'query': query, 'status': 400, 'data': {'message': str(e)}})
+            continue
+
+        response = match.func(_subrequest(request, query_string), *match.args, **match.kwargs)
+        results.append({'query': query, 'status': response.status_code, 'data': response.data})
+
+    return JsonResponse({'results': results})
@@ -0,0 +1,174 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import request_finished
+from django.db import connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('hits', 'misses', 'invalidations')
+KEY_PREFIX = 'cachalot_stats'
+TABLES_KEY = '{}:tables'.format(KEY_PREFIX)
+
+# install() wraps a private cachalot function, only for versions it was
+# checked against (requirements/base.txt pins the same one)
+SUPPORTED_CACHALOT_VERSIONS = ('1.4.1', )
+
+_lock = threading.Lock()
+_table_names = {}
+_counters = defaultdict(lambda: dict.fromkeys(KINDS, 0))
+_last_flush = [time.time()]
+_installed = []
+
+
+def record(tables, kind, count=1):
+    with _lock:
+        for table in tables:
+            _counters[table][kind] += count
+
+
+def local_stats():
+    """
+    Counters recorded by this process since the last flush.
+    """
+    with _lock:
+        return dict((table, dict(counts)) for table, counts in _counters.items())
+
+
+def reset_local():
+    with _lock:
+        _counters.clear()
+
+
+def _stats_cache():
+    return caches[getattr(settings, 'CACHALOT_STATS_CACHE', 'default')]
+
+
+def _key(table, kind):
+    return '{}:{}:{}'.format(KEY_PREFIX, table, kind)
+
+
+def flush():
+    """
+    Add this process' counters to the totals in CACHALOT_STATS_CACHE.
+    """
+    with _lock:
+        pending = dict((table, dict(counts)) for table, counts in _counters.items())
+        _counters.clear()
+        _last_flush[0] = time.time()
+    if not pending:
+        return
+
+    cache = _stats_cache()
+    tables = set(cache.get(TABLES_KEY) or ())
+    if not set(pending) <= tables:
+        cache.set(TABLES_KEY, sorted(tables | set(pending)), None)
+    for table, counts in pending.items():
+        for kind, count in counts.items():
+            if not count:
+                continue
+            key = _key(table, kind)
+            cache.add(key, 0, None)
+            try:
+                cache.incr(key, count)
+            except ValueError:
+                # evicted between add() and incr()
+                cache.set(key, count, None)
+
+
+def get_stats():
+    """
+    Totals per table as {table: {'hits', 'misses', 'invalidations', 'hit_rate'}}.
+    """
+    cache = _stats_cache()
+    tables = cache.get(TABLES_KEY) or ()
+    values = cache.get_many([_key(table, kind) for table in tables for kind in KINDS])
+    stats = {}
+    for table in tables:
+        counts = dict((kind, values.get(_key(table, kind), 0)) for kind in KINDS)
+        counts['hit_rate'] = hit_rate(counts)
+        stats[table] = counts
+    return stats
+
+
+def reset_stats():
+    cache = _stats_cache()
+    tables = cache.get(TABLES_KEY) or ()
+    cache.delete_many([_key(table, kind) for table in tables for kind in KINDS] + [TABLES_KEY])
+    reset_local()
+
+
+def hit_rate(counts):
+    reads = counts['hits'] + counts['misses']
+    return round(float(counts['hits']) / reads, 3) if reads else None
+
+
+def _flush_if_due(**kwargs):
+    if time.time() - _last_flush[0] >= getattr(settings, 'CACHALOT_STATS_FLUSH_INTERVAL', 30):
+        flush()
+
+
+def _count_invalidation(sender, **kwargs):
+    record([sender], 'invalidations')
+
+
+def table_names(table_cache_keys):
+    """
+    Map cachalot's table cache keys back to table names, using the
+    configured CACHALOT_TABLE_KEYGEN on every model table of every database.
+    """
+    if not _table_names:
+        from cachalot.settings import cachalot_settings
+        keygen = import_string(cachalot_settings.CACHALOT_TABLE_KEYGEN)
+        names = {}
+        for alias in settings.DATABASES:
+            for table in connections[alias].introspection.django_table_names():
+                names[keygen(alias, table)] = table
+        _table_names.update(names)
+    return [_table_names[key] for key in table_cache_keys if key in _table_names]
+
+
+def install():
+    """
+    Count every cacheable query as a hit or miss for each table it reads,
+    and count invalidations from cachalot's post_invalidation signal.
+    Counters are flushed to CACHALOT_STATS_CACHE at most every
+    CACHALOT_STATS_FLUSH_INTERVAL seconds.
+
+    cachalot has no hook for cache lookups, so its lookup function is
+    wrapped. The original is called unchanged; a query it had to run is a
+    miss, any other a hit.
+    """
+    if _installed:
+        return
+    import cachalot
+    from cachalot import monkey_patch
+    from cachalot.signals import post_invalidation
+
+    if cachalot.__version__ not in SUPPORTED_CACHALOT_VERSIONS:
+        logger.warning("cachalot %s isn't supported by cache_stats, hits and misses "
+                       "aren't counted", cachalot.__version__)
+    else:
+        get_result_or_execute_query = monkey_patch._get_result_or_execute_query
+
+        def counted(execute_query_func, cache, cache_key, table_cache_keys):
+            executed = []
+
+            def execute():
+                executed.append(True)
+                return execute_query_func()
+
+            result = get_result_or_execute_query(execute, cache, cache_key, table_cache_keys)
+            record(table_names(table_cache_keys), 'misses' if executed else 'hits')
+            return result
+
+        monkey_patch._get_result_or_execute_query = counted
+
+    post_invalidation.connect(_count_invalidation, dispatch_uid='cachalot_stats_invalidation')
+    request_finished.connect(_flush_if_due, dispatch_uid='cachalot_stats_flush')
+    _installed.append(True)
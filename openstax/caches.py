@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_shared(cache):
+    """
+    False for caches that only live in this process (or keep nothing), which
+    can't hold state every worker has to agree on.
+    """
+    return not isinstance(cache, (LocMemCache, DummyCache))
+
+
+def shared_cache():
+    """
+    The cache named by SHARED_CACHE_ALIAS, or None when no cache shared by
+    every process is configured.
+    """
+    alias = getattr(settings, 'SHARED_CACHE_ALIAS', None)
+    if alias is None:
+        return None
+    cache = caches[alias]
+    return cache if is_shared(cache) else None
@@ -1,10 +1,34 @@
 from django.conf import settings
+from django.core.files.storage import get_storage_class
 from storages.backends.s3boto import S3BotoStorage
 
+from .static_sync import HashedManifestMixin
+
 
 class StaticStorage(S3BotoStorage):
     location = settings.STATICFILES_LOCATION
 
 
+class CachedStaticStorage(HashedManifestMixin, StaticStorage):
+    """
+    Static storage that keeps a local copy of everything it uploads, so
+    django-compressor can read source files and its offline manifest from
+    disk instead of S3. Urls point at the hashed copies made by sync_static.
+    """
+    def __init__(self, *args, **kwargs):
+        super(CachedStaticStorage, self).__init__(*args, **kwargs)
+        self.local_storage = get_storage_class('compressor.storage.CompressorFileStorage')()
+
+    def save(self, name, content, max_length=None):
+        name = self.local_storage._save(name, content)
+        super(CachedStaticStorage, self).save(name, self.local_storage._open(name), max_length)
+        return name
+
+    def _open(self, name, mode='rb'):
+        if self.local_storage.exists(name):
+            return self.local_storage._open(name, mode)
+        return super(CachedStaticStorage, self)._open(name, mode)
+
+
 class MediaStorage(S3BotoStorage):
     location = settings.MEDIAFILES_LOCATION
@@ -0,0 +1,210 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.deprecation import MiddlewareMixin
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_state = threading.local()
+_lag_checks = {}
+_reinvalidation = {'tables': set(), 'timer': None}
+_reinvalidation_lock = threading.Lock()
+
+
+def replica_alias():
+    return getattr(settings, 'REPLICA_DATABASE_ALIAS', 'replica')
+
+
+def get_read_alias():
+    return getattr(_state, 'alias', None)
+
+
+def set_read_alias(alias):
+    _state.alias = alias
+    _state.wrote = False
+
+
+def clear_read_alias():
+    _state.alias = None
+    _state.wrote = False
+
+
+def reset_lag_checks():
+    _lag_checks.clear()
+
+
+def replica_lag(alias):
+    """
+    Seconds the replica is behind the primary. 0 when it has replayed
+    everything it received, or when the database isn't a postgres standby.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0
+    with connection.cursor() as cursor:
+        if connection.pg_version >= 100000:
+            received, replayed = 'pg_last_wal_receive_lsn()', 'pg_last_wal_replay_lsn()'
+        else:
+            received, replayed = 'pg_last_xlog_receive_location()', 'pg_last_xlog_replay_location()'
+        cursor.execute(
+            "SELECT CASE WHEN NOT pg_is_in_recovery() OR {} = {} THEN 0 "
+            "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END".format(
+                received, replayed))
+        lag = cursor.fetchone()[0]
+    return float(lag or 0)
+
+
+def replica_available():
+    """
+    True when the replica alias is configured and is no more than
+    REPLICA_MAX_LAG seconds behind. The result is kept for
+    REPLICA_LAG_CHECK_INTERVAL seconds so the check isn't run per request.
+    """
+    alias = replica_alias()
+    if alias not in settings.DATABASES:
+        return False
+
+    now = time.time()
+    checked = _lag_checks.get(alias)
+    if checked and now - checked[0] < getattr(settings, 'REPLICA_LAG_CHECK_INTERVAL', 5):
+        return checked[1]
+
+    try:
+        available = replica_lag(alias) <= getattr(settings, 'REPLICA_MAX_LAG', 5)
+    except DatabaseError:
+        logger.warning("replica %s is unreachable, reading from the primary", alias,
+                       exc_info=True)
+        available = False
+    if not available:
+        logger.warning("replica %s is lagging, reading from the primary", alias)
+    _lag_checks[alias] = (now, available)
+    return available
+
+
+def cachalot_table_key(db_alias, table):
+    """
+    CACHALOT_TABLE_KEYGEN that gives replica tables the primary's keys, so
+    a write to the primary also invalidates queries cached from the replica.
+    """
+    from cachalot.utils import get_table_cache_key
+    if db_alias == replica_alias():
+        db_alias = DEFAULT_DB_ALIAS
+    return get_table_cache_key(db_alias, table)
+
+
+def _reinvalidate():
+    from cachalot.api import invalidate
+    with _reinvalidation_lock:
+        tables = sorted(_reinvalidation['tables'])
+        _reinvalidation['tables'].clear()
+        _reinvalidation['timer'] = None
+    _state.reinvalidating = True
+    try:
+        invalidate(*tables, db_alias=DEFAULT_DB_ALIAS)
+    finally:
+        _state.reinvalidating = False
+
+
+def reinvalidate_after_lag(sender, db_alias, **kwargs):
+    """
+    A replica read made before the replica replays a write can cache the old
+    rows after the write invalidated them. Invalidate the written tables
+    again once the replica is either caught up or no longer used
+    (REPLICA_MAX_LAG + REPLICA_LAG_CHECK_INTERVAL seconds later).
+    """
+    alias = replica_alias()
+    if db_alias != DEFAULT_DB_ALIAS or alias == DEFAULT_DB_ALIAS or \
+            alias not in settings.DATABASES or getattr(_state, 'reinvalidating', False):
+        return
+    with _reinvalidation_lock:
+        _reinvalidation['tables'].add(sender)
+        if _reinvalidation['timer'] is None:
+            timer = threading.Timer(getattr(settings, 'REPLICA_MAX_LAG', 5) +
+                                    getattr(settings, 'REPLICA_LAG_CHECK_INTERVAL', 5),
+                                    _reinvalidate)
+            timer.daemon = True
+            _reinvalidation['timer'] = timer
+            timer.start()
+
+
+def _connect_cachalot():
+    try:
+        from cachalot.signals import post_invalidation
+    except ImportError:
+        return
+    post_invalidation.connect(reinvalidate_after_lag, dispatch_uid='replica_reinvalidation')
+
+
+_connect_cachalot()
+
+
+def _primary_only(model):
+    return model is not None and \
+        model._meta.app_label in getattr(settings, 'REPLICA_EXCLUDED_APPS', ('sessions',))
+
+
+def _primary_path(path):
+    return path.startswith(tuple(getattr(settings, 'REPLICA_PRIMARY_PATHS', ())))
+
+
+class ReplicaRouter(object):
+    """
+    Sends reads to the replica chosen by ReplicaMiddleware for the current
+    request. Once the request writes anything, the rest of it reads from the
+    primary so it sees its own writes, and ReplicaMiddleware pins the client
+    to the primary.
+    """
+    def db_for_read(self, model, **hints):
+        alias = get_read_alias()
+        if alias is None or _primary_only(model):
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        if not _primary_only(model):
+            _state.alias = None
+            _state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != replica_alias()
+
+
+class ReplicaMiddleware(MiddlewareMixin):
+    """
+    Routes reads for safe-method requests under REPLICA_READ_PATHS, except
+    REPLICA_PRIMARY_PATHS (views that write even on GET), to the replica.
+    After a request that wrote (eg. an editor publishing a page) the client
+    gets a cookie that keeps its reads on the primary for REPLICA_PIN_SECONDS.
+    """
+    def process_request(self, request):
+        clear_read_alias()
+        if request.method not in SAFE_METHODS:
+            return
+        if request.COOKIES.get(settings.REPLICA_PIN_COOKIE):
+            return
+        if not request.path.startswith(tuple(settings.REPLICA_READ_PATHS)) or \
+                _primary_path(request.path):
+            return
+        if replica_available():
+            set_read_alias(replica_alias())
+
+    def process_response(self, request, response):
+        wrote = getattr(_state, 'wrote', False)
+        clear_read_alias()
+        if wrote:
+            response.set_cookie(settings.REPLICA_PIN_COOKIE, '1',
+                                max_age=settings.REPLICA_PIN_SECONDS, httponly=True)
+        return response
+
+    def process_exception(self, request, exception):
+        clear_read_alias()
@@ -1,6 +1,8 @@
 from django.conf import settings
 from wagtail.wagtailcore.models import Site
 
+from .renditions import build_image_srcset, get_rendition_urls, sibling_srcset
+
 
 def build_document_url(url):
     if url:
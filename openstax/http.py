@@ -0,0 +1,139 @@
+import logging
+import random
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'connect_timeout': 3.05,
+    'read_timeout': 10,
+    'retries': 3,
+    'backoff_factor': 0.2,
+    'pool_maxsize': 10,
+}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+class JitteredRetry(Retry):
+    """
+    Retry with "full jitter": each backoff is a random time up to the
+    exponential delay, so clients retrying together spread out.
+    """
+    def get_backoff_time(self):
+        backoff = super(JitteredRetry, self).get_backoff_time()
+        return random.uniform(0, backoff)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter applying a default (connect, read) timeout to requests that
+    don't set their own.
+    """
+    def __init__(self, timeout, *args, **kwargs):
+        self.timeout = timeout
+        super(TimeoutHTTPAdapter, self).__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super(TimeoutHTTPAdapter, self).send(request, **kwargs)
+
+
+class MeteredSession(requests.Session):
+    """
+    Session that records the latency and outcome of each request under the
+    name of the service it talks to.
+    """
+    def __init__(self, service):
+        self.service = service
+        super(MeteredSession, self).__init__()
+
+    def request(self, method, url, *args, **kwargs):
+        start = time.time()
+        error = True
+        try:
+            response = super(MeteredSession, self).request(method, url, *args, **kwargs)
+            error = response.status_code >= 500
+            return response
+        finally:
+            record(self.service, time.time() - start, error)
+
+
+def service_config(service):
+    config = dict(DEFAULTS)
+    services = getattr(settings, 'HTTP_CLIENT', {})
+    config.update(services.get('default', {}))
+    config.update(services.get(service, {}))
+    return config
+
+
+def build_session(service):
+    config = service_config(service)
+    retry = JitteredRetry(total=config['retries'],
+                          connect=config['retries'],
+                          read=config['retries'],
+                          backoff_factor=config['backoff_factor'],
+                          status_forcelist=(502, 503, 504),
+                          raise_on_status=False)
+    adapter = TimeoutHTTPAdapter((config['connect_timeout'], config['read_timeout']),
+                                 max_retries=retry,
+                                 pool_connections=1,
+                                 pool_maxsize=config['pool_maxsize'])
+    session = MeteredSession(service)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session(service):
+    """
+    Return the shared keep-alive session for an outbound service (eg.
+    'accounts', 'cnx', 'salesforce'), configured from settings.HTTP_CLIENT.
+    Idempotent requests are retried on connection errors and 502/503/504.
+    """
+    session = _sessions.get(service)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(service)
+            if session is None:
+                session = _sessions[service] = build_session(service)
+    return session
+
+
+def reset_sessions():
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def record(service, duration, error=False):
+    with _stats_lock:
+        stats = _stats.setdefault(service, {'requests': 0, 'errors': 0, 'total_time': 0.0, 'max_time': 0.0})
+        stats['requests'] += 1
+        stats['errors'] += int(error)
+        stats['total_time'] += duration
+        stats['max_time'] = max(stats['max_time'], duration)
+    logger.debug('%s request took %.3fs%s', service, duration, ' (failed)' if error else '')
+
+
+def latency_stats():
+    """
+    Return {service: {requests, errors, total_time, max_time, avg_time}} for
+    this process.
+    """
+    with _stats_lock:
+        stats = dict((service, dict(values)) for service, values in _stats.items())
+    for values in stats.values():
+        values['avg_time'] = values['total_time'] / values['requests'] if values['requests'] else 0.0
+    return stats
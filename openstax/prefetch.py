@@ -0,0 +1,89 @@
+from wagtail.wagtailcore.blocks import (ChooserBlock, ListBlock, StreamBlock,
+                                        StreamValue, StructBlock, StructValue)
+from wagtail.wagtailcore.fields import StreamField
+
+
+def _collect_ids(block, raw, ids):
+    if raw is None:
+        return
+    if isinstance(block, ChooserBlock):
+        ids.setdefault(block.target_model, set()).add(raw)
+    elif isinstance(block, StructBlock):
+        for name, child_block in block.child_blocks.items():
+            if name in raw:
+                _collect_ids(child_block, raw[name], ids)
+    elif isinstance(block, ListBlock):
+        for item in raw:
+            _collect_ids(block.child_block, item, ids)
+    elif isinstance(block, StreamBlock):
+        for child in raw:
+            child_block = block.child_blocks.get(child['type'])
+            if child_block is not None:
+                _collect_ids(child_block, child.get('value'), ids)
+
+
+def _to_python(block, raw, objects):
+    """
+    Same as block.to_python(raw), except chooser blocks are resolved from
+    the preloaded `objects` map instead of one query each.
+    """
+    if isinstance(block, ChooserBlock):
+        if raw is None:
+            return None
+        return objects.get(block.target_model, {}).get(raw)
+    if isinstance(block, StructBlock):
+        return StructValue(block, [
+            (name, _to_python(child_block, raw[name], objects) if name in raw else child_block.get_default())
+            for name, child_block in block.child_blocks.items()
+        ])
+    if isinstance(block, ListBlock):
+        return [_to_python(block.child_block, item, objects) for item in raw]
+    if isinstance(block, StreamBlock):
+        value = block.to_python(raw)
+        _fill_stream_value(value, objects)
+        return value
+    return block.to_python(raw)
+
+
+def _fill_stream_value(value, objects):
+    # a lazy StreamValue keeps the raw JSON and converts each child on first
+    # access, we do the conversion up front with the preloaded objects
+    if not getattr(value, 'is_lazy', False):
+        return
+    for i, child in enumerate(value.stream_data):
+        if i in value._bound_blocks:
+            continue
+        child_block = value.stream_block.child_blocks[child['type']]
+        value._bound_blocks[i] = StreamValue.StreamChild(
+            child_block, _to_python(child_block, child['value'], objects), id=child.get('id'))
+
+
+def _stream_values(page):
+    for field in page._meta.fields:
+        if isinstance(field, StreamField):
+            value = getattr(page, field.name)
+            if getattr(value, 'is_lazy', False):
+                yield value
+
+
+def prefetch_stream_fields(*pages):
+    """
+    Resolve every image, document (or other chooser) referenced by the
+    StreamFields of `pages` with one in_bulk query per model, instead of one
+    query per chooser block when the stream is serialized.
+    """
+    values = [value for page in pages for value in _stream_values(page)]
+
+    ids = {}
+    for value in values:
+        for child in value.stream_data:
+            child_block = value.stream_block.child_blocks.get(child['type'])
+            if child_block is not None:
+                _collect_ids(child_block, child.get('value'), ids)
+
+    objects = {}
+    for model, pks in ids.items():
+        objects[model] = model.objects.in_bulk(list(pks))
+
+    for value in values:
+        _fill_stream_value(value, objects)
@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from modelcluster.fields import ParentalKey
+from wagtail.wagtailcore.models import Site
+from wagtail.wagtailimages.models import Image, Rendition
+
+from .background import run_in_background
+
+CACHE_KEY = 'image_renditions:{}'
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def rendition_specs():
+    """
+    (srcset name, wagtail filter spec) pairs pre-generated for every image.
+    """
+    return getattr(settings, 'IMAGE_RENDITIONS', ())
+
+
+def _rendition_url(rendition, site):
+    if site is None or site.port == 80:
+        return "{}{}".format(settings.MEDIA_URL, rendition.file)
+    else:
+        return "http://{}:{}{}".format(site.hostname, site.port, rendition.url)
+
+
+def get_rendition_urls(images):
+    """
+    Return {image pk: {srcset name: url}} for a list of images or image ids.
+
+    Maps are read from the cache in one call; images missing from the cache
+    are resolved with a single Rendition query for all of them. Renditions
+    that have not been generated yet are left out of the map.
+    """
+    image_ids = set(getattr(image, 'pk', image) for image in images if image)
+    keys = {CACHE_KEY.format(pk): pk for pk in image_ids}
+    cached = cache.get_many(list(keys))
+    result = {keys[key]: value for key, value in cached.items()}
+
+    missing = [pk for key, pk in keys.items() if key not in cached]
+    if missing:
+        specs = dict((spec, name) for name, spec in rendition_specs())
+        site = Site.objects.filter(is_default_site=True).first()
+        renditions = Rendition.objects.filter(
+            image_id__in=missing, filter_spec__in=list(specs)).order_by('id')
+        urls = {pk: {} for pk in missing}
+        for rendition in renditions:
+            urls[rendition.image_id][specs[rendition.filter_spec]] = _rendition_url(rendition, site)
+
+        complete = {}
+        for pk, value in urls.items():
+            result[pk] = value
+            if len(value) == len(specs):
+                complete[CACHE_KEY.format(pk)] = value
+        # only cache finished maps so new renditions show up once generated
+        cache.set_many(complete, CACHE_TIMEOUT)
+    return result
+
+
+def build_image_srcset(image):
+    if image:
+        return get_rendition_urls([image]).get(image.pk)
+    else:
+        return None
+
+
+def sibling_srcset(instance, image_id, lookup):
+    """
+    The srcset of image_id for an orderable (eg. a team member) serialized
+    with the rest of its parent's relation. The first call resolves the
+    image of every sibling, found with `lookup` (eg. 'image' or
+    'ally__logo_color'), in one batch and keeps the result on the parent, so
+    the relation costs one lookup instead of one per row.
+    """
+    if not image_id:
+        return None
+    parental_key = next(field for field in instance._meta.fields if isinstance(field, ParentalKey))
+    parent = getattr(instance, parental_key.name)
+    memo = parent.__dict__.setdefault('_sibling_srcsets', {})
+    key = (parental_key.remote_field.related_name, lookup)
+    if key not in memo or image_id not in memo[key]:
+        siblings = getattr(parent, key[0]).values_list(lookup, flat=True)
+        memo[key] = get_rendition_urls(list(siblings) + [image_id])
+    return memo[key].get(image_id)
+
+
+def generate_renditions(image_id):
+    try:
+        image = Image.objects.get(pk=image_id)
+    except Image.DoesNotExist:
+        return
+    for name, spec in rendition_specs():
+        image.get_rendition(spec)
+    cache.delete(CACHE_KEY.format(image_id))
+
+
+@receiver(post_save, sender=Image, dispatch_uid='generate_image_renditions')
+def queue_renditions(sender, instance, **kwargs):
+    cache.delete(CACHE_KEY.format(instance.pk))
+    run_in_background(generate_renditions, instance.pk)
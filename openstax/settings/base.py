@@ -21,6 +21,21 @@ DATABASES = {
     }
 }
 
+# Safe-method requests under REPLICA_READ_PATHS read from the 'replica'
+# database when one is configured and no more than REPLICA_MAX_LAG seconds
+# behind (see openstax/db_router.py). REPLICA_PRIMARY_PATHS are views that
+# write on GET and always use the primary. Clients that just wrote something
+# are kept on the primary for REPLICA_PIN_SECONDS.
+DATABASE_ROUTERS = ['openstax.db_router.ReplicaRouter']
+REPLICA_DATABASE_ALIAS = 'replica'
+REPLICA_READ_PATHS = ('/api/',)
+REPLICA_PRIMARY_PATHS = ('/api/user_salesforce/',)
+REPLICA_EXCLUDED_APPS = ('sessions',)
+REPLICA_MAX_LAG = 5
+REPLICA_LAG_CHECK_INTERVAL = 5
+REPLICA_PIN_COOKIE = 'read_primary'
+REPLICA_PIN_SECONDS = 30
+
 # Local time zone for this installation.
 TIME_ZONE = 'America/Chicago'
 
@@ -79,6 +94,7 @@ STATICFILES_FINDERS = [
 SECRET_KEY = 'wq21wtjo3@d_qfjvd-#td!%7gfy2updj2z+nev^k$iy%=m4_tr'
 
 MIDDLEWARE_CLASSES = [
+    'openstax.db_router.ReplicaMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -101,9 +117,7 @@ SOCIAL_AUTH_PIPELINE = (
     'social.pipeline.social_auth.social_user',
     #'accounts.pipelines.social_user',
     'social.pipeline.user.create_user',
-    'accounts.pipelines.save_profile',
-    'accounts.pipelines.update_email',
-    'accounts.pipelines.update_role',
+    'accounts.pipelines.sync_user',
     'social.pipeline.social_auth.associate_user',
     'social.pipeline.social_auth.load_extra_data',
     'social.pipeline.user.user_details',
@@ -182,6 +196,7 @@ INSTALLED_APPS = [
     'global_settings',
     'errata',
     'extraadminfilters',
+    'api',
     # wagtail
     'wagtail.wagtailcore',
     'wagtail.wagtailadmin',
@@ -208,6 +223,13 @@ INTERNAL_IPS = ('127.0.0.1', '10.0.2.2')
 COMPRESS_PRECOMPILERS = (
     ('text/x-scss', 'django_libsass.SassCompiler'),
 )
+COMPRESS_ENABLED = True
+# With COMPRESS_OFFLINE, `manage.py compress` compiles every {% compress %}
+# block ahead of time and writes CACHE/manifest.json under COMPRESS_ROOT;
+# requests only look blocks up in the manifest. Deployed environments turn
+# it on, locally Sass is compiled on request.
+COMPRESS_OFFLINE = False
+COMPRESS_ROOT = STATIC_ROOT
 
 #django rest framework settings
 REST_FRAMEWORK = {
@@ -271,6 +293,96 @@ LOGGING = {
 WAGTAIL_SITE_NAME = 'openstax'
 # Wagtail API number of results
 WAGTAILAPI_LIMIT_MAX = 250
+# Image sizes pre-generated on upload and returned as *_srcset maps by the API
+IMAGE_RENDITIONS = (
+    ('480w', 'width-480'),
+    ('960w', 'width-960'),
+    ('1920w', 'width-1920'),
+)
+
+# Maximum number of queries accepted by /api/v2/batch/
+WAGTAILAPI_BATCH_LIMIT = 20
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Cache alias shared by every process (eg. redis), used for state all
+# workers must agree on. None when there isn't one, see openstax/caches.py.
+SHARED_CACHE_ALIAS = None
+
+# With SESSION_ENGINE = 'accounts.session_backend' sessions are read from
+# the SESSION_CACHE_ALIAS cache and only written to the database when they
+# change or their expiry is within SESSION_DB_REFRESH seconds. It needs a
+# shared cache, so only production enables it.
+SESSION_CACHE_ALIAS = 'default'
+SESSION_DB_REFRESH = 60 * 60 * 24 * 7
+
+# Tables written too often for cachalot's whole-table invalidation to pay
+# off. CACHALOT_ONLY_CACHABLE_TABLES, when not empty, limits caching to the
+# listed tables instead.
+CACHALOT_UNCACHABLE_TABLES = frozenset((
+    'django_migrations',
+    'django_session',
+    'social_auth_usersocialauth',
+    'errata_errata',
+    'errata_erratanotification',
+    'errata_directupload',
+))
+CACHALOT_ONLY_CACHABLE_TABLES = frozenset()
+# Queries cached from the replica are invalidated by writes to the primary
+CACHALOT_TABLE_KEYGEN = 'openstax.db_router.cachalot_table_key'
+
+# Count cachalot hits, misses and invalidations per table (see
+# openstax/cache_stats.py). Each process adds its counters to
+# CACHALOT_STATS_CACHE at most every CACHALOT_STATS_FLUSH_INTERVAL seconds.
+CACHALOT_STATS_ENABLED = True
+CACHALOT_STATS_CACHE = 'default'
+CACHALOT_STATS_FLUSH_INTERVAL = 30
+
+# How /documents/<id>/<filename> is served (see books/documents.py):
+# 'serve' by Django with Range support, 'x-accel-redirect' / 'x-sendfile'
+# by nginx / apache, or 'redirect' to the storage url, signed for
+# CloudFront when CLOUDFRONT_KEY_PAIR_ID is set. Documents stored without a
+# local path are always redirected.
+DOCUMENT_SERVE_METHOD = 'serve'
+# nginx location marked `internal` that aliases MEDIA_ROOT
+DOCUMENT_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+CLOUDFRONT_KEY_PAIR_ID = None
+CLOUDFRONT_PRIVATE_KEY_PATH = None
+DOCUMENT_SIGNED_URL_EXPIRES = 60 * 60
+
+# Preload url patterns, page types, serializers and the queries behind
+# these urls when openstax.wsgi is imported (see openstax/warmup.py). Only
+# useful when the WSGI server imports the app before forking workers, eg.
+# gunicorn --preload. OPENSTAX_WARMUP=1/0 in the environment overrides it.
+WARMUP_ON_START = False
+WARMUP_URLS = (
+    '/api/books/',
+    '/api/news/',
+    '/api/v2/pages/',
+)
+
+# Keep the user's group names in their session (see accounts/groups.py).
+# Only takes effect with SHARED_CACHE_ALIAS, the version that invalidates
+# them is stored there.
+GROUP_CACHE_IN_SESSION = False
+
+# Outbound HTTP clients (see openstax/http.py). 'default' applies to every
+# service, other keys override it for one service.
+HTTP_CLIENT = {
+    'default': {
+        'connect_timeout': 3.05,
+        'read_timeout': 10,
+        'retries': 3,
+        'backoff_factor': 0.2,
+    },
+    'cnx': {
+        'read_timeout': 30,
+    },
+}
 
 # used in page.models to retrieve book information
 CNX_ARCHIVE_URL = 'http://archive.cnx.org'
@@ -278,6 +390,22 @@ CNX_ARCHIVE_URL = 'http://archive.cnx.org'
 # Server host (used to populate links in the email)
 HOST_LINK = 'https://openstax.org'
 
+# Static JSON snapshot of the content API (see api/snapshot.py)
+# written by `manage.py export_api_snapshot` and served by openstax.wsgi
+# when the database can't be reached
+API_SNAPSHOT_ROOT = os.path.join(PROJECT_ROOT, 'snapshot')
+API_SNAPSHOT_RETRY_AFTER = 30
+
+# Number of probable duplicates attached to a new erratum, and the minimum
+# trigram similarity of the detail text for a report to be considered
+ERRATA_DUPLICATE_CANDIDATES = 5
+ERRATA_DUPLICATE_THRESHOLD = 0.3
+
+# Errata attachments are uploaded straight to storage (see errata/uploads.py)
+ERRATA_UPLOAD_BACKEND = 'errata.uploads.FileSystemUploadBackend'
+ERRATA_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+ERRATA_UPLOAD_EXPIRES = 60 * 60
+
 try:
     from local import *
 except ImportError:
@@ -10,12 +10,40 @@ AWS_STORAGE_DIR = 'oscms-prodcms'
 AWS_S3_CUSTOM_DOMAIN = 'd3bxy9euw4e147.cloudfront.net'
 # S3 static file storage using custom backend
 STATICFILES_LOCATION = '{}/static'.format(AWS_STORAGE_DIR)
-STATICFILES_STORAGE = 'openstax.custom_storages.StaticStorage'
+STATICFILES_STORAGE = 'openstax.custom_storages.CachedStaticStorage'
 STATIC_URL = "https://%s/%s/static/" % (AWS_S3_CUSTOM_DOMAIN, AWS_STORAGE_DIR)
+# {% compress %} blocks are built at deploy time by `manage.py compress`
+COMPRESS_OFFLINE = True
+COMPRESS_STORAGE = STATICFILES_STORAGE
+COMPRESS_URL = STATIC_URL
 # S3 media storage using custom backend
 MEDIAFILES_LOCATION = '{}/media'.format(AWS_STORAGE_DIR)
 MEDIA_URL = "https://%s/%s/media/" % (AWS_S3_CUSTOM_DOMAIN, AWS_STORAGE_DIR)
 DEFAULT_FILE_STORAGE = 'openstax.custom_storages.MediaStorage'
+DOCUMENT_SERVE_METHOD = 'redirect'
+CLOUDFRONT_KEY_PAIR_ID = os.environ.get('CLOUDFRONT_KEY_PAIR_ID')
+CLOUDFRONT_PRIVATE_KEY_PATH = os.environ.get('CLOUDFRONT_PRIVATE_KEY_PATH')
+ERRATA_UPLOAD_BACKEND = 'errata.uploads.S3UploadBackend'
+
+# Read replica for API traffic
+if os.environ.get('DATABASE_REPLICA_HOST'):
+    DATABASES['replica'] = dict(DATABASES['default'],
+                                HOST=os.environ['DATABASE_REPLICA_HOST'],
+                                TEST={'MIRROR': 'default'})
+
+# Cache shared by every worker, for sessions and cross-process state
+CACHES['shared'] = {
+    'BACKEND': 'redis_cache.cache.RedisCache',
+    'LOCATION': os.environ.get('SHARED_REDIS_LOCATION', '127.0.0.1:6379:1'),
+    'OPTIONS': {
+        'CLIENT_CLASS': 'redis_cache.client.DefaultClient',
+    },
+}
+SHARED_CACHE_ALIAS = 'shared'
+SESSION_ENGINE = 'accounts.session_backend'
+SESSION_CACHE_ALIAS = 'shared'
+CACHALOT_STATS_CACHE = 'shared'
+GROUP_CACHE_IN_SESSION = True
 
 # Amazon SES Mail Settings
 DEFAULT_FROM_EMAIL = 'noreply@openstax.org'
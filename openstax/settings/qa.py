@@ -10,12 +10,20 @@ AWS_STORAGE_DIR = 'oscms-qa'
 AWS_S3_CUSTOM_DOMAIN = 'd3bxy9euw4e147.cloudfront.net'
 # S3 static file storage using custom backend
 STATICFILES_LOCATION = '{}/static'.format(AWS_STORAGE_DIR)
-STATICFILES_STORAGE = 'openstax.custom_storages.StaticStorage'
+STATICFILES_STORAGE = 'openstax.custom_storages.CachedStaticStorage'
 STATIC_URL = "https://%s/%s/static/" % (AWS_S3_CUSTOM_DOMAIN, AWS_STORAGE_DIR)
+# {% compress %} blocks are built at deploy time by `manage.py compress`
+COMPRESS_OFFLINE = True
+COMPRESS_STORAGE = STATICFILES_STORAGE
+COMPRESS_URL = STATIC_URL
 # S3 media storage using custom backend
 MEDIAFILES_LOCATION = '{}/media'.format(AWS_STORAGE_DIR)
 MEDIA_URL = "https://%s/%s/media/" % (AWS_S3_CUSTOM_DOMAIN, AWS_STORAGE_DIR)
 DEFAULT_FILE_STORAGE = 'openstax.custom_storages.MediaStorage'
+DOCUMENT_SERVE_METHOD = 'redirect'
+CLOUDFRONT_KEY_PAIR_ID = os.environ.get('CLOUDFRONT_KEY_PAIR_ID')
+CLOUDFRONT_PRIVATE_KEY_PATH = os.environ.get('CLOUDFRONT_PRIVATE_KEY_PATH')
+ERRATA_UPLOAD_BACKEND = 'errata.uploads.S3UploadBackend'
 
 # Openstax Accounts
 AUTHORIZATION_URL = 'https://accounts-qa.openstax.org/oauth/authorize'
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.staticfiles.finders import get_finders
+from django.core.files.base import ContentFile
+
+MANIFEST_NAME = 'staticfiles-sync.json'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+SHORT_CACHE_CONTROL = 'public, max-age=300'
+IGNORE_PATTERNS = ['CVS', '.*', '*~']
+
+
+def hashed_name(name, digest):
+    """
+    css/app.css -> css/app.0123456789ab.css
+    """
+    root, ext = os.path.splitext(name)
+    return '{}.{}{}'.format(root, digest[:12], ext)
+
+
+def file_hash(storage, path):
+    digest = hashlib.sha256()
+    with storage.open(path) as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_static_files():
+    """
+    {name: (path, storage)} for every file the staticfiles finders list,
+    the first finder to list a name wins, as with collectstatic.
+    """
+    found = {}
+    for finder in get_finders():
+        for path, storage in finder.list(IGNORE_PATTERNS):
+            prefix = getattr(storage, 'prefix', None)
+            name = os.path.join(prefix, path) if prefix else path
+            name = name.replace(os.sep, '/')
+            if name not in found:
+                found[name] = (path, storage)
+    return found
+
+
+def load_manifest(storage):
+    try:
+        with storage.open(MANIFEST_NAME) as f:
+            return json.loads(f.read().decode('utf-8'))
+    except (IOError, OSError, ValueError):
+        return {'files': {}}
+
+
+class HashedManifestMixin(object):
+    """
+    Storage mixin that serves the content-hashed copy uploaded by
+    sync_static when the manifest lists one, so urls can be cached forever.
+    """
+    _hashed_names = None
+
+    def hashed_names(self):
+        if self._hashed_names is None:
+            files = load_manifest(self).get('files', {})
+            self._hashed_names = dict((name, entry['hashed_name']) for name, entry in files.items())
+        return self._hashed_names
+
+    def url(self, name):
+        return super(HashedManifestMixin, self).url(self.hashed_names().get(name, name))
+
+
+class StaticSync(object):
+    """
+    Upload the static files that changed since the last sync.
+
+    Every file is hashed locally and compared with the manifest stored next
+    to the files. Changed files are uploaded under their own name and under
+    a content-hashed name, by a bounded pool of threads that each use their
+    own storage instance (boto connections can't be shared between threads).
+    """
+    def __init__(self, storage_class, workers=8):
+        self.storage_class = storage_class
+        self.workers = workers
+        self._local = threading.local()
+
+    def get_storage(self, cache_control):
+        storages = getattr(self._local, 'storages', None)
+        if storages is None:
+            storages = self._local.storages = {}
+        if cache_control not in storages:
+            storage = self.storage_class()
+            if hasattr(storage, 'headers'):
+                storage.headers = dict(storage.headers, **{'Cache-Control': cache_control})
+            storages[cache_control] = storage
+        return storages[cache_control]
+
+    def save(self, storage, name, content):
+        if not getattr(storage, 'file_overwrite', False) and storage.exists(name):
+            storage.delete(name)
+        storage.save(name, content)
+
+    def upload(self, name, path, source, digest):
+        with source.open(path) as f:
+            self.save(self.get_storage(SHORT_CACHE_CONTROL), name, f)
+            f.seek(0)
+            self.save(self.get_storage(IMMUTABLE_CACHE_CONTROL), hashed_name(name, digest), f)
+        return name
+
+    def run(self, force=False, dry_run=False):
+        started = time.time()
+        storage = self.get_storage(SHORT_CACHE_CONTROL)
+        previous = {} if force else load_manifest(storage).get('files', {})
+
+        files = {}
+        changed = []
+        for name, (path, source) in sorted(find_static_files().items()):
+            digest = file_hash(source, path)
+            files[name] = {'hash': digest, 'hashed_name': hashed_name(name, digest)}
+            if previous.get(name, {}).get('hash') != digest:
+                changed.append((name, path, source, digest))
+
+        if (changed or set(files) != set(previous)) and not dry_run:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                # list() re-raises the first failed upload
+                list(executor.map(lambda args: self.upload(*args), changed))
+            manifest = json.dumps({'files': files}, indent=2, sort_keys=True)
+            self.save(storage, MANIFEST_NAME, ContentFile(manifest.encode('utf-8')))
+
+        return {
+            'changed': [name for name, _, _, _ in changed],
+            'unchanged': len(files) - len(changed),
+            'seconds': time.time() - started,
+        }
@@ -1 +1,309 @@
-#write something to test redirects
\ No newline at end of file
+#write something to test redirects
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+import requests
+from django.contrib.auth.models import Group, User
+from django.core.files.storage import FileSystemStorage
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from wagtail.wagtailcore.models import Site
+
+from openstax.db_router import (ReplicaMiddleware, ReplicaRouter, clear_read_alias,
+                                get_read_alias, reset_lag_checks)
+from openstax.http import get_session, latency_stats, reset_sessions
+from openstax.static_sync import HashedManifestMixin, StaticSync
+from openstax.warmup import warm_up
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super(StubHandler, self).setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        if self.path == '/flaky' and self.server.failures > 0:
+            self.server.failures -= 1
+            return self.respond(503, {'error': 'unavailable'})
+        if self.path == '/slow':
+            time.sleep(1)
+        self.respond(200, {'path': self.path})
+
+    def respond(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    connections = 0
+    failures = 0
+
+
+@override_settings(HTTP_CLIENT={
+    'default': {'connect_timeout': 1, 'read_timeout': 2, 'retries': 2, 'backoff_factor': 0},
+    'slow': {'read_timeout': 0.2, 'retries': 0},
+})
+class HTTPClientTest(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(HTTPClientTest, cls).setUpClass()
+        cls.server = StubServer(('127.0.0.1', 0), StubHandler)
+        cls.url = 'http://127.0.0.1:{}'.format(cls.server.server_address[1])
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super(HTTPClientTest, cls).tearDownClass()
+
+    def setUp(self):
+        reset_sessions()
+        self.server.connections = 0
+
+    def test_connections_are_reused(self):
+        session = get_session('accounts')
+        for _ in range(3):
+            self.assertEqual(session.get(self.url + '/ok').json(), {'path': '/ok'})
+        self.assertEqual(self.server.connections, 1)
+
+    def test_retries_unavailable_responses(self):
+        self.server.failures = 2
+        response = get_session('cnx').get(self.url + '/flaky')
+        self.assertEqual(response.status_code, 200)
+
+    def test_default_read_timeout(self):
+        with self.assertRaises(requests.RequestException):
+            get_session('slow').get(self.url + '/slow')
+
+    def test_latency_is_recorded(self):
+        before = latency_stats().get('salesforce', {}).get('requests', 0)
+        get_session('salesforce').get(self.url + '/ok')
+        self.assertEqual(latency_stats()['salesforce']['requests'], before + 1)
+
+
+# 'default' stands in for the replica: it isn't a standby so its lag is 0
+@override_settings(REPLICA_DATABASE_ALIAS='default')
+class ReplicaRouterTest(TestCase):
+
+    def setUp(self):
+        reset_lag_checks()
+        self.factory = RequestFactory()
+        self.middleware = ReplicaMiddleware()
+
+    def tearDown(self):
+        reset_lag_checks()
+
+    def dispatch(self, request):
+        self.middleware.process_request(request)
+        alias = get_read_alias()
+        return alias, self.middleware.process_response(request, HttpResponse())
+
+    def test_api_reads_use_the_replica(self):
+        alias, response = self.dispatch(self.factory.get('/api/books/'))
+        self.assertEqual(alias, 'default')
+        self.assertNotIn('read_primary', response.cookies)
+        self.assertIsNone(get_read_alias())
+
+    def test_other_paths_and_writes_use_the_primary(self):
+        alias, _ = self.dispatch(self.factory.get('/admin/'))
+        self.assertIsNone(alias)
+        alias, _ = self.dispatch(self.factory.get('/api/user_salesforce/'))
+        self.assertIsNone(alias)
+        alias, response = self.dispatch(self.factory.post('/api/errata/'))
+        self.assertIsNone(alias)
+        # nothing was written
+        self.assertNotIn('read_primary', response.cookies)
+
+    def test_requests_that_write_pin_the_client(self):
+        request = self.factory.post('/api/errata/')
+        self.middleware.process_request(request)
+        User.objects.create(username='writer')
+        response = self.middleware.process_response(request, HttpResponse())
+        self.assertIn('read_primary', response.cookies)
+
+    def test_pinned_clients_read_from_the_primary(self):
+        request = self.factory.get('/api/books/')
+        request.COOKIES['read_primary'] = '1'
+        alias, _ = self.dispatch(request)
+        self.assertIsNone(alias)
+
+    def test_writes_during_a_read_switch_to_the_primary(self):
+        router = ReplicaRouter()
+        self.middleware.process_request(self.factory.get('/api/books/'))
+        self.assertEqual(router.db_for_read(User), 'default')
+        User.objects.create(username='replica')
+        self.assertIsNone(router.db_for_read(User))
+        response = self.middleware.process_response(self.factory.get('/api/books/'), HttpResponse())
+        self.assertIn('read_primary', response.cookies)
+
+    @override_settings(REPLICA_MAX_LAG=-1)
+    def test_lagging_replica_falls_back(self):
+        alias, _ = self.dispatch(self.factory.get('/api/books/'))
+        self.assertIsNone(alias)
+
+    @override_settings(REPLICA_DATABASE_ALIAS='missing')
+    def test_no_replica_configured(self):
+        alias, _ = self.dispatch(self.factory.get('/api/books/'))
+        self.assertIsNone(alias)
+
+
+# a second connection to the test database plays the replica, so the rows
+# it reads must be committed
+@override_settings(REPLICA_DATABASE_ALIAS='replica')
+class ReplicaCacheTest(TransactionTestCase):
+
+    def setUp(self):
+        connections.databases['replica'] = dict(connections['default'].settings_dict)
+        reset_lag_checks()
+        self.factory = RequestFactory()
+        self.middleware = ReplicaMiddleware()
+
+    def tearDown(self):
+        clear_read_alias()
+        reset_lag_checks()
+        connections['replica'].close()
+        del connections.databases['replica']
+        if hasattr(connections._connections, 'replica'):
+            delattr(connections._connections, 'replica')
+
+    def read_group_names(self):
+        request = self.factory.get('/api/books/')
+        self.middleware.process_request(request)
+        self.assertEqual(get_read_alias(), 'replica')
+        with CaptureQueriesContext(connections['replica']) as queries:
+            names = list(Group.objects.order_by('name').values_list('name', flat=True))
+        self.middleware.process_response(request, HttpResponse())
+        return names, len(queries)
+
+    def test_writes_to_the_primary_invalidate_replica_reads(self):
+        Group.objects.create(name='before')
+        self.assertEqual(self.read_group_names(), (['before'], 1))
+        # cached by cachalot
+        self.assertEqual(self.read_group_names(), (['before'], 0))
+
+        Group.objects.create(name='after')
+        self.assertEqual(self.read_group_names(), (['after', 'before'], 1))
+
+
+@override_settings(CACHALOT_ENABLED=False)
+class BatchAPITest(TestCase):
+
+    def batch(self, *queries):
+        response = self.client.get('/api/v2/batch/', {'q': queries})
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content.decode('utf-8'))['results']
+
+    def test_results_follow_the_queries(self):
+        root = Site.objects.get(is_default_site=True).root_page
+        results = self.batch('pages/?fields=title', 'pages/{}/'.format(root.pk), 'images')
+        self.assertEqual([r['status'] for r in results], [200, 200, 200])
+        self.assertIn(root.pk, [page['id'] for page in results[0]['data']['items']])
+        self.assertEqual(results[1]['data']['id'], root.pk)
+        self.assertEqual(results[2]['data']['meta']['total_count'], 0)
+
+    def test_errors_and_unknown_paths(self):
+        results = self.batch('pages/999999/', 'pages/?type=missing.Model', 'pages/abc/',
+                             'unknown/', '../admin/')
+        self.assertEqual([r['status'] for r in results], [404, 400, 400, 400, 400])
+        self.assertIn('unknown endpoint', results[3]['data']['message'])
+
+    def test_post_and_limits(self):
+        response = self.client.post('/api/v2/batch/', json.dumps({'queries': ['pages/']}),
+                                    content_type='application/json')
+        self.assertEqual(json.loads(response.content.decode('utf-8'))['results'][0]['status'], 200)
+        response = self.client.post('/api/v2/batch/', 'not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/api/v2/batch/').status_code, 400)
+        with self.settings(WAGTAILAPI_BATCH_LIMIT=1):
+            response = self.client.get('/api/v2/batch/', {'q': ['pages/', 'images/']})
+        self.assertEqual(response.status_code, 400)
+
+    def test_batches_share_request_setup(self):
+        with CaptureQueriesContext(connection) as single:
+            self.client.get('/api/v2/pages/')
+        with CaptureQueriesContext(connection) as batched:
+            self.batch('pages/', 'pages/', 'pages/')
+        # the site is looked up once for the whole batch
+        self.assertLess(len(batched), 3 * len(single))
+
+
+class WarmUpTest(TestCase):
+
+    def test_warm_up_reports_each_step(self):
+        report = warm_up()
+        self.assertEqual([name for name, _ in report['steps']],
+                         ['urls', 'page models', 'serializers', 'compress manifest',
+                          'sites', 'queries'])
+        self.assertGreater(report['maxrss'], 0)
+
+
+class HashedStorage(HashedManifestMixin, FileSystemStorage):
+    pass
+
+
+class StaticSyncTest(SimpleTestCase):
+
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.target = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source)
+        self.addCleanup(shutil.rmtree, self.target)
+        self.write('css/app.css', 'body {}')
+        self.write('js/app.js', 'var a;')
+
+        patch = override_settings(
+            STATICFILES_DIRS=[self.source],
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'])
+        patch.enable()
+        self.addCleanup(patch.disable)
+
+    def write(self, name, content):
+        path = os.path.join(self.source, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def sync(self):
+        storage = lambda: HashedStorage(location=self.target, base_url='/static/')
+        return StaticSync(storage, workers=2).run()
+
+    def test_only_changed_files_are_uploaded(self):
+        self.assertEqual(sorted(self.sync()['changed']), ['css/app.css', 'js/app.js'])
+        self.assertEqual(self.sync()['changed'], [])
+
+        self.write('css/app.css', 'body { color: red; }')
+        result = self.sync()
+        self.assertEqual(result['changed'], ['css/app.css'])
+        self.assertEqual(result['unchanged'], 1)
+        with open(os.path.join(self.target, 'css/app.css')) as f:
+            self.assertEqual(f.read(), 'body { color: red; }')
+
+    def test_urls_point_at_hashed_copies(self):
+        self.sync()
+        storage = HashedStorage(location=self.target, base_url='/static/')
+        url = storage.url('js/app.js')
+        self.assertRegex(url, r'^/static/js/app\.[0-9a-f]{12}\.js$')
+        self.assertTrue(storage.exists(url[len('/static/'):]))
+        self.assertEqual(storage.url('missing.css'), '/static/missing.css')
@@ -7,12 +7,13 @@ from wagtail.wagtailadmin import urls as wagtailadmin_urls
 from wagtail.wagtailcore import urls as wagtail_urls
 from wagtail.wagtaildocs import urls as wagtaildocs_urls
 from wagtail.wagtailimages import urls as wagtailimages_urls
-from .api import api_router
+from .api import api_router, batch as api_batch
 
 from news.search import search
 from news.feeds import RssBlogFeed, AtomBlogFeed
 
 from api import urls as api_urls
+from books.documents import serve_document
 
 admin.site.site_header = 'OpenStax'
 
@@ -21,6 +22,7 @@ urlpatterns = [
 
     url(r'^admin/', include(wagtailadmin_urls)),
     url(r'^accounts/', include('accounts.urls')),
+    url(r'^documents/(\d+)/(.*)$', serve_document, name='document_serve'),
     url(r'^documents/', include(wagtaildocs_urls)),
     url(r'^images/', include(wagtailimages_urls)),
 
@@ -28,6 +30,7 @@ urlpatterns = [
     url(r'^api/', include(wagtailapi_urls)),
     url(r'^api/', include(api_urls)),
     url(r'^api/search/$', search, name='search'),
+    url(r'^api/v2/batch/$', api_batch, name='api_batch'),
     url(r'^api/v2/', api_router.urls),
     url(r'^api/salesforce/', include('salesforce.urls')),
 
@@ -0,0 +1,110 @@
+import logging
+import resource
+import time
+from importlib import import_module
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import get_resolver, resolve
+from rest_framework.serializers import ModelSerializer
+from wagtail.wagtailcore.models import Site, get_page_models
+
+logger = logging.getLogger(__name__)
+
+
+def warm_urls():
+    resolver = get_resolver()
+    # builds the reverse lookup tables for every pattern
+    resolver.reverse_dict
+    for url in settings.WARMUP_URLS:
+        resolve(url)
+
+
+def warm_page_models():
+    models = get_page_models()
+    ContentType.objects.get_for_models(*models)
+    for model in models:
+        model._meta.get_fields()
+        model.allowed_subpage_models()
+
+
+def warm_serializers():
+    for app in apps.get_app_configs():
+        try:
+            module = import_module('{}.serializers'.format(app.name))
+        except ImportError:
+            continue
+        for value in vars(module).values():
+            if isinstance(value, type) and issubclass(value, ModelSerializer) \
+                    and value.__module__ == module.__name__ and hasattr(value, 'Meta'):
+                value().fields
+
+
+def warm_sites():
+    Site.get_site_root_paths()
+    return Site.objects.filter(is_default_site=True).first()
+
+
+def warm_compress_manifest():
+    if settings.COMPRESS_OFFLINE:
+        from compressor.cache import get_offline_manifest
+        get_offline_manifest()
+
+
+def warm_queries(site):
+    """
+    Render WARMUP_URLS once so their queries are in cachalot's cache.
+    """
+    factory = RequestFactory()
+    for url in settings.WARMUP_URLS:
+        request = factory.get(url)
+        request.user = AnonymousUser()
+        request.site = site
+        try:
+            match = resolve(url)
+            match.func(request, *match.args, **match.kwargs)
+        except Exception:
+            logger.warning("warm-up request for %s failed", url, exc_info=True)
+
+
+def warm_up():
+    """
+    Load the URL resolver, page types, serializers, the offline compress
+    manifest, site root paths and the queries behind WARMUP_URLS into this
+    process. Run it before the WSGI server forks (eg. gunicorn --preload) so
+    workers share the result.
+
+    Returns a report of the seconds spent on each step and the peak RSS.
+    """
+    report = {'steps': []}
+    started = time.time()
+
+    def step(name, func, *args):
+        step_started = time.time()
+        result = func(*args)
+        report['steps'].append((name, time.time() - step_started))
+        return result
+
+    step('urls', warm_urls)
+    step('page models', warm_page_models)
+    step('serializers', warm_serializers)
+    step('compress manifest', warm_compress_manifest)
+    site = step('sites', warm_sites)
+    step('queries', warm_queries, site)
+
+    # workers must not share the parent's sockets
+    for connection in connections.all():
+        connection.close()
+    for cache in caches.all():
+        cache.close()
+
+    report['seconds'] = time.time() - started
+    # kilobytes on linux
+    report['maxrss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    logger.info("warm-up took %.2fs, max rss %d KB", report['seconds'], report['maxrss'])
+    return report
@@ -23,6 +23,24 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "openstax.settings")
 from django.core.wsgi import get_wsgi_application
 application = get_wsgi_application()
 
+from django.conf import settings
+
+# Load caches and registries before the server forks its workers
+warmup = os.environ.get('OPENSTAX_WARMUP')
+if settings.WARMUP_ON_START if warmup is None else warmup == '1':
+    from openstax.warmup import warm_up
+    warm_up()
+
+# Count cachalot hits, misses and invalidations per table, after the
+# warm-up so its queries aren't counted by every worker
+if settings.CACHALOT_STATS_ENABLED:
+    from openstax.cache_stats import install
+    install()
+
+# Serve the static API snapshot if the database goes away
+from api.snapshot import wrap_application
+application = wrap_application(application)
+
 # Apply WSGI middleware here.
 # from helloworld.wsgi import HelloWorldApplication
 # application = HelloWorldApplication(application)
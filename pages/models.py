@@ -12,7 +12,7 @@ from wagtail.wagtailcore.models import Orderable, Page
 from wagtail.wagtailimages.blocks import ImageChooserBlock
 from wagtail.wagtaildocs.blocks import DocumentChooserBlock
 from wagtail.wagtailimages.edit_handlers import ImageChooserPanel
-from openstax.functions import build_image_url
+from openstax.functions import build_image_url, sibling_srcset
 
 from allies.models import Ally
 from books.models import Book
@@ -57,9 +57,14 @@ class StrategicAdvisors(models.Model):
 
     advisor_image = property(get_advisor_image)
 
+    def get_advisor_image_srcset(self):
+        return sibling_srcset(self, self.image_id, 'image')
+
+    advisor_image_srcset = property(get_advisor_image_srcset)
+
     description = models.TextField()
 
-    api_fields = ('name', 'advisor_image', 'description', )
+    api_fields = ('name', 'advisor_image', 'advisor_image_srcset', 'description', )
 
     panels = [
         FieldPanel('name'),
@@ -82,10 +87,14 @@ class OpenStaxTeam(models.Model):
         return build_image_url(self.image)
     team_member_image = property(get_team_member_image)
 
+    def get_team_member_image_srcset(self):
+        return sibling_srcset(self, self.image_id, 'image')
+    team_member_image_srcset = property(get_team_member_image_srcset)
+
     position = models.CharField(max_length=255)
     description = models.TextField()
 
-    api_fields = ('name', 'team_member_image', 'position', 'description', )
+    api_fields = ('name', 'team_member_image', 'team_member_image_srcset', 'position', 'description', )
 
     panels = [
         FieldPanel('name'),
@@ -461,7 +470,7 @@ class EcosystemAllies(Page):
 
     @property
     def allies(self):
-        allies = Ally.objects.all()
+        allies = Ally.objects.prefetch_related(*Ally.api_prefetch_related)
         ally_data = {}
         for ally in allies:
             ally_data[ally.slug] = {
@@ -513,9 +522,13 @@ class Funder(models.Model):
     def get_funder_logo(self):
         return build_image_url(self.logo)
     funder_logo = property(get_funder_logo)
+
+    def get_funder_logo_srcset(self):
+        return sibling_srcset(self, self.logo_id, 'logo')
+    funder_logo_srcset = property(get_funder_logo_srcset)
     description = models.TextField()
 
-    api_fields = ('title', 'funder_logo', 'description', )
+    api_fields = ('title', 'funder_logo', 'funder_logo_srcset', 'description', )
 
     panels = [
         FieldPanel('title'),
@@ -571,7 +584,11 @@ class Institutions(models.Model):
         return build_image_url(self.logo)
     institution_logo = property(get_institution_logo)
 
-    api_fields = ('title', 'institution_logo')
+    def get_institution_logo_srcset(self):
+        return sibling_srcset(self, self.logo_id, 'logo')
+    institution_logo_srcset = property(get_institution_logo_srcset)
+
+    api_fields = ('title', 'institution_logo', 'institution_logo_srcset')
 
     panels = [
         FieldPanel('title'),
@@ -1,6 +1,15 @@
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from wagtail.tests.utils import WagtailTestUtils, WagtailPageTests
 from wagtail.wagtailcore.models import Page
+from wagtail.wagtaildocs.models import Document
+from wagtail.wagtailimages.tests.utils import Image, get_test_image_file
 from pages.models import (HomePage,
                           HigherEducation,
                           ContactUs,
@@ -21,10 +30,13 @@ from pages.models import (HomePage,
                           AdoptForm,
                           InterestForm,
                           Marketing,
-                          Technology)
+                          Technology,
+                          AboutUsOpenStaxTeam)
 from allies.models import Ally
 from news.models import NewsIndex
 from books.models import BookIndex
+from openstax.prefetch import prefetch_stream_fields
+from openstax.renditions import generate_renditions
 
 
 class HomePageTests(WagtailPageTests):
@@ -117,3 +129,59 @@ class AdminPages(TestCase, WagtailTestUtils):
         self.assertEqual(response.status_code, 200)
         self.assertIn(b'Sorry, no pages match', response.content)
 
+
+class StreamFieldPrefetchTests(TestCase):
+
+    def test_choosers_resolved_in_bulk(self):
+        image = Image.objects.create(title="Column image", file=get_test_image_file())
+        document = Document.objects.create(title="Column document",
+                                           file=ContentFile(b'document', name='column.txt'))
+        column = {'type': 'column',
+                  'value': {'heading': 'Heading',
+                            'image': {'image': image.pk, 'alt_text': '', 'alignment': 'left'},
+                            'document': document.pk}}
+        homepage = HomePage(title="Prefetch", slug="prefetch",
+                            row_1=json.dumps([column, column]),
+                            row_2=json.dumps([column]))
+        Page.objects.get(title="Root").add_child(instance=homepage)
+
+        page = HomePage.objects.get(pk=homepage.pk)
+        with CaptureQueriesContext(connection) as queries:
+            prefetch_stream_fields(page)
+        self.assertLessEqual(len(queries), 2)
+
+        with self.assertNumQueries(0):
+            columns = list(page.row_1) + list(page.row_2)
+            self.assertEqual([c.value['image']['image'] for c in columns], [image] * 3)
+            self.assertEqual([c.value['document'] for c in columns], [document] * 3)
+
+
+class SrcsetTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        about = AboutUs(title="About", slug="about", tagline="tagline", intro_heading="heading",
+                        intro_paragraph="paragraph", our_team_heading="team")
+        Page.objects.get(title="Root").add_child(instance=about)
+        self.images = []
+        for i in range(3):
+            image = Image.objects.create(title="Member {}".format(i), file=get_test_image_file())
+            generate_renditions(image.pk)
+            AboutUsOpenStaxTeam.objects.create(page=about, name="Member {}".format(i),
+                                               image=image, position="", description="")
+            self.images.append(image)
+        self.page = AboutUs.objects.get(pk=about.pk)
+
+    def test_team_srcsets(self):
+        members = list(self.page.openstax_team.all())
+        srcset = members[0].team_member_image_srcset
+        self.assertEqual(set(srcset), set(name for name, spec in settings.IMAGE_RENDITIONS))
+        self.assertTrue(all(url.startswith(settings.MEDIA_URL) for url in srcset.values()))
+
+    def test_team_srcsets_are_resolved_in_one_batch(self):
+        members = list(self.page.openstax_team.all())
+        # the sibling images, the default site and their renditions
+        with self.assertNumQueries(3):
+            srcsets = [member.team_member_image_srcset for member in members]
+        self.assertEqual(len(set(str(sorted(s.items())) for s in srcsets)), 3)
@@ -1,6 +1,7 @@
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.renderers import JSONRenderer
+from openstax.prefetch import prefetch_stream_fields
 from .models import (GeneralPage,
                      HomePage,
                      HigherEducation,
@@ -55,6 +56,12 @@ class JSONResponse(HttpResponse):
         super(JSONResponse, self).__init__(content, **kwargs)
 
 
+def page_response(page, serializer_class):
+    prefetch_stream_fields(page)
+    serializer = serializer_class(page)
+    return JSONResponse(serializer.data)
+
+
 @csrf_exempt
 def page_detail(request, slug):
     """
@@ -64,152 +71,127 @@ def page_detail(request, slug):
 
     try:
         page = HomePage.objects.get(slug=slug)
-        for column in page.row_1:
-            for name, block in column.value.bound_blocks.items():
-                if name == 'image':
-                    print(block.value)
-        serializer = HomePageSerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, HomePageSerializer)
     except HomePage.DoesNotExist:
         page_found = False
 
     try:
         page = HigherEducation.objects.get(slug=slug)
-        serializer = HigherEducationSerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, HigherEducationSerializer)
     except HigherEducation.DoesNotExist:
         page_found = False
 
     try:
         page = GeneralPage.objects.get(slug=slug)
-        serializer = GeneralPageSerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, GeneralPageSerializer)
     except GeneralPage.DoesNotExist:
         page_found = False
 
     try:
         page = AboutUs.objects.get(slug=slug)
-        serializer = AboutUsSerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, AboutUsSerializer)
     except AboutUs.DoesNotExist:
         page_found = False
 
     try:
         page = EcosystemAllies.objects.get(slug=slug)
-        serializer = EcosystemAlliesSerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, EcosystemAlliesSerializer)
     except EcosystemAllies.DoesNotExist:
         page_found = False
 
     try:
         page = ContactUs.objects.get(slug=slug)
-        serializer = ContactUsSerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, ContactUsSerializer)
     except ContactUs.DoesNotExist:
         page_found = False
 
     try:
         page = FoundationSupport.objects.get(slug=slug)
-        serializer = FoundationSupportSerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, FoundationSupportSerializer)
     except FoundationSupport.DoesNotExist:
         page_found = False
 
     try:
         page = OurImpact.objects.get(slug=slug)
-        serializer = OurImpactSerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, OurImpactSerializer)
     except OurImpact.DoesNotExist:
         page_found = False
 
     try:
         page = Give.objects.get(slug=slug)
-        serializer = GiveSerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, GiveSerializer)
     except Give.DoesNotExist:
         page_found = False
 
     try:
         page = TermsOfService.objects.get(slug=slug)
-        serializer = TermsOfServiceSerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, TermsOfServiceSerializer)
     except TermsOfService.DoesNotExist:
         page_found = False
 
     try:
         page = AP.objects.get(slug=slug)
-        serializer = APSerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, APSerializer)
     except AP.DoesNotExist:
         page_found = False
 
     try:
         page = FAQ.objects.get(slug=slug)
-        serializer = FAQSerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, FAQSerializer)
     except FAQ.DoesNotExist:
         page_found = False
 
     try:
         page = Support.objects.get(slug=slug)
-        serializer = SupportSerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, SupportSerializer)
     except Support.DoesNotExist:
         page_found = False
 
     try:
         page = GiveForm.objects.get(slug=slug)
-        serializer = GiveFormSerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, GiveFormSerializer)
     except GiveForm.DoesNotExist:
         page_found = False
 
     try:
         page = Accessibility.objects.get(slug=slug)
-        serializer = AccessibilitySerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, AccessibilitySerializer)
     except Accessibility.DoesNotExist:
         page_found = False
 
     try:
         page = Licensing.objects.get(slug=slug)
-        serializer = LicensingSerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, LicensingSerializer)
     except Licensing.DoesNotExist:
         page_found = False
 
     try:
         page = CompCopy.objects.get(slug=slug)
-        serializer = CompCopySerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, CompCopySerializer)
     except CompCopy.DoesNotExist:
         page_found = False
 
     try:
         page = AdoptForm.objects.get(slug=slug)
-        serializer = AdoptFormSerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, AdoptFormSerializer)
     except AdoptForm.DoesNotExist:
         page_found = False
 
     try:
         page = InterestForm.objects.get(slug=slug)
-        serializer = InterestFormSerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, InterestFormSerializer)
     except InterestForm.DoesNotExist:
         page_found = False
 
     try:
         page = Marketing.objects.get(slug=slug)
-        serializer = MarketingSerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, MarketingSerializer)
     except Marketing.DoesNotExist:
         page_found = False
 
     try:
         page = Technology.objects.get(slug=slug)
-        serializer = TechnologySerializer(page)
-        return JSONResponse(serializer.data)
+        return page_response(page, TechnologySerializer)
     except Technology.DoesNotExist:
         page_found = False
 
@@ -1,64 +1,42 @@
-from django.contrib.auth.models import User, Group
-
-from salesforce.salesforce import Salesforce
+from django.contrib.auth.models import Group
 from social.apps.django_app.default.models import \
     DjangoStorage as SocialAuthStorage
 
+from accounts.groups import FACULTY_GROUP
+from salesforce.models import SalesforceContact, SalesforceLead
 
-def check_if_faculty_pending(user_id):
-    with Salesforce() as sf:
-        try:
-            social_user = SocialAuthStorage.user.objects.filter(user_id=user_id)
-            accounts_id = social_user[0].uid
-            command = "SELECT OS_Accounts_ID__c FROM Lead WHERE OS_Accounts_ID__c = '{}' AND Status != 'Converted' AND LeadSource = 'OSC Faculty'".format(accounts_id)
-            response = sf.query(command)
+# These answer from the local mirror of Salesforce kept current by the
+# sync_salesforce_mirror command, in one query each.
 
-            try:
-                record = response['records'][0]['OS_Accounts_ID__c']
-                return True
-            except IndexError:
-                return False
-        except IndexError:
-            return False
 
+def accounts_ids(user_id):
+    """
+    Subquery of the OpenStax Accounts ids of a user.
+    """
+    return SocialAuthStorage.user.objects.filter(user_id=user_id).values('uid')
 
-def update_faculty_status(user_id):
-    faculty_group, created = Group.objects.get_or_create(name="Faculty")
 
-    with Salesforce() as sf:
-        try:
-            user = User.objects.get(pk=user_id)
-            social_user = SocialAuthStorage.user.objects.filter(user=user)
-            accounts_id = social_user[0].uid
-            command = "SELECT Accounts_ID__c FROM Contact " \
-                      "WHERE Faculty_Verified__c = 'Confirmed' " \
-                      "AND Accounts_ID__c = '{}'".format(accounts_id)
-            response = sf.query(command)
+def pending_faculty_leads():
+    return SalesforceLead.objects.filter(lead_source='OSC Faculty').exclude(status='Converted')
 
-            try:
-                record = response['records'][0]['Accounts_ID__c']
-                if record:
-                    faculty_group.user_set.add(user)
-                    user.save()
-                return True
-            except IndexError:
-                return False
-        except IndexError:
-            return False
 
+def check_if_faculty_pending(user_id):
+    return pending_faculty_leads().filter(accounts_id__in=accounts_ids(user_id)).exists()
 
-def check_if_email_used(institutional_email):
-    with Salesforce() as sf:
-        try:
-            #social_user = SocialAuthStorage.user.objects.filter(user_id=user_id)
-            #accounts_id = social_user[0].uid
-            command = "SELECT OS_Accounts_ID__c FROM Lead WHERE Institutional_Email__c = '{}' AND LeadSource = 'OSC Faculty' AND Status != 'Converted'".format(institutional_email)
-            response = sf.query(command)
 
-            try:
-                record = response['records'][0]['OS_Accounts_ID__c']
-                return True
-            except IndexError:
-                return False
-        except IndexError:
-            return False
+def update_faculty_status(user_id):
+    """
+    Add the user to the Faculty group if Salesforce confirmed them, returns
+    True when they are confirmed.
+    """
+    confirmed = SalesforceContact.objects.filter(accounts_id__in=accounts_ids(user_id),
+                                                 faculty_verified='Confirmed').exists()
+    if confirmed:
+        faculty_group, created = Group.objects.get_or_create(name=FACULTY_GROUP)
+        faculty_group.user_set.add(user_id)
+    return confirmed
+
+
+def check_if_email_used(institutional_email):
+    return pending_faculty_leads().filter(
+        institutional_email=institutional_email.lower()).exists()
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from salesforce.mirror import sync_mirror
+from salesforce.salesforce import Salesforce
+
+
+class Command(BaseCommand):
+    help = ("copy Contacts and Leads changed since the last run into the local mirror "
+            "used for faculty verification, run it every few minutes")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', default=False,
+                            help="copy every record and delete the ones removed from Salesforce")
+
+    def handle(self, *args, **options):
+        with Salesforce() as sf:
+            synced = sync_mirror(sf, full=options['full'])
+        response = self.style.SUCCESS("Successfully synced {}".format(
+            ', '.join('{} {}s'.format(count, name) for name, count in sorted(synced.items()))))
+        self.stdout.write(response)
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.6 on 2017-08-01 14:20
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salesforce', '0003_school'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesforceContact',
+            fields=[
+                ('sf_id', models.CharField(max_length=18, primary_key=True, serialize=False)),
+                ('accounts_id', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('faculty_verified', models.CharField(blank=True, max_length=255)),
+                ('system_modstamp', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SalesforceLead',
+            fields=[
+                ('sf_id', models.CharField(max_length=18, primary_key=True, serialize=False)),
+                ('accounts_id', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('institutional_email', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('status', models.CharField(blank=True, max_length=255)),
+                ('lead_source', models.CharField(blank=True, max_length=255)),
+                ('system_modstamp', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SalesforceSyncWatermark',
+            fields=[
+                ('object_name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('system_modstamp', models.DateTimeField(null=True)),
+                ('synced', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,83 @@
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.importer import chunked
+from .models import SalesforceContact, SalesforceLead, SalesforceSyncWatermark
+
+CHUNK_SIZE = 1000
+
+
+def contact_fields(record):
+    return {
+        'accounts_id': record['Accounts_ID__c'] or '',
+        'faculty_verified': record['Faculty_Verified__c'] or '',
+    }
+
+
+def lead_fields(record):
+    return {
+        'accounts_id': record['OS_Accounts_ID__c'] or '',
+        'institutional_email': (record['Institutional_Email__c'] or '').lower(),
+        'status': record['Status'] or '',
+        'lead_source': record['LeadSource'] or '',
+    }
+
+
+# Salesforce object: (mirror model, fields to select, record -> model fields)
+MIRRORS = (
+    ('Contact', SalesforceContact,
+     ('Accounts_ID__c', 'Faculty_Verified__c'), contact_fields),
+    ('Lead', SalesforceLead,
+     ('OS_Accounts_ID__c', 'Institutional_Email__c', 'Status', 'LeadSource'), lead_fields),
+)
+
+
+def soql_datetime(value):
+    return value.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def sync_object(sf, object_name, model, fields, to_fields, full=False):
+    """
+    Copy the records of object_name modified since the stored SystemModstamp
+    watermark (every record when full) into model, CHUNK_SIZE rows per
+    transaction. A full sync also deletes rows that no longer exist in
+    Salesforce. Returns the number of records copied.
+    """
+    watermark, _ = SalesforceSyncWatermark.objects.get_or_create(object_name=object_name)
+    command = "SELECT Id, SystemModstamp, {} FROM {}".format(', '.join(fields), object_name)
+    if watermark.system_modstamp and not full:
+        # >= because the watermark is truncated to the second, records seen
+        # again are simply rewritten
+        command += " WHERE SystemModstamp >= {}".format(soql_datetime(watermark.system_modstamp))
+    command += " ORDER BY SystemModstamp"
+    records = sf.query_all(command)['records']
+
+    seen = set()
+    for chunk in chunked(records, CHUNK_SIZE):
+        rows = [model(sf_id=record['Id'],
+                      system_modstamp=parse_datetime(record['SystemModstamp']),
+                      **to_fields(record))
+                for record in chunk]
+        seen.update(row.pk for row in rows)
+        newest = max(row.system_modstamp for row in rows)
+        with transaction.atomic():
+            model.objects.filter(pk__in=[row.pk for row in rows]).delete()
+            model.objects.bulk_create(rows)
+            if watermark.system_modstamp is None or newest > watermark.system_modstamp:
+                watermark.system_modstamp = newest
+            watermark.save()
+
+    if full:
+        stale = set(model.objects.values_list('pk', flat=True)) - seen
+        for chunk in chunked(stale, CHUNK_SIZE):
+            model.objects.filter(pk__in=chunk).delete()
+    return len(records)
+
+
+def sync_mirror(sf, full=False):
+    """
+    Sync every mirrored object, returns {object name: records copied}.
+    """
+    return dict((object_name, sync_object(sf, object_name, model, fields, to_fields, full))
+                for object_name, model, fields, to_fields in MIRRORS)
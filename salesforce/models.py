@@ -16,3 +16,43 @@ class School(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class SalesforceContact(models.Model):
+    """
+    Local copy of the Contact fields used for faculty verification, kept
+    current by the sync_salesforce_mirror command (see salesforce.mirror).
+    """
+    sf_id = models.CharField(max_length=18, primary_key=True)
+    accounts_id = models.CharField(max_length=255, blank=True, db_index=True)
+    faculty_verified = models.CharField(max_length=255, blank=True)
+    system_modstamp = models.DateTimeField()
+
+    def __str__(self):
+        return self.sf_id
+
+
+class SalesforceLead(models.Model):
+    """
+    Local copy of the Lead fields used to find pending faculty requests.
+    institutional_email is stored lowercased, Salesforce compares it
+    case-insensitively.
+    """
+    sf_id = models.CharField(max_length=18, primary_key=True)
+    accounts_id = models.CharField(max_length=255, blank=True, db_index=True)
+    institutional_email = models.CharField(max_length=255, blank=True, db_index=True)
+    status = models.CharField(max_length=255, blank=True)
+    lead_source = models.CharField(max_length=255, blank=True)
+    system_modstamp = models.DateTimeField()
+
+    def __str__(self):
+        return self.sf_id
+
+
+class SalesforceSyncWatermark(models.Model):
+    object_name = models.CharField(max_length=50, primary_key=True)
+    system_modstamp = models.DateTimeField(null=True)
+    synced = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return '{}: {}'.format(self.object_name, self.system_modstamp)
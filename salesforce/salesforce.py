@@ -1,45 +1,52 @@
 from contextlib import ContextDecorator
 
 from django.conf import settings
-from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
 from simple_salesforce import Salesforce as SimpleSalesforce
 
+from openstax.http import get_session
+
+TOKEN_CACHE_KEY = 'salesforce:session'
+# Salesforce sessions time out after 2 hours of inactivity by default
+TOKEN_CACHE_TIMEOUT = 60 * 60
+
 
 class Salesforce(SimpleSalesforce, ContextDecorator):
-    _default_session_key = 0
+    """
+    simple_salesforce client that reuses the session token of the last
+    login, kept in the cache under TOKEN_CACHE_KEY. A failure inside the
+    context manager drops the token so the next client logs in again.
+    """
 
     def __init__(self, *args, **kwargs):
-        session_store = SessionStore(session_key=self._default_session_key)
-        if 'sf_instance' in session_store.keys() and 'sf_session_id' in session_store.keys():
+        token = cache.get(TOKEN_CACHE_KEY)
+        if token:
             try:
-                super(Salesforce, self).__init__(instance=session_store['sf_instance'],
-                                                 session_id=session_store['sf_session_id'])
+                super(Salesforce, self).__init__(instance=token['sf_instance'],
+                                                 session_id=token['sf_session_id'],
+                                                 session=get_session('salesforce'))
             except:
                 raise RuntimeError("salesforce session failed")
         else:
             try:
-                super(Salesforce, self).__init__(**settings.SALESFORCE)
+                super(Salesforce, self).__init__(session=get_session('salesforce'), **settings.SALESFORCE)
             except AttributeError:
+                kwargs.setdefault('session', get_session('salesforce'))
                 super(Salesforce, self).__init__(*args, **kwargs)
             except TypeError:
                 raise RuntimeError("salesforce init failed")
-            session_store['sf_instance'] = self.sf_instance
-            session_store['sf_session_id'] = self.session_id
-            session_store.save()
-            self.update_session_key(session_store.session_key)
+            cache.set(TOKEN_CACHE_KEY,
+                      {'sf_instance': self.sf_instance, 'sf_session_id': self.session_id},
+                      TOKEN_CACHE_TIMEOUT)
 
     @classmethod
-    def update_session_key(cls, key):
-        cls._default_session_key = key
+    def forget_token(cls):
+        cache.delete(TOKEN_CACHE_KEY)
 
     def __enter__(self):
         return self
 
     def __exit__(self, *exc):
         if not exc == (None, None, None):
-            session_store = SessionStore(session_key=self._default_session_key)
-            session_store.delete()
-            self.update_session_key(None)
+            self.forget_token()
         return False
-
-